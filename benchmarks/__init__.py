@@ -0,0 +1,10 @@
+"""
+Deterministic benchmarks for the agent loop.
+
+Everything the bot talks to is replaced by a local stand-in: a scripted
+Anthropic client replays recorded tool_use sequences, and stub HTTP servers
+answer for Sonarr, Radarr, qBittorrent and Plex from a generated library.
+Runs cost nothing and repeat exactly, so changes show up as numbers.
+
+    python -m benchmarks.run --users 4 --requests 10
+"""
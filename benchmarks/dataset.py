@@ -0,0 +1,335 @@
+"""
+Deterministic synthetic media library.
+
+Generates Sonarr series/episodes, Radarr movies, qBittorrent torrents and
+Plex sections from a seed. A few well-known titles are always present at
+fixed IDs so scripted scenarios can refer to them.
+
+Scales from a home server to a large library (50k series, 100k episodes,
+5k torrents); episodes are generated per series on demand, so only the
+series a request touches cost memory. Write the payloads to disk with:
+
+    python -m benchmarks.dataset --series 50000 --episodes 100000 --out /tmp/library
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote_plus
+
+# Titles scenarios rely on: (title, year, tvdbId); IDs are assigned in order from 1
+ANCHOR_SERIES = [
+    ("Breaking Bad", 2008, 81189),
+    ("The Office (US)", 2005, 73244),
+    ("Naruto Shippuden", 2007, 79824),
+    ("Fresh Off the Boat", 2015, 281620),
+]
+# Not in the library; only /series/lookup knows it
+LOOKUP_ONLY_SERIES = [("Severance", 2022, 371980)]
+# Long-running series that takes this share of a fixed episode budget (worst case for sonarr-missing)
+LONG_SERIES_ID = 3
+LONG_SERIES_SHARE = 0.2
+# (title, year, tmdbId); Inception is deliberately *not* in the library (lookup only)
+ANCHOR_MOVIES = [
+    ("The Matrix", 1999, 603),
+    ("Dune", 2021, 438631),
+    ("Amélie", 2001, 194),
+]
+LOOKUP_ONLY_MOVIES = [("Inception", 2010, 27205)]
+
+WORDS = [
+    "Shadow", "River", "Empire", "Last", "Silent", "Golden", "Night", "Broken", "Crown", "Winter",
+    "Lost", "City", "Ghost", "Iron", "Wild", "Hidden", "Storm", "Glass", "Red", "Signal",
+    "Harbor", "Echo", "Paper", "Stone", "North", "Fire", "Blue", "Garden", "Machine", "Dream",
+]
+QUALITIES = ["HDTV-720p", "WEBDL-1080p", "Bluray-1080p", "WEBDL-2160p"]
+TORRENT_STATES = ["downloading", "stalledDL", "uploading", "stalledUP", "pausedUP", "queuedDL"]
+
+GB = 1024 ** 3
+
+
+def _title(rng: random.Random, index: int) -> str:
+    words = rng.sample(WORDS, rng.randint(1, 3))
+    return f"{' '.join(words)} {index}" if rng.random() < 0.5 else " ".join(words)
+
+
+class Library:
+    """A generated library and the payloads each service would return for it."""
+
+    def __init__(self, series: int = 200, movies: int = 300, torrents: int = 50, seed: int = 0, episodes: Optional[int] = None):
+        """
+        Args:
+            series, movies, torrents: Library size
+            seed: Random seed; the same arguments always produce the same library
+            episodes: Total episode count to spread over the series (default: a random
+                1-8 seasons of 6-24 episodes each); LONG_SERIES_ID gets LONG_SERIES_SHARE of it
+        """
+        self.seed = seed
+        rng = random.Random(seed)
+
+        self.series: List[Dict[str, Any]] = []
+        for index in range(max(series, len(ANCHOR_SERIES))):
+            if index < len(ANCHOR_SERIES):
+                title, year, tvdb_id = ANCHOR_SERIES[index]
+            else:
+                title, year, tvdb_id = _title(rng, index), rng.randint(1970, 2025), 300000 + index
+            seasons = 1 + rng.randint(0, 7)
+            self.series.append({
+                "id": index + 1,
+                "title": title,
+                "sortTitle": title.lower(),
+                "year": year,
+                "tvdbId": tvdb_id,
+                "monitored": index < len(ANCHOR_SERIES) or rng.random() < 0.8,
+                "status": rng.choice(["continuing", "ended"]),
+                "path": f"/tv/{title}",
+                "qualityProfileId": 1,
+                "seasonCount": seasons,
+                "episodesPerSeason": 6 + rng.randint(0, 18),
+                "statistics": {"sizeOnDisk": rng.randint(1, 400) * GB // 4},
+            })
+
+        if episodes is not None:
+            self._spread_episodes(episodes)
+
+        self.movies: List[Dict[str, Any]] = []
+        for index in range(max(movies, len(ANCHOR_MOVIES))):
+            if index < len(ANCHOR_MOVIES):
+                title, year, tmdb_id = ANCHOR_MOVIES[index]
+            else:
+                title, year, tmdb_id = _title(rng, index), rng.randint(1950, 2025), 500000 + index
+            has_file = rng.random() < 0.85
+            self.movies.append({
+                "id": index + 1,
+                "title": title,
+                "sortTitle": title.lower(),
+                "year": year,
+                "tmdbId": tmdb_id,
+                "monitored": rng.random() < 0.9,
+                "hasFile": has_file,
+                "path": f"/movies/{title} ({year})",
+                "qualityProfileId": 1,
+                "sizeOnDisk": rng.randint(1, 60) * GB // 2 if has_file else 0,
+            })
+
+        self.torrents: List[Dict[str, Any]] = []
+        for index in range(torrents):
+            size = rng.randint(1, 80) * GB // 4
+            state = rng.choice(TORRENT_STATES)
+            progress = 1.0 if state in ("uploading", "stalledUP", "pausedUP") else round(rng.random(), 3)
+            self.torrents.append({
+                "hash": f"{rng.getrandbits(160):040x}",
+                "name": f"{_title(rng, index).replace(' ', '.')}.S0{rng.randint(1, 9)}.{rng.choice(QUALITIES)}",
+                "state": state,
+                "progress": progress,
+                "size": size,
+                "total_size": size,
+                "downloaded": int(size * progress),
+                "dlspeed": rng.randint(0, 20) * 1024 * 1024 if state == "downloading" else 0,
+                "upspeed": rng.randint(0, 5) * 1024 * 1024,
+                "eta": rng.randint(60, 36000) if progress < 1 else 8640000,
+                "category": rng.choice(["tv-sonarr", "radarr"]),
+                "added_on": 1700000000 + index * 3600,
+            })
+
+        self._next_movie_id = len(self.movies) + 1
+        self.torrent_revision = 0  # bumped when torrents are added (qBittorrent sync rid)
+        self.plex_scanned_at = {"1": 1700000000, "2": 1700000000}
+
+    def _spread_episodes(self, total: int):
+        """Resize seasons so the library holds about `total` episodes."""
+        long_series = self.series[LONG_SERIES_ID - 1]
+        long_episodes = int(total * LONG_SERIES_SHARE)
+        long_series["seasonCount"] = 20
+        long_series["episodesPerSeason"] = max(1, math.ceil(long_episodes / 20))
+
+        others = [series for series in self.series if series is not long_series]
+        current = sum(series["seasonCount"] * series["episodesPerSeason"] for series in others)
+        factor = (total - long_episodes) / current if current else 0
+        for series in others:
+            target = max(1, round(series["seasonCount"] * series["episodesPerSeason"] * factor))
+            series["seasonCount"] = min(series["seasonCount"], target)
+            series["episodesPerSeason"] = max(1, round(target / series["seasonCount"]))
+
+    @property
+    def episode_count(self) -> int:
+        return sum(series["seasonCount"] * series["episodesPerSeason"] for series in self.series)
+
+    # --- Sonarr ---
+
+    def episodes(self, series_id: int) -> List[Dict[str, Any]]:
+        """Episodes of one series (generated on demand, stable across calls)."""
+        if not 1 <= series_id <= len(self.series):
+            return []
+        series = self.series[series_id - 1]
+        rng = random.Random(self.seed * 1_000_003 + series_id)
+        episodes = []
+        for season in range(1, series["seasonCount"] + 1):
+            for number in range(1, series["episodesPerSeason"] + 1):
+                episodes.append({
+                    "id": series_id * 100000 + len(episodes) + 1,
+                    "seriesId": series_id,
+                    "seasonNumber": season,
+                    "episodeNumber": number,
+                    "absoluteEpisodeNumber": len(episodes) + 1,
+                    "title": f"Episode {number}",
+                    "airDate": f"{series['year'] + season - 1}-{(number % 12) + 1:02d}-{(number % 27) + 1:02d}",
+                    "hasFile": rng.random() < 0.9,
+                    "monitored": series["monitored"],
+                })
+        return episodes
+
+    def series_lookup(self, term: str) -> List[Dict[str, Any]]:
+        """What /series/lookup returns: matching library entries (with IDs) first, then LOOKUP_ONLY_SERIES."""
+        term = term.lower()
+        found = [dict(series) for series in self.series if term in series["title"].lower()]
+        known = {series["tvdbId"] for series in found}
+        for title, year, tvdb_id in LOOKUP_ONLY_SERIES:
+            if term in title.lower() and tvdb_id not in known:
+                found.append({"title": title, "year": year, "tvdbId": tvdb_id, "monitored": False, "seasonCount": 2})
+        return found[:20]
+
+    def add_series(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a series (or return the existing one with the same tvdbId)."""
+        for series in self.series:
+            if series["tvdbId"] == payload.get("tvdbId"):
+                return series
+        title = payload.get("title", f"Series {payload.get('tvdbId')}")
+        series = {
+            "id": len(self.series) + 1,
+            "title": title,
+            "sortTitle": title.lower(),
+            "year": payload.get("year", 0),
+            "tvdbId": payload.get("tvdbId"),
+            "monitored": payload.get("monitored", True),
+            "status": "continuing",
+            "path": f"{payload.get('rootFolderPath', '/tv')}/{title}",
+            "qualityProfileId": payload.get("qualityProfileId", 1),
+            "seasonCount": 1,
+            "episodesPerSeason": 10,
+            "statistics": {"sizeOnDisk": 0},
+        }
+        self.series.append(series)
+        return series
+
+    # --- Radarr ---
+
+    def movie_lookup(self, term: str) -> List[Dict[str, Any]]:
+        """What /movie/lookup returns, including titles not yet in the library."""
+        term = term.lower()
+        found = [dict(movie) for movie in self.movies if term in movie["title"].lower()]
+        known = {movie["tmdbId"] for movie in found}
+        for title, year, tmdb_id in LOOKUP_ONLY_MOVIES:
+            if term in title.lower() and tmdb_id not in known:
+                found.append({"title": title, "year": year, "tmdbId": tmdb_id, "monitored": False, "hasFile": False})
+        return found[:20]
+
+    def add_movie(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a movie (or return the existing one with the same tmdbId)."""
+        for movie in self.movies:
+            if movie["tmdbId"] == payload.get("tmdbId"):
+                return movie
+        movie = {
+            "id": self._next_movie_id,
+            "title": payload.get("title", f"Movie {payload.get('tmdbId')}"),
+            "sortTitle": payload.get("title", "").lower(),
+            "year": payload.get("year", 0),
+            "tmdbId": payload.get("tmdbId"),
+            "monitored": payload.get("monitored", True),
+            "hasFile": False,
+            "path": f"/movies/{payload.get('title', '')}",
+            "qualityProfileId": payload.get("qualityProfileId", 1),
+            "sizeOnDisk": 0,
+        }
+        self._next_movie_id += 1
+        self.movies.append(movie)
+        return movie
+
+    # --- qBittorrent ---
+
+    def add_torrent(self, url: str, category: str = "") -> Optional[Dict[str, Any]]:
+        """Add a magnet link as a fresh torrent (None if it's already there or not a magnet)."""
+        match = re.search(r"xt=urn:btih:([0-9a-fA-F]{40})", url)
+        if not match or any(t["hash"] == match.group(1).lower() for t in self.torrents):
+            return None
+        name = re.search(r"dn=([^&]+)", url)
+        torrent = {
+            "hash": match.group(1).lower(),
+            "name": unquote_plus(name.group(1)) if name else match.group(1).lower(),
+            "state": "metaDL",
+            "progress": 0.0,
+            "size": 0,
+            "total_size": -1,
+            "downloaded": 0,
+            "dlspeed": 0,
+            "upspeed": 0,
+            "eta": 8640000,
+            "category": category,
+            "added_on": 1700000000 + len(self.torrents) * 3600,
+        }
+        self.torrents.append(torrent)
+        self.torrent_revision += 1
+        return torrent
+
+    # --- Queues, Plex ---
+
+    def queue(self, kind: str) -> Dict[str, Any]:
+        """A Sonarr/Radarr /queue page built from the downloading torrents."""
+        category = "tv-sonarr" if kind == "series" else "radarr"
+        records = [
+            {"id": index + 1, "title": torrent["name"], "status": "downloading", "size": torrent["size"],
+             "sizeleft": torrent["size"] - torrent["downloaded"], "downloadId": torrent["hash"].upper()}
+            for index, torrent in enumerate(self.torrents)
+            if torrent["category"] == category and torrent["progress"] < 1
+        ]
+        return {"page": 1, "pageSize": 50, "totalRecords": len(records), "records": records[:50]}
+
+    def plex_sections(self) -> Dict[str, Any]:
+        return {"MediaContainer": {"size": 2, "Directory": [
+            {"key": "1", "type": "movie", "title": "Movies", "count": len(self.movies),
+             "scannedAt": self.plex_scanned_at["1"]},
+            {"key": "2", "type": "show", "title": "TV Shows", "count": len(self.series),
+             "scannedAt": self.plex_scanned_at["2"]},
+        ]}}
+
+    def plex_section(self, key: str) -> Dict[str, Any]:
+        items = self.movies if key == "1" else self.series if key == "2" else []
+        metadata = [
+            {"ratingKey": str(item["id"]), "title": item["title"], "year": item["year"],
+             "type": "movie" if key == "1" else "show", "addedAt": 1600000000 + item["id"]}
+            for item in items
+        ]
+        return {"MediaContainer": {"size": len(metadata), "Metadata": metadata}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic library's service payloads as JSON")
+    parser.add_argument("--series", type=int, default=1000)
+    parser.add_argument("--movies", type=int, default=1000)
+    parser.add_argument("--torrents", type=int, default=100)
+    parser.add_argument("--episodes", type=int, help="total episodes (default: random per series)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, required=True, help="output directory")
+    args = parser.parse_args(argv)
+
+    library = Library(args.series, args.movies, args.torrents, args.seed, args.episodes)
+    args.out.mkdir(parents=True, exist_ok=True)
+    (args.out / "series.json").write_text(json.dumps(library.series))
+    (args.out / "movies.json").write_text(json.dumps(library.movies))
+    (args.out / "torrents.json").write_text(json.dumps(library.torrents))
+    with open(args.out / "episodes.jsonl", "w") as f:
+        for series in library.series:
+            for episode in library.episodes(series["id"]):
+                f.write(json.dumps(episode) + "\n")
+    print(
+        f"Wrote {len(library.series):,} series, {library.episode_count:,} episodes, "
+        f"{len(library.movies):,} movies and {len(library.torrents):,} torrents to {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Scripted stand-in for anthropic.AsyncAnthropic.
+
+Orchestrator requests (the ones carrying tools) are answered from the
+recorded scenario matching the conversation's latest user prompt: the
+number of assistant turns since that prompt selects the next scripted turn.
+Executor requests get a deterministic excerpt of their input. Responses are
+real anthropic.types objects with plausible usage, so the agent's token
+accounting and caching paths run unchanged.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+from anthropic.types import Message, TextBlock, ToolUseBlock, Usage
+
+from benchmarks.scenarios import SCENARIOS_BY_PROMPT
+from bot.tokens import messages_chars
+
+CHARS_PER_TOKEN = 4
+STREAM_CHUNK_CHARS = 24
+EXECUTOR_REPLY_CHARS = 600
+
+
+def _first_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    for block in content or []:
+        if isinstance(block, dict) and block.get("type") == "text":
+            return block["text"]
+    return ""
+
+
+def _is_tool_result(message: Dict[str, Any]) -> bool:
+    content = message.get("content")
+    return isinstance(content, list) and any(
+        isinstance(block, dict) and block.get("type") == "tool_result" for block in content
+    )
+
+
+class FakeMessages:
+    """The client's `messages` resource: create() and stream()."""
+
+    def __init__(self, client: "FakeAnthropic"):
+        self._client = client
+
+    async def create(self, **request) -> Message:
+        message = self._client.respond(request)
+        await asyncio.sleep(self._client.delay(message))
+        return message
+
+    def stream(self, **request) -> "FakeStream":
+        return FakeStream(self._client, self._client.respond(request))
+
+
+class FakeStream:
+    """Async context manager mimicking MessageStream (text_stream, get_final_message)."""
+
+    def __init__(self, client: "FakeAnthropic", message: Message):
+        self._client = client
+        self._message = message
+
+    async def __aenter__(self):
+        await asyncio.sleep(self._client.latency)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for block in self._message.content:
+            if block.type != "text":
+                continue
+            for start in range(0, len(block.text), STREAM_CHUNK_CHARS):
+                piece = block.text[start:start + STREAM_CHUNK_CHARS]
+                await asyncio.sleep(self._client.token_latency * len(piece) / CHARS_PER_TOKEN)
+                yield piece
+
+    async def get_final_message(self) -> Message:
+        return self._message
+
+
+class FakeAnthropic:
+    """
+    Replays scenarios.SCENARIOS for orchestrator calls and excerpts input for executor calls.
+
+    Args:
+        latency: Seconds before the first token of every response
+        token_latency: Additional seconds per output token
+    """
+
+    def __init__(self, latency: float = 0.0, token_latency: float = 0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.messages = FakeMessages(self)
+        self.calls: Dict[str, int] = {"orchestrator": 0, "executor": 0}
+        self._cached_prefixes = set()
+        self._ids = 0
+
+    def delay(self, message: Message) -> float:
+        return self.latency + self.token_latency * message.usage.output_tokens
+
+    def respond(self, request: Dict[str, Any]) -> Message:
+        if request.get("tools"):
+            self.calls["orchestrator"] += 1
+            content, stop_reason = self._orchestrator_turn(request["messages"])
+        else:
+            self.calls["executor"] += 1
+            prompt = _first_text(request["messages"][-1]["content"])
+            content, stop_reason = [TextBlock(type="text", text=prompt[-EXECUTOR_REPLY_CHARS:])], "end_turn"
+        return Message(
+            id=self._next_id("msg"),
+            type="message",
+            role="assistant",
+            model=request["model"],
+            content=content,
+            stop_reason=stop_reason,
+            stop_sequence=None,
+            usage=self._usage(request, content),
+        )
+
+    def _orchestrator_turn(self, messages: List[Dict[str, Any]]):
+        prompt_index = max(
+            (index for index, message in enumerate(messages) if message["role"] == "user" and not _is_tool_result(message)),
+            default=0,
+        )
+        scenario = SCENARIOS_BY_PROMPT.get(_first_text(messages[prompt_index]["content"]))
+        if scenario is None:
+            return [TextBlock(type="text", text="I have no recorded answer for that.")], "end_turn"
+
+        step = sum(1 for message in messages[prompt_index:] if message["role"] == "assistant")
+        turn = scenario.turns[min(step, len(scenario.turns) - 1)]
+        if isinstance(turn, str):
+            return [TextBlock(type="text", text=turn)], "end_turn"
+        return [
+            ToolUseBlock(type="tool_use", id=self._next_id("toolu"), name=call["name"], input=call["input"])
+            for call in turn
+        ], "tool_use"
+
+    def _usage(self, request: Dict[str, Any], content: List[Any]) -> Usage:
+        static_chars = len(json.dumps(request.get("system", ""))) + len(json.dumps(request.get("tools", [])))
+        prefix = (request["model"], static_chars)
+        cached = prefix in self._cached_prefixes
+        self._cached_prefixes.add(prefix)
+
+        output_chars = sum(len(getattr(block, "text", "") or json.dumps(getattr(block, "input", {}))) for block in content)
+        return Usage(
+            input_tokens=messages_chars(request["messages"]) // CHARS_PER_TOKEN,
+            output_tokens=max(1, output_chars // CHARS_PER_TOKEN),
+            cache_read_input_tokens=static_chars // CHARS_PER_TOKEN if cached else 0,
+            cache_creation_input_tokens=0 if cached else static_chars // CHARS_PER_TOKEN,
+        )
+
+    def _next_id(self, prefix: str) -> str:
+        self._ids += 1
+        return f"{prefix}_bench{self._ids:06d}"
+
+
+def install(client: Optional[FakeAnthropic] = None, agent=None) -> FakeAnthropic:
+    """Route the executor (and optionally an agent) through a fake client."""
+    from bot.tools import executor
+
+    client = client or FakeAnthropic()
+    executor._client = client
+    if agent is not None:
+        agent.client = client
+    return client
@@ -0,0 +1,308 @@
+"""
+End-to-end benchmark: N simulated users replaying scripted requests.
+
+    python -m benchmarks.run --users 8 --requests 10 --model-latency 0.5
+
+Modes:
+    agent     BlackbeardAgent.process_message directly (loop, tools, services)
+    telegram  main.handle_message with fake updates (adds the job scheduler,
+              progress/stream rendering and history handling)
+
+Each user is its own chat and sends its requests back to back. Per-request
+numbers come from the request's trace: latency, orchestrator turns, tool
+calls, bytes moved from services and subprocesses, and model input tokens.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.dataset import Library
+from benchmarks.fake_anthropic import FakeAnthropic, install
+from benchmarks.scenarios import SCENARIOS, Scenario
+from benchmarks.stub_services import StubServices
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered) + 0.5) - 1))]
+
+
+def trace_sample(scenario: Scenario, latency: float, trace) -> Dict[str, Any]:
+    """Per-request numbers from its span tree."""
+    spans = trace.spans if trace else []
+
+    def total(name: str, *attrs: str) -> int:
+        return sum(span.attrs.get(attr, 0) or 0 for span in spans if span.name == name for attr in attrs)
+
+    return {
+        "scenario": scenario.name,
+        "latency": latency,
+        "turns": sum(1 for span in spans if span.name == "llm"),
+        "tool_calls": sum(1 for span in spans if span.name == "tool"),
+        "executor_calls": sum(1 for span in spans if span.name == "executor"),
+        "bytes": total("service", "bytes") + total("subprocess", "stdout_bytes"),
+        "input_tokens": total("llm", "input_tokens") + total("executor", "input_tokens"),
+    }
+
+
+def configure_environment(args, workdir: Path, services: StubServices):
+    """Point the bot's configuration at the stubs and a scratch directory (before importing bot modules)."""
+    os.environ.update(services.service_env())
+    os.environ.update({
+        "ANTHROPIC_API_KEY": "benchmark",
+        "TELEGRAM_BOT_TOKEN": "benchmark",
+        "TELEGRAM_USER_ID": ",".join(str(user_id(u)) for u in range(args.users)),
+        "CATALOG_DB_PATH": str(workdir / "catalog.db"),
+        "HISTORY_DB_PATH": "",
+        "TRACE_ENABLED": "true",
+        "LOG_DIR": str(workdir / "logs"),
+        "TRACE_DIR": str(workdir / "traces"),
+        "MAX_CONCURRENT_JOBS": str(args.max_concurrent or args.users),
+        "SERVICE_CACHE_ENABLED": "false" if args.no_cache else "true",
+        "STREAM_RESPONSES": "true" if args.stream else "false",
+    })
+
+
+def user_id(index: int) -> int:
+    return 1000 + index
+
+
+class FakeTelegramMessage:
+    """Just enough of telegram.Message for the handlers: reply, edit, delete."""
+
+    sent_bytes = 0
+    sent_messages = 0
+
+    def __init__(self, text: str = "", chat=None, user=None):
+        self.text = text
+        self.chat = chat
+        self.from_user = user
+
+    async def reply_text(self, text: str, **kwargs):
+        FakeTelegramMessage.sent_bytes += len(text.encode())
+        FakeTelegramMessage.sent_messages += 1
+        return FakeTelegramMessage(text, self.chat, self.from_user)
+
+    async def edit_text(self, text: str, **kwargs):
+        FakeTelegramMessage.sent_bytes += len(text.encode())
+        self.text = text
+        return self
+
+    async def delete(self):
+        return True
+
+
+class FakeUpdate:
+    def __init__(self, index: int, text: str):
+        from types import SimpleNamespace
+
+        self.effective_user = SimpleNamespace(id=user_id(index), username=f"bench{index}", first_name=f"Bench {index}")
+        self.effective_chat = SimpleNamespace(id=user_id(index))
+        self.message = FakeTelegramMessage(text, self.effective_chat, self.effective_user)
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    library = Library(series=args.series, movies=args.movies, torrents=args.torrents, seed=args.seed)
+    services = StubServices(library, latency=args.service_latency)
+    await services.start()
+
+    with tempfile.TemporaryDirectory(prefix="blackbeard-bench-") as scratch:
+        configure_environment(args, Path(scratch), services)
+
+        # Imported only now: configuration is read from the environment at import time
+        from bot.agent import create_agent
+        from bot.catalog import get_catalog
+        from bot.config import (
+            CATALOG_REFRESH_INTERVAL, HISTORY_ENTRY_MAX_TOKENS, HISTORY_KEEP_EXCHANGES,
+            HISTORY_SUMMARY_TOKENS, HISTORY_TOKEN_BUDGET, MAX_CONCURRENT_JOBS, TRACE_DIR,
+        )
+        from bot.history import HistoryManager
+        from bot.scheduler import JobScheduler
+        from bot.tools.service_client import get_service_client
+        from bot.tracing import Tracer
+
+        model = FakeAnthropic(latency=args.model_latency, token_latency=args.token_latency)
+        agent = create_agent()
+        install(model, agent)
+        tracer = Tracer(True, TRACE_DIR)
+        history_manager = HistoryManager(
+            budget_tokens=HISTORY_TOKEN_BUDGET,
+            summary_tokens=HISTORY_SUMMARY_TOKENS,
+            keep_exchanges=HISTORY_KEEP_EXCHANGES,
+            entry_max_tokens=HISTORY_ENTRY_MAX_TOKENS,
+        )
+
+        catalog = get_catalog()
+        get_service_client().mutation_listeners.append(catalog.on_mutation)
+        catalog.start(CATALOG_REFRESH_INTERVAL)
+
+        if args.mode == "telegram":
+            from bot import main as bot_main
+
+            class RecordingScheduler(JobScheduler):
+                """Remembers each chat's latest job so the driver can wait for it."""
+
+                last_job = {}
+
+                def submit(self, chat_id, func, label=""):
+                    job = super().submit(chat_id, func, label)
+                    self.last_job[chat_id] = job
+                    return job
+
+            bot_main.agent = agent
+            bot_main.scheduler = RecordingScheduler(max_concurrent=MAX_CONCURRENT_JOBS)
+            bot_main.history_manager = history_manager
+            bot_main.tracer = tracer
+            # Importing main configured INFO logging to the console; keep the report readable
+            for name in ("", "conversation"):
+                logging.getLogger(name).setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+
+            async def send(index: int, scenario: Scenario):
+                update = FakeUpdate(index, scenario.prompt)
+                await bot_main.handle_message(update, None)
+                await bot_main.scheduler.last_job[user_id(index)].done.wait()
+        else:
+            async def send(index: int, scenario: Scenario):
+                chat_id = user_id(index)
+                history = await history_manager.messages(chat_id)
+                async with tracer.record(chat_id, scenario.prompt):
+                    result = await agent.process_message(scenario.prompt, conversation_history=history)
+                await history_manager.append_exchange(chat_id, scenario.prompt, result["response"])
+
+        scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+        samples: List[Dict[str, Any]] = []
+
+        async def simulate_user(index: int, count: int, record: bool):
+            for number in range(count):
+                scenario = scenarios[(index + number) % len(scenarios)]
+                started = time.monotonic()
+                await send(index, scenario)
+                if record:
+                    samples.append(trace_sample(scenario, time.monotonic() - started, tracer.last.get(user_id(index))))
+
+        try:
+            # Warm-up: catalog sync, connection pools, prompt cache
+            for _ in range(args.warmup):
+                await simulate_user(0, len(scenarios), record=False)
+
+            services.requests = services.bytes_sent = 0
+            FakeTelegramMessage.sent_messages = FakeTelegramMessage.sent_bytes = 0
+            started = time.monotonic()
+            await asyncio.gather(*(simulate_user(u, args.requests, record=True) for u in range(args.users)))
+            wall = time.monotonic() - started
+        finally:
+            await catalog.stop()
+            await get_service_client().aclose()
+            await services.stop()
+
+    return build_report(args, samples, wall, services, model)
+
+
+def build_report(args, samples: List[Dict[str, Any]], wall: float, services: StubServices, model: FakeAnthropic) -> Dict[str, Any]:
+    def summarize(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        latencies = [row["latency"] for row in rows]
+        count = len(rows) or 1
+        return {
+            "requests": len(rows),
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "mean_turns": sum(row["turns"] for row in rows) / count,
+            "tool_calls": sum(row["tool_calls"] for row in rows),
+            "executor_calls": sum(row["executor_calls"] for row in rows),
+            "bytes": sum(row["bytes"] for row in rows),
+            "input_tokens": sum(row["input_tokens"] for row in rows),
+        }
+
+    by_scenario = {}
+    for row in samples:
+        by_scenario.setdefault(row["scenario"], []).append(row)
+
+    return {
+        "config": {
+            "mode": args.mode, "users": args.users, "requests_per_user": args.requests,
+            "model_latency": args.model_latency, "token_latency": args.token_latency,
+            "service_latency": args.service_latency, "cache": not args.no_cache,
+            "library": {"series": args.series, "movies": args.movies, "torrents": args.torrents, "seed": args.seed},
+        },
+        "wall_seconds": wall,
+        "throughput": len(samples) / wall if wall else 0.0,
+        "total": summarize(samples),
+        "scenarios": {name: summarize(rows) for name, rows in sorted(by_scenario.items())},
+        "stub_requests": services.requests,
+        "stub_bytes_sent": services.bytes_sent,
+        "model_calls": dict(model.calls),
+        "telegram_messages": FakeTelegramMessage.sent_messages,
+        "telegram_bytes": FakeTelegramMessage.sent_bytes,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    config = report["config"]
+    print(
+        f"\n{config['mode']} mode, {config['users']} users x {config['requests_per_user']} requests "
+        f"(model latency {config['model_latency']}s, service latency {config['service_latency']}s, "
+        f"cache {'on' if config['cache'] else 'off'})\n"
+    )
+    header = f"{'scenario':<18} {'n':>4} {'p50 s':>8} {'p95 s':>8} {'turns':>6} {'tools':>6} {'exec':>5} {'KB':>9} {'in tok':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["scenarios"].items()) + [("TOTAL", report["total"])]
+    for name, row in rows:
+        print(
+            f"{name:<18} {row['requests']:>4} {row['p50']:>8.3f} {row['p95']:>8.3f} {row['mean_turns']:>6.2f} "
+            f"{row['tool_calls']:>6} {row['executor_calls']:>5} {row['bytes'] / 1024:>9.1f} {row['input_tokens']:>9,}"
+        )
+    print(
+        f"\nThroughput: {report['throughput']:.2f} req/s over {report['wall_seconds']:.2f}s | "
+        f"stub: {report['stub_requests']} requests, {report['stub_bytes_sent'] / 1024:.1f} KB | "
+        f"model calls: {report['model_calls']}"
+    )
+    if config["mode"] == "telegram":
+        print(f"Telegram: {report['telegram_messages']} messages sent, {report['telegram_bytes'] / 1024:.1f} KB incl. edits")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministic end-to-end benchmark for the agent loop")
+    parser.add_argument("--mode", choices=["agent", "telegram"], default="agent")
+    parser.add_argument("--users", type=int, default=4, help="concurrent simulated users (one chat each)")
+    parser.add_argument("--requests", type=int, default=6, help="requests per user")
+    parser.add_argument("--warmup", type=int, default=1, help="warm-up passes over the scenarios (not measured)")
+    parser.add_argument("--scenario", action="append", help="only run these scenarios (repeatable)")
+    parser.add_argument("--max-concurrent", type=int, default=0, help="telegram mode job slots (default: --users)")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="seconds per model response")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="extra seconds per output token")
+    parser.add_argument("--service-latency", type=float, default=0.0, help="seconds per stub service response")
+    parser.add_argument("--no-cache", action="store_true", help="disable the service response cache")
+    parser.add_argument("--stream", action="store_true", help="stream responses (telegram mode)")
+    parser.add_argument("--series", type=int, default=200)
+    parser.add_argument("--movies", type=int, default=300)
+    parser.add_argument("--torrents", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show bot logs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
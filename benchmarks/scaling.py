@@ -0,0 +1,277 @@
+"""
+Scaling benchmark: helper scripts and the executor pre-flight vs library size.
+
+    python -m benchmarks.scaling --sizes 1000,5000,20000,50000
+
+For each size a synthetic library is served by the stub services (N series,
+N movies, N/10 torrents, 2N episodes with one long-running series holding a
+fifth of them) and every helper runs in a fresh worker process, so its peak
+RSS is its own. Reported per helper and size:
+
+    cold      first run (for *-find this includes the catalog's full sync)
+    warm      median of the remaining runs
+    out KB    full output size (the raw-mode 10KB cap is lifted to measure it)
+    RSS MB    worker peak RSS; `child` is the peak combined RSS of its subprocesses
+              (sh, api-call, jq), sampled from /proc every 10ms (Linux only)
+
+The `preflight` row times execute_with_executor on the full /series listing
+(token estimate, record splitting, map-reduce prompts) with a zero-latency
+fake executor, so only the bot's own work is measured.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.dataset import LONG_SERIES_ID, Library
+from benchmarks.stub_services import StubServices
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+HELPERS = {
+    "sonarr-find": "sonarr-find 'Breaking Bad'",
+    "radarr-find": "radarr-find 'Matrix'",
+    "sonarr-missing": f"sonarr-missing {LONG_SERIES_ID}",
+    "qbt-status": "qbt-status",
+    "preflight": "api-call sonarr GET /series",
+}
+CHART_WIDTH = 30
+
+
+def peak_rss_mb() -> float:
+    """
+    This process's peak resident set size in MB.
+
+    Prefers VmHWM: ru_maxrss survives exec, so a worker forked from the driver
+    would report the driver's (library-sized) peak.
+    """
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def descendants_rss_mb() -> float:
+    """Current combined RSS of this process's descendants in MB (0 without /proc)."""
+    parents: Dict[int, int] = {}
+    rss: Dict[int, int] = {}
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            fields = (entry / "stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue  # exited meanwhile
+        parents[int(entry.name)] = int(fields[1])
+        rss[int(entry.name)] = int(fields[21]) * resource.getpagesize()
+
+    own = {os.getpid()}
+    changed = True
+    while changed:
+        children = {pid for pid, parent in parents.items() if parent in own} - own
+        changed = bool(children)
+        own |= children
+    own.discard(os.getpid())
+    return sum(rss[pid] for pid in own) / (1024 * 1024)
+
+
+async def sample_children_peak(peak: List[float], interval: float = 0.01):
+    """Track the peak of descendants_rss_mb() in peak[0] until cancelled."""
+    if not Path("/proc/self/stat").exists():
+        return
+    while True:
+        peak[0] = max(peak[0], await asyncio.to_thread(descendants_rss_mb))
+        await asyncio.sleep(interval)
+
+
+# --- Worker (runs in its own process, configured through the environment) ---
+
+async def measure(helper: str, repeat: int, timeout: int) -> Dict[str, Any]:
+    from benchmarks.fake_anthropic import FakeAnthropic, install
+    from bot.catalog import get_catalog
+    from bot.tools import command_executor
+    from bot.tools.command_executor import execute_command
+    from bot.tools.executor import execute_with_executor
+    from bot.tools.service_client import get_service_client
+    from bot.tracing import Tracer
+
+    model = install(FakeAnthropic())
+    tracer = Tracer(True, Path(os.environ["TRACE_DIR"]))
+    command_executor.MAX_RAW_OUTPUT_BYTES = sys.maxsize
+    command = HELPERS[helper]
+
+    # The HTTP stack's first request imports more modules (some probe the system
+    # with a forked child); get that out of the way so baselines cover only the helper
+    await get_service_client().request("qbt", "GET", "/transfer/info")
+    baseline_rss = peak_rss_mb()
+    children_peak = [0.0]
+    sampler = asyncio.create_task(sample_children_peak(children_peak))
+
+    timings: List[float] = []
+    result: Dict[str, Any] = {}
+    try:
+        if helper == "preflight":
+            fetched = await execute_command(command, timeout=timeout, raw=True)
+            raw_output = fetched["output"]
+            for _ in range(repeat):
+                started = time.monotonic()
+                async with tracer.record(0, command):
+                    result = await execute_with_executor(command, raw_output)
+                timings.append(time.monotonic() - started)
+            input_bytes = len(raw_output.encode())
+        else:
+            for _ in range(repeat):
+                started = time.monotonic()
+                result = await execute_command(command, timeout=timeout, raw=True)
+                timings.append(time.monotonic() - started)
+            input_bytes = 0
+    finally:
+        sampler.cancel()
+        await get_catalog().stop()
+        await get_service_client().aclose()
+
+    output = result.get("output") or ""
+    return {
+        "cold": timings[0],
+        "warm": statistics.median(timings[1:]) if len(timings) > 1 else timings[0],
+        "success": bool(result.get("success")),
+        "error": (result.get("error") or "")[:200],
+        "input_bytes": input_bytes,
+        "output_bytes": len(output.encode()),
+        "executor_calls": model.calls["executor"] // max(1, len(timings)) if helper == "preflight" else 0,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss_mb(),
+        "child_peak_rss_mb": children_peak[0],
+    }
+
+
+# --- Driver ---
+
+async def run_worker(helper: str, services: StubServices, workdir: Path, args) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env.update(services.service_env())
+    env.update({
+        "ANTHROPIC_API_KEY": "benchmark",
+        "CATALOG_DB_PATH": str(workdir / f"catalog-{helper}.db"),
+        "SERVICE_CACHE_ENABLED": "false",
+        "TRACE_DIR": str(workdir / "traces"),
+    })
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "benchmarks.scaling", "--worker", helper,
+        "--repeat", str(args.repeat), "--timeout", str(args.timeout),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=env,
+        cwd=str(PROJECT_ROOT),
+    )
+    stdout, stderr = await process.communicate()
+    lines = stdout.decode().strip().splitlines()
+    if process.returncode != 0 or not lines:
+        tail = stderr.decode(errors="replace").strip().splitlines()[-1:] or ["no output"]
+        return {"success": False, "error": f"worker exited {process.returncode}: {tail[0][:200]}"}
+    return json.loads(lines[-1])
+
+
+async def run_scaling(args) -> List[Dict[str, Any]]:
+    rows = []
+    for size in args.sizes:
+        library = Library(series=size, movies=size, torrents=size // 10, seed=args.seed, episodes=2 * size)
+        services = StubServices(library)
+        await services.start()
+        print(
+            f"Library: {size:,} series, {library.episode_count:,} episodes, {size:,} movies, "
+            f"{len(library.torrents):,} torrents",
+            file=sys.stderr,
+        )
+        try:
+            with tempfile.TemporaryDirectory(prefix="blackbeard-scaling-") as scratch:
+                for helper in args.helpers:
+                    row = {"helper": helper, "size": size}
+                    row.update(await run_worker(helper, services, Path(scratch), args))
+                    rows.append(row)
+                    print(f"  {helper:<15} {'ok' if row.get('success') else 'FAILED'}", file=sys.stderr)
+        finally:
+            await services.stop()
+    return rows
+
+
+def print_report(rows: List[Dict[str, Any]]):
+    header = f"{'helper':<15} {'size':>7} {'cold s':>8} {'warm s':>8} {'out KB':>9} {'RSS MB':>8} {'child':>7}  result"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        if "cold" not in row:
+            print(f"{row['helper']:<15} {row['size']:>7,} {'-':>8} {'-':>8} {'-':>9} {'-':>8} {'-':>7}  {row['error']}")
+            continue
+        outcome = "ok" if row["success"] else f"error: {row['error'][:60]}"
+        if row["helper"] == "preflight":
+            outcome += f" ({row['input_bytes'] / 1024:,.0f} KB in, {row['executor_calls']} executor calls)"
+        print(
+            f"{row['helper']:<15} {row['size']:>7,} {row['cold']:>8.3f} {row['warm']:>8.3f} "
+            f"{row['output_bytes'] / 1024:>9.1f} {row['peak_rss_mb']:>8.1f} {row['child_peak_rss_mb']:>7.1f}  {outcome}"
+        )
+
+    # Per-helper charts: warm latency and peak RSS against library size
+    for helper in dict.fromkeys(row["helper"] for row in rows):
+        measured = [row for row in rows if row["helper"] == helper and "cold" in row]
+        if not measured:
+            continue
+        max_latency = max(row["warm"] for row in measured) or 1e-9
+        max_rss = max(max(row["peak_rss_mb"], row["child_peak_rss_mb"]) for row in measured) or 1e-9
+        print(f"\n{helper}: warm latency | peak RSS (worker or child, whichever is larger)")
+        for row in measured:
+            rss = max(row["peak_rss_mb"], row["child_peak_rss_mb"])
+            latency_bar = "█" * max(1, round(row["warm"] / max_latency * CHART_WIDTH))
+            rss_bar = "█" * max(1, round(rss / max_rss * CHART_WIDTH))
+            print(
+                f"  {row['size']:>7,} {latency_bar:<{CHART_WIDTH}} {row['warm']:>7.3f}s | "
+                f"{rss_bar:<{CHART_WIDTH}} {rss:>6.1f} MB"
+            )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Helper and executor pre-flight latency/RSS vs library size")
+    parser.add_argument("--sizes", default="1000,5000,20000,50000",
+                        help="comma-separated series counts (movies = N, torrents = N/10, episodes = 2N)")
+    parser.add_argument("--helpers", default=",".join(HELPERS), help="comma-separated subset of: " + ", ".join(HELPERS))
+    parser.add_argument("--repeat", type=int, default=5, help="runs per helper and size (first is cold)")
+    parser.add_argument("--timeout", type=int, default=300, help="per-command timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write the rows as JSON")
+    parser.add_argument("--worker", choices=list(HELPERS), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in str(args.sizes).split(",") if size]
+    args.helpers = [helper for helper in str(args.helpers).split(",") if helper]
+    unknown = set(args.helpers) - set(HELPERS)
+    if unknown:
+        parser.error(f"unknown helpers: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        print(json.dumps(asyncio.run(measure(args.worker, args.repeat, args.timeout))))
+        return 0
+
+    rows = asyncio.run(run_scaling(args))
+    print_report(rows)
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
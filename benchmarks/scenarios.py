@@ -0,0 +1,67 @@
+"""
+Recorded conversations replayed by the fake model.
+
+Each scenario is a user prompt plus the orchestrator turns that answered it:
+every turn but the last is a list of tool calls, the last is the final text.
+Commands refer to the anchor titles in benchmarks.dataset, so they run for
+real against the stub services.
+"""
+
+from typing import Any, Dict, List, Union
+
+Turn = Union[List[Dict[str, Any]], str]
+
+
+def command(command: str, raw: bool = True, context: str = "") -> Dict[str, Any]:
+    """An execute_command tool call."""
+    tool_input: Dict[str, Any] = {"command": command, "raw": raw}
+    if context:
+        tool_input["context"] = context
+    return {"name": "execute_command", "input": tool_input}
+
+
+class Scenario:
+    def __init__(self, name: str, prompt: str, turns: List[Turn]):
+        self.name = name
+        self.prompt = prompt
+        self.turns = turns
+
+
+SCENARIOS = [
+    Scenario("downloads", "What's downloading?", [
+        [command("qbt-status downloading", raw=False, context="Names, progress and ETA of active downloads")],
+        "You have a few downloads running; the biggest one should finish within the hour.",
+    ]),
+    Scenario("have_series", "Do I have Breaking Bad?", [
+        [command("sonarr-find 'Breaking Bad'")],
+        "Yes — Breaking Bad is in your library and monitored.",
+    ]),
+    Scenario("missing_episodes", "Am I missing any Breaking Bad episodes?", [
+        [command("sonarr-find 'Breaking Bad'")],
+        [command("sonarr-missing 1")],
+        "A handful of Breaking Bad episodes are missing; want me to search for them?",
+    ]),
+    Scenario("add_movie", "Add Inception to my library", [
+        [command("api-call radarr GET /movie/lookup -q 'term=Inception' | jq '.[0] | {title, year, tmdbId}'")],
+        [command(
+            "api-call radarr POST /movie -d '{\"title\": \"Inception\", \"year\": 2010, \"tmdbId\": 27205, "
+            "\"qualityProfileId\": 1, \"rootFolderPath\": \"/movies\", \"monitored\": true}'"
+        )],
+        [command("api-call radarr GET /movie | jq '[.[] | select(.tmdbId == 27205) | {id, title, monitored}]'")],
+        "Inception (2010) is added and monitored; Radarr will grab it when it finds a release.",
+    ]),
+    Scenario("status_overview", "Give me a quick status overview", [
+        [
+            command("qbt-status", raw=False, context="Counts by state and anything stalled"),
+            command("api-call sonarr GET /queue | jq '.totalRecords'"),
+            command("api-call radarr GET /queue | jq '.totalRecords'"),
+        ],
+        "Everything is healthy: downloads are moving and both queues are short.",
+    ]),
+    Scenario("plex_movies", "How many movies are in Plex?", [
+        [command("api-call plex GET /library/sections/1/all", raw=False, context="Total number of movies")],
+        "Your Plex movie library has a few hundred titles.",
+    ]),
+]
+
+SCENARIOS_BY_PROMPT = {scenario.prompt: scenario for scenario in SCENARIOS}
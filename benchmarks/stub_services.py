@@ -0,0 +1,219 @@
+"""
+Local stand-ins for Sonarr, Radarr, qBittorrent and Plex.
+
+One embedded HTTP server answers for every service under a path prefix
+(`/sonarr/api/v3/...`, `/qbt/api/v2/...`), serving a generated Library.
+Point the bot at it with service_env(), or run it standalone:
+
+    python -m benchmarks.stub_services --series 50000 --episodes 100000 --torrents 5000 --port 9000
+"""
+
+import argparse
+import asyncio
+import re
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+from benchmarks.dataset import Library
+from bot.http_server import HttpServer, Request, Response
+
+API_KEY = "benchmark"
+QUALITY_PROFILES = [{"id": 1, "name": "Any"}, {"id": 4, "name": "HD-1080p"}, {"id": 5, "name": "Ultra-HD"}]
+
+
+class StubServices(HttpServer):
+    """Serves the subset of each service's API the bot and helper scripts use."""
+
+    def __init__(self, library: Library, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        super().__init__(host, port)
+        self.library = library
+        self.latency = latency  # seconds added to every response
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    async def start(self):
+        await super().start()
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    def service_env(self) -> Dict[str, str]:
+        """Environment variables that point the bot's service client here."""
+        base = f"http://{self.host}:{self.port}"
+        return {
+            "SONARR_URL": f"{base}/sonarr", "SONARR_API_KEY": API_KEY,
+            "RADARR_URL": f"{base}/radarr", "RADARR_API_KEY": API_KEY,
+            "QBITTORRENT_URL": f"{base}/qbt", "QBITTORRENT_USER": "admin", "QBITTORRENT_PASS": API_KEY,
+            "PLEX_URL": f"{base}/plex", "PLEX_TOKEN": API_KEY,
+        }
+
+    async def _dispatch(self, request: Request) -> Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        service, _, path = request.path.lstrip("/").partition("/")
+        handler = getattr(self, f"_{service}", None)
+        response = handler(request, "/" + path) if handler else None
+        if response is None:
+            response = Response(404, f"No stub for {request.method} {request.path}\n")
+        self.requests += 1
+        self.bytes_received += len(request.body)
+        self.bytes_sent += len(response.body)
+        return response
+
+    # --- Sonarr ---
+
+    def _sonarr(self, request: Request, path: str) -> Optional[Response]:
+        path = path.removeprefix("/api/v3")
+        library = self.library
+        if request.method == "GET":
+            if path == "/series":
+                return Response(200, library.series)
+            if match := re.fullmatch(r"/series/(\d+)", path):
+                index = int(match.group(1))
+                if 1 <= index <= len(library.series):
+                    return Response(200, library.series[index - 1])
+                return Response(404, {"message": "NotFound"})
+            if path == "/series/lookup":
+                return Response(200, library.series_lookup(request.query.get("term", "")))
+            if path == "/episode":
+                return Response(200, library.episodes(int(request.query.get("seriesId", "0") or 0)))
+            if path == "/queue":
+                return Response(200, library.queue("series"))
+            if path == "/qualityprofile":
+                return Response(200, QUALITY_PROFILES)
+            if path == "/rootfolder":
+                return Response(200, [{"id": 1, "path": "/tv", "freeSpace": 4 * 1024 ** 4}])
+        if request.method == "POST" and path == "/series":
+            return Response(201, library.add_series(request.json() or {}))
+        if request.method == "POST" and path == "/command":
+            return Response(201, self._command(request))
+        if request.method == "PUT" and path == "/episode/monitor":
+            return Response(202, "")
+        return None
+
+    # --- Radarr ---
+
+    def _radarr(self, request: Request, path: str) -> Optional[Response]:
+        path = path.removeprefix("/api/v3")
+        library = self.library
+        if request.method == "GET":
+            if path == "/movie":
+                return Response(200, library.movies)
+            if match := re.fullmatch(r"/movie/(\d+)", path):
+                index = int(match.group(1))
+                movie = next((movie for movie in library.movies if movie["id"] == index), None)
+                return Response(200, movie) if movie else Response(404, {"message": "NotFound"})
+            if path == "/movie/lookup":
+                return Response(200, library.movie_lookup(request.query.get("term", "")))
+            if path == "/queue":
+                return Response(200, library.queue("movie"))
+            if path == "/qualityprofile":
+                return Response(200, QUALITY_PROFILES)
+            if path == "/rootfolder":
+                return Response(200, [{"id": 1, "path": "/movies", "freeSpace": 4 * 1024 ** 4}])
+        if request.method == "POST":
+            if path == "/movie":
+                return Response(201, library.add_movie(request.json() or {}))
+            if path == "/command":
+                return Response(201, self._command(request))
+        if request.method == "PUT" and path == "/movie/editor":
+            return Response(202, "")
+        return None
+
+    @staticmethod
+    def _command(request: Request) -> Dict:
+        body = request.json() or {}
+        return {"id": 1, "name": body.get("name", ""), "status": "queued", "body": body}
+
+    # --- qBittorrent ---
+
+    def _qbt(self, request: Request, path: str) -> Optional[Response]:
+        path = path.removeprefix("/api/v2")
+        if path == "/auth/login":
+            return Response(200, "Ok.")
+        if path == "/torrents/info":
+            torrents = self.library.torrents
+            state_filter = request.query.get("filter")
+            if state_filter == "downloading":
+                torrents = [t for t in torrents if t["state"] in ("downloading", "stalledDL", "queuedDL")]
+            elif state_filter == "completed":
+                torrents = [t for t in torrents if t["progress"] >= 1]
+            if "hashes" in request.query:
+                torrents = [t for t in torrents if t["hash"] in request.query["hashes"].lower().split("|")]
+            if request.query.get("sort"):
+                torrents = sorted(torrents, key=lambda t: t.get(request.query["sort"], 0),
+                                  reverse=request.query.get("reverse") == "true")
+            if request.query.get("limit"):
+                torrents = torrents[:int(request.query["limit"])]
+            return Response(200, torrents)
+        if path == "/sync/maindata":
+            # Any rid but the current revision's gets a full update
+            rid = self.library.torrent_revision + 1
+            if request.query.get("rid") == str(rid):
+                return Response(200, {"rid": rid})
+            return Response(200, {
+                "rid": rid,
+                "full_update": True,
+                "torrents": {t["hash"]: {k: v for k, v in t.items() if k != "hash"} for t in self.library.torrents},
+                "server_state": {"dl_info_speed": sum(t["dlspeed"] for t in self.library.torrents)},
+            })
+        if path == "/transfer/info":
+            return Response(200, {
+                "dl_info_speed": sum(t["dlspeed"] for t in self.library.torrents),
+                "up_info_speed": sum(t["upspeed"] for t in self.library.torrents),
+            })
+        if path == "/torrents/add" and request.method == "POST":
+            form = {key: values[-1] for key, values in parse_qs(request.body.decode()).items()}
+            added = self.library.add_torrent(form.get("urls", ""), form.get("category", ""))
+            return Response(200, "Ok." if added else "Fails.")
+        return None
+
+    # --- Plex ---
+
+    def _plex(self, request: Request, path: str) -> Optional[Response]:
+        if request.method != "GET":
+            return None
+        if path == "/library/sections":
+            return Response(200, self.library.plex_sections())
+        if match := re.fullmatch(r"/library/sections/(\d+)/all", path):
+            return Response(200, self.library.plex_section(match.group(1)))
+        if match := re.fullmatch(r"/library/sections/(\d+)/refresh", path):
+            self.library.plex_scanned_at[match.group(1)] = int(time.time())
+            return Response(200, "")
+        return None
+
+
+async def serve(args):
+    library = Library(args.series, args.movies, args.torrents, args.seed, args.episodes)
+    services = StubServices(library, args.host, args.port, args.latency)
+    await services.start()
+    print(f"Serving {len(library.series):,} series, {library.episode_count:,} episodes, "
+          f"{len(library.movies):,} movies, {len(library.torrents):,} torrents. Environment:")
+    for key, value in services.service_env().items():
+        print(f"{key}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await services.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a synthetic library as Sonarr/Radarr/qBittorrent/Plex")
+    parser.add_argument("--series", type=int, default=1000)
+    parser.add_argument("--movies", type=int, default=1000)
+    parser.add_argument("--torrents", type=int, default=100)
+    parser.add_argument("--episodes", type=int, help="total episodes (default: random per series)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,45 @@
 """Claude AI agent integration with tool support."""
 
 import anthropic
+import asyncio
+import json
 import logging
-from typing import List, Dict, Any, Callable
-from bot.config import ANTHROPIC_API_KEY, ORCHESTRATOR_MODEL, AGENT_MD_PATH, SOUL_MD_PATH, MEMORY_MD_PATH
+import re
+import time
+from typing import List, Dict, Any, Callable, Optional
+from bot.config import (
+    ANTHROPIC_API_KEY,
+    ORCHESTRATOR_MODEL,
+    EXECUTOR_MODEL,
+    LOOKUP_MAX_TURNS,
+    MAX_PARALLEL_TOOLS,
+    RUN_CONTEXT_BUDGET_TOKENS,
+    KEEP_RECENT_TOOL_RESULTS,
+    AGENT_MD_PATH,
+    SOUL_MD_PATH,
+    MEMORY_MD_PATH,
+)
 from bot.tools.command_executor import execute_command
 from bot.tools.docs_manager import read_docs, update_docs
+from bot.tools.macros import MACRO_SERVICES, MACRO_TOOLS, run_macro
+from bot.prefetch import Prefetch, start_prefetch
+from bot.quick import QuickError, disk_usage, format_disk, format_downloads, torrent_list
+from bot.router import FULL, INSTANT, LOOKUP, Route, route_message
+from bot.metrics import (
+    ORCHESTRATOR_SECONDS,
+    REQUEST_SECONDS,
+    REQUEST_TURNS,
+    REQUESTS,
+    ROUTE_ESCALATIONS,
+    ROUTE_SECONDS,
+    ROUTES,
+    TOOL_CALLS,
+    TOOL_SECONDS,
+    record_usage,
+)
+from bot.scheduler import CancellationToken, JobCancelled, cancellable
+from bot.tokens import messages_chars, token_estimator
+from bot.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +50,8 @@ TOOLS = [
         "description": (
             "Execute a shell command on the server. "
             "You have access to: api-call (for service APIs), recycle-bin (safe deletion), "
-            "sonarr-find, radarr-find, sonarr-missing, qbt-status (helper scripts), "
+            "sonarr-find, radarr-find, sonarr-missing, qbt-status, qbt-watch, arr-events (helper scripts), "
+            "sonarr-search, sonarr-monitor, radarr-search (batch helpers: many episodes/movies in one call), "
             "and standard Unix commands (ls, find, mv, cp, mkdir, cat, grep, head, tail, file, du, df, stat). "
             "NEVER use rm - use recycle-bin instead. "
             "NEVER access .env or secret files. "
@@ -98,7 +133,196 @@ TOOLS = [
             "required": ["file", "content"],
         },
     },
-]
+] + MACRO_TOOLS
+
+
+# Tool schemas with a cache breakpoint after the last tool (tools precede the system prompt)
+CACHED_TOOLS = TOOLS[:-1] + [{**TOOLS[-1], "cache_control": {"type": "ephemeral"}}]
+
+# Read-only tools for the lookup tier (the executor model answering simple questions)
+LOOKUP_TOOL_NAMES = {"execute_command", "read_docs"}
+LOOKUP_TOOLS = [tool for tool in TOOLS if tool["name"] in LOOKUP_TOOL_NAMES]
+LOOKUP_TOOLS = LOOKUP_TOOLS[:-1] + [{**LOOKUP_TOOLS[-1], "cache_control": {"type": "ephemeral"}}]
+
+# Rolling cache breakpoints placed on the message list (the API allows 4 in total)
+MESSAGE_CACHE_BREAKPOINTS = 2
+
+
+def _append_tail_note(messages: list, note: str):
+    """Append a text block to the newest (user) message, in place."""
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    last["content"] = list(content) + [{"type": "text", "text": note}]
+
+
+def _with_cache_breakpoints(messages: list) -> list:
+    """
+    Return a copy of messages with cache breakpoints on the newest user messages.
+
+    The newest breakpoint writes this turn's prefix to the cache; the one before
+    it sits where the previous turn wrote, so that prefix is read back even when a
+    turn adds many tool_result blocks. Stored messages are left untouched.
+    """
+    marked = list(messages)
+    remaining = MESSAGE_CACHE_BREAKPOINTS
+    for index in range(len(marked) - 1, -1, -1):
+        if remaining == 0:
+            break
+        message = marked[index]
+        if message["role"] != "user":
+            continue
+        content = message["content"]
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        if not content:
+            continue
+        content = list(content)
+        content[-1] = {**content[-1], "cache_control": {"type": "ephemeral"}}
+        marked[index] = {**message, "content": content}
+        remaining -= 1
+    return marked
+
+
+# Once context editing kicks in, old tool results are elided until the run is back under this share of its budget
+CONTEXT_EDIT_TARGET_RATIO = 0.6
+
+
+def _elide_stale_tool_results(messages: list, summaries: Dict[str, str], budget_tokens: int, keep_recent: int) -> int:
+    """
+    Replace old tool results with their tool_log summaries when a run outgrows its budget.
+
+    The newest `keep_recent` results stay verbatim. Elision works down to
+    CONTEXT_EDIT_TARGET_RATIO of the budget in one pass, so the cached prompt
+    prefix changes rarely instead of on every turn. Messages are edited in place.
+
+    Returns:
+        Number of tool results elided
+    """
+    if token_estimator.estimate_chars(messages_chars(messages)) <= budget_tokens:
+        return 0
+
+    results = [
+        block
+        for message in messages
+        if message["role"] == "user" and isinstance(message["content"], list)
+        for block in message["content"]
+        if isinstance(block, dict) and block.get("type") == "tool_result" and block.get("tool_use_id") in summaries
+    ]
+    candidates = results[:-keep_recent] if keep_recent else results
+
+    target = budget_tokens * CONTEXT_EDIT_TARGET_RATIO
+    total = token_estimator.estimate_chars(messages_chars(messages))
+    elided = 0
+    for block in candidates:
+        if total <= target:
+            break
+        summary = summaries.pop(block["tool_use_id"])
+        replacement = (
+            f"[Older result elided to save context. Summary: {summary}]\n"
+            "[Re-run the command if you need the full output.]"
+        )
+        if len(replacement) >= len(block["content"]):
+            continue
+        total -= token_estimator.estimate_chars(len(block["content"]) - len(replacement))
+        block["content"] = replacement
+        elided += 1
+    return elided
+
+
+def _total_input_tokens(usage) -> int:
+    """Input tokens of a request, counting cached and cache-written tokens."""
+    cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+    cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+    return usage.input_tokens + cache_read + cache_write
+
+
+def _log_usage(usage):
+    """Log token usage, including prompt cache reads and writes."""
+    if usage is None:
+        return
+    cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+    cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+    uncached = usage.input_tokens
+    total_input = _total_input_tokens(usage)
+    hit_rate = cache_read / total_input if total_input else 0.0
+    logger.info(
+        f"Usage: input={uncached:,} cache_read={cache_read:,} cache_write={cache_write:,} "
+        f"output={usage.output_tokens:,} (cache hit {hit_rate:.0%})"
+    )
+
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# Helper scripts and the service they read from
+READ_ONLY_HELPERS = {
+    "sonarr-find": "sonarr",
+    "sonarr-missing": "sonarr",
+    "radarr-find": "radarr",
+    "qbt-status": "qbt",
+    "qbt-watch": "qbt",
+}
+
+# Batch helpers and the service they change
+MUTATING_HELPERS = {
+    "sonarr-search": "sonarr",
+    "sonarr-monitor": "sonarr",
+    "radarr-search": "radarr",
+}
+
+# Commands that change files on disk
+FILESYSTEM_MUTATIONS = {"mv", "cp", "mkdir", "recycle-bin"}
+
+
+def _tool_resources(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, bool]:
+    """
+    Map a tool call to the resources it touches.
+
+    Returns:
+        Dict of resource key -> True if the call mutates that resource
+    """
+    resources: Dict[str, bool] = {}
+
+    def touch(key: str, mutating: bool):
+        resources[key] = resources.get(key, False) or mutating
+
+    if tool_name == "execute_command":
+        command = tool_input.get("command", "")
+        for match in re.finditer(r"\bapi-call\s+(\w+)\s+(\w+)", command):
+            touch(f"service:{match.group(1)}", match.group(2).upper() in MUTATING_METHODS)
+        for word in re.findall(r"[\w-]+", command):
+            if word in READ_ONLY_HELPERS:
+                touch(f"service:{READ_ONLY_HELPERS[word]}", False)
+            elif word in MUTATING_HELPERS:
+                touch(f"service:{MUTATING_HELPERS[word]}", True)
+            elif word in FILESYSTEM_MUTATIONS:
+                touch("filesystem", True)
+        if not resources:
+            touch("filesystem", False)
+    elif tool_name in ("read_docs", "update_docs"):
+        touch(f"docs:{tool_input.get('file', '')}", tool_name == "update_docs")
+    elif tool_name in MACRO_SERVICES:
+        touch(f"service:{MACRO_SERVICES[tool_name]}", True)
+
+    return resources
+
+
+def _tool_log_input(tool_name: str, tool_input: Dict[str, Any]) -> str:
+    """The part of a tool call's input worth keeping in the history's action log."""
+    if tool_name == "execute_command":
+        return tool_input.get("command", "")
+    if tool_name in MACRO_SERVICES:
+        return json.dumps(tool_input, ensure_ascii=False)[:200]
+    return tool_input.get("file", "")
+
+
+def _conflicts(first: Dict[str, bool], second: Dict[str, bool]) -> bool:
+    """Two calls conflict if they share a resource and either one mutates it."""
+    return any(
+        key in second and (mutating or second[key])
+        for key, mutating in first.items()
+    )
 
 
 class BlackbeardAgent:
@@ -106,7 +330,7 @@ class BlackbeardAgent:
 
     def __init__(self):
         """Initialize the agent with Claude API client."""
-        self.client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        self.client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
         self.model = ORCHESTRATOR_MODEL
 
         # Load AGENT.md system instructions
@@ -148,13 +372,22 @@ class BlackbeardAgent:
 
         self.system_instructions = system_instructions
 
-    def _execute_tool(self, tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+        # Static prompt prefix, cached across turns and requests
+        self.system_blocks = [
+            {"type": "text", "text": system_instructions, "cache_control": {"type": "ephemeral"}},
+        ]
+        # Size of the fixed prompt prefix, for token estimator calibration
+        self.static_prompt_chars = len(system_instructions) + len(json.dumps(TOOLS))
+
+    async def _execute_tool(self, tool_name: str, tool_input: Dict[str, Any], cancel_token: CancellationToken = None, prefetch: Prefetch = None) -> Dict[str, Any]:
         """
         Execute a tool and return the result.
 
         Args:
             tool_name: Name of the tool to execute
             tool_input: Tool input parameters
+            cancel_token: Optional token that aborts the tool when the job is cancelled
+            prefetch: Speculative lookups whose output this call may reuse
 
         Returns:
             Tool execution result
@@ -164,14 +397,20 @@ class BlackbeardAgent:
             raw = tool_input.get("raw", False)
             context = tool_input.get("context", "")
             logger.info(f"Tool: execute_command({tool_input['command']}, raw={raw})")
-            result = execute_command(tool_input["command"], raw=raw, context=context)
+            captured = await cancellable(prefetch.take(tool_input["command"]), cancel_token) if prefetch else None
+            result = await execute_command(
+                tool_input["command"], raw=raw, context=context, cancel_token=cancel_token, captured=captured
+            )
         elif tool_name == "read_docs":
             logger.info(f"Tool: read_docs({tool_input['file']})")
-            result = read_docs(tool_input["file"])
+            result = await asyncio.to_thread(read_docs, tool_input["file"])
         elif tool_name == "update_docs":
             mode = tool_input.get("mode", "append")
             logger.info(f"Tool: update_docs({tool_input['file']}, mode={mode})")
-            result = update_docs(tool_input["file"], tool_input["content"], mode)
+            result = await asyncio.to_thread(update_docs, tool_input["file"], tool_input["content"], mode)
+        elif tool_name in MACRO_SERVICES:
+            logger.info(f"Tool: {tool_name}({json.dumps(tool_input, ensure_ascii=False)[:200]})")
+            result = await cancellable(run_macro(tool_name, tool_input), cancel_token)
         else:
             logger.warning(f"Tool: Unknown tool '{tool_name}'")
             result = {"success": False, "error": f"Unknown tool: {tool_name}"}
@@ -201,9 +440,98 @@ class BlackbeardAgent:
             return f"Reading {tool_input.get('file', 'documentation')}"
         elif tool_name == "update_docs":
             return f"Updating {tool_input.get('file', 'documentation')}"
+        elif tool_name == "add_series":
+            return f"Adding series: {tool_input.get('title', '')[:40]}"
+        elif tool_name == "add_movie":
+            return f"Adding movie: {tool_input.get('title', '')[:40]}"
+        elif tool_name == "add_torrent":
+            return "Adding torrent"
+        elif tool_name == "refresh_library":
+            return f"Scanning Plex library ({tool_input.get('section', 'all')})"
         return f"Using {tool_name}"
 
-    def process_message(self, user_message: str, conversation_history=None, max_turns: int = 20, interrupt_flag=None, progress_callback=None) -> Dict[str, Any]:
+    async def _run_tool_call(self, block, cancel_token, progress_callback, prefetch: Prefetch = None) -> tuple:
+        """Run one tool_use block and return (result content, tool log entry)."""
+        # Check for interrupt before tool execution
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+
+        tool_name = block.name
+        tool_input = block.input
+
+        # Notify progress callback that tool is starting
+        if progress_callback:
+            description = self._format_tool_description(tool_name, tool_input)
+            progress_callback(description, summary=None, completed=False)
+
+        # Execute the tool
+        with span("tool", tool=tool_name, command=tool_input.get("command") or tool_input.get("file", "")) as tool_span:
+            with TOOL_SECONDS.time(tool=tool_name):
+                result = await self._execute_tool(tool_name, tool_input, cancel_token, prefetch)
+            tool_span.set(success=bool(result.get("success")))
+        TOOL_CALLS.inc(tool=tool_name, outcome="success" if result.get("success") else "error")
+
+        # Format result for Claude
+        if result.get("success"):
+            content = result.get("output") or result.get("content") or result.get("message", "")
+        else:
+            content = f"Error: {result.get('error', 'Unknown error')}"
+
+        # Build compact summary for tool log and progress message
+        summary = content[:200] if len(content) > 200 else content
+
+        log_entry = {
+            "tool": tool_name,
+            "input": _tool_log_input(tool_name, tool_input),
+            "summary": summary,
+        }
+
+        # Notify progress callback with summary
+        if progress_callback:
+            description = self._format_tool_description(tool_name, tool_input)
+            progress_callback(description, summary=summary, completed=True)
+
+        return content, log_entry
+
+    async def _execute_tool_calls(self, blocks: list, cancel_token, progress_callback, prefetch: Prefetch = None) -> list:
+        """
+        Run a turn's tool_use blocks concurrently, returning outcomes in block order.
+
+        Up to MAX_PARALLEL_TOOLS calls run at once. Calls that touch a resource
+        which another call in the same turn mutates (e.g. a POST to Sonarr and a
+        GET verifying it) keep their original relative order, and don't reuse
+        prefetched output (it predates the mutation).
+        """
+        if len(blocks) == 1:
+            return [await self._run_tool_call(blocks[0], cancel_token, progress_callback, prefetch)]
+
+        resources = [_tool_resources(block.name, block.input) for block in blocks]
+        finished = [asyncio.Event() for _ in blocks]
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_TOOLS)
+
+        async def run(index: int):
+            # Wait for earlier calls that conflict with this one
+            reusable = prefetch
+            for earlier in range(index):
+                if _conflicts(resources[earlier], resources[index]):
+                    reusable = None
+                    await finished[earlier].wait()
+            try:
+                async with semaphore:
+                    return await self._run_tool_call(blocks[index], cancel_token, progress_callback, reusable)
+            finally:
+                finished[index].set()
+
+        tasks = [asyncio.create_task(run(i)) for i in range(len(blocks))]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def process_message(self, user_message: str, conversation_history=None, max_turns: int = 20, cancel_token: CancellationToken = None, progress_callback=None, text_stream=None) -> Dict[str, Any]:
         """
         Process a user message and return the agent's response with tool log.
 
@@ -211,66 +539,190 @@ class BlackbeardAgent:
             user_message: The message from the user
             conversation_history: List of previous messages in this conversation
             max_turns: Maximum number of agent turns (API calls) to prevent infinite loops
-            interrupt_flag: Callable that returns True if processing should be interrupted
+            cancel_token: Optional CancellationToken; when it fires, in-flight API calls
+                and tools are aborted and the task stops
             progress_callback: Optional callback(description, summary, completed) for progress updates
+            text_stream: Optional writer with async write(delta) and discard() methods; when
+                given, responses are streamed and text deltas are pushed to it as generated
+
+        Returns:
+            Dict with "response" (str), "tool_log" (list of tool interactions)
+            and "interrupted" (bool)
+        """
+        tool_log = []  # Track tool interactions for conversation history
+        started = time.monotonic()
+        outcome = "error"
+
+        # Likely first lookups start now, overlapping routing (a classifier call, if enabled)
+        # and the first model call
+        prefetch = start_prefetch(user_message)
+        route = None
+        tier = FULL
+
+        try:
+            # Cheapest tier that can answer: a fixed template, the executor model, or the orchestrator
+            with span("route") as route_span:
+                route = await route_message(user_message, conversation_history, cancel_token)
+                route_span.set(tier=route.tier, reason=route.reason)
+            logger.info(f"Route: {route.tier} ({route.reason}), decided in {route.seconds * 1000:.1f}ms")
+            ROUTES.inc(tier=route.tier, reason=route.reason)
+            tier = route.tier
+            if tier == INSTANT and prefetch:  # a template answer has no use for them
+                prefetch.cancel()
+                prefetch = None
+
+            result = None
+            if tier == INSTANT:
+                result = await self._answer_instantly(route, tool_log)
+                if result is None:
+                    ROUTE_ESCALATIONS.inc(cause="instant answer failed")
+            elif tier == LOOKUP:
+                result = await self._run_agent_loop(
+                    user_message, conversation_history, min(max_turns, LOOKUP_MAX_TURNS), cancel_token,
+                    progress_callback, text_stream, tool_log, prefetch, model=EXECUTOR_MODEL, read_only=True,
+                )
+                if result is None:
+                    ROUTE_ESCALATIONS.inc(cause="lookup needs orchestrator")
+                    tool_log.clear()  # the orchestrator never sees the lookup's results
+                    if prefetch:
+                        prefetch.release()
+            if result is None:
+                tier = FULL
+                result = await self._run_agent_loop(
+                    user_message, conversation_history, max_turns, cancel_token, progress_callback, text_stream, tool_log, prefetch
+                )
+            outcome = "completed"
+            REQUEST_TURNS.observe(result.pop("turns"))
+            return result
+        except JobCancelled:
+            outcome = "interrupted"
+            logger.info("Agent interrupted by user")
+            return {"response": "⏹️ Task interrupted by user.", "tool_log": tool_log, "interrupted": True}
+        finally:
+            if prefetch:
+                prefetch.cancel()
+            elapsed = time.monotonic() - started
+            REQUESTS.inc(outcome=outcome)
+            REQUEST_SECONDS.observe(elapsed)
+            ROUTE_SECONDS.observe(elapsed, tier=tier)
+            decided = route.tier if route else "undecided"
+            logger.info(f"Route: {decided} request answered by {tier} in {elapsed:.2f}s ({outcome})")
+
+    async def _answer_instantly(self, route: Route, tool_log: list) -> Dict[str, Any]:
+        """
+        Answer a status question from a fixed template, without a model call.
 
         Returns:
-            Dict with "response" (str) and "tool_log" (list of tool interactions)
+            The result, or None if the data couldn't be fetched (the orchestrator takes over)
         """
+        from bot.config import DOWNLOADS_DIR, MEDIA_ROOT
+
+        sections = []
+        try:
+            with span("instant", status_filter=route.status_filter or "", disk=route.disk):
+                if route.status_filter:
+                    text = format_downloads(await torrent_list(route.status_filter), route.status_filter)
+                    command = "qbt-status" + ("" if route.status_filter == "all" else f" {route.status_filter}")
+                    sections.append(text)
+                    tool_log.append({"tool": "execute_command", "input": command, "summary": text[:200]})
+                if route.disk:
+                    text = format_disk(await disk_usage())
+                    sections.append(text)
+                    tool_log.append({"tool": "execute_command", "input": f"df -h {MEDIA_ROOT} {DOWNLOADS_DIR}", "summary": text[:200]})
+        except QuickError as e:
+            logger.warning(f"Instant answer failed, using the orchestrator: {e}")
+            tool_log.clear()
+            return None
+        return {"response": "\n\n".join(sections), "tool_log": tool_log, "interrupted": False, "turns": 0}
+
+    async def _create_message(self, request: Dict[str, Any], text_stream=None):
+        """Call the Messages API, streaming text deltas to text_stream if given."""
+        if text_stream is None:
+            return await self.client.messages.create(**request)
+
+        async with self.client.messages.stream(**request) as stream:
+            async for delta in stream.text_stream:
+                await text_stream.write(delta)
+            return await stream.get_final_message()
+
+    async def _run_agent_loop(self, user_message: str, conversation_history, max_turns: int, cancel_token, progress_callback, text_stream, tool_log: list, prefetch: Prefetch = None, model: str = None, read_only: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Run model turns until the agent finishes; raises JobCancelled when cancelled.
+
+        With read_only (the lookup tier), the model only gets read-only tools,
+        and None is returned instead of a result if it tries to change anything
+        or runs out of turns, so the orchestrator can take over.
+        """
+        model = model or self.model
+        tools = LOOKUP_TOOLS if read_only else CACHED_TOOLS
         # Start with conversation history, then add current message
         messages = list(conversation_history) if conversation_history else []
         messages.append({"role": "user", "content": user_message})
 
+        # tool_use_id -> tool_log summary, for results that may be elided later in the run
+        result_summaries: Dict[str, str] = {}
+
         turn_count = 0
-        tool_log = []  # Track tool interactions for conversation history
 
         def _make_result(text: str) -> Dict[str, Any]:
-            return {"response": text, "tool_log": tool_log}
+            return {"response": text, "tool_log": tool_log, "interrupted": False, "turns": turn_count}
 
         while turn_count < max_turns:
             # Check for interrupt
-            if interrupt_flag and interrupt_flag():
-                logger.info("Agent interrupted by user")
-                return _make_result("⏹️ Task interrupted by user.")
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
 
             turn_count += 1
             logger.info(f"Agent turn {turn_count}/{max_turns}")
 
-            # Inject turn counter into system prompt
-            system_with_turn = f"[Turn {turn_count}/{max_turns}]\n\n{self.system_instructions}"
+            # Volatile per-turn notes go at the tail of the newest message so the
+            # cached prefix (tools, system prompt, earlier turns) stays byte-identical
+            notes = [f"[Turn {turn_count}/{max_turns}]"]
 
             # Save-state checkpoints every 10 turns
             if turn_count % 10 == 0 and turn_count < max_turns:
-                messages.append({
-                    "role": "user",
-                    "content": (
-                        f"[SYSTEM: Checkpoint — turn {turn_count}/{max_turns}. "
-                        "Update TASKS.md with current progress, then continue working.]"
-                    ),
-                })
+                notes.append(
+                    f"[SYSTEM: Checkpoint — turn {turn_count}/{max_turns}. "
+                    "Update TASKS.md with current progress, then continue working.]"
+                )
 
             # Wind-down warning 2 turns before limit
             if turn_count == max_turns - 2:
-                messages.append({
-                    "role": "user",
-                    "content": (
-                        f"[SYSTEM: 2 turns remaining. Wrap up now — update TASKS.md with progress "
-                        "and give the user a final summary of what you completed and what remains.]"
-                    ),
-                })
+                notes.append(
+                    f"[SYSTEM: 2 turns remaining. Wrap up now — update TASKS.md with progress "
+                    "and give the user a final summary of what you completed and what remains.]"
+                )
 
-            # Call Claude API
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=8192,
-                system=system_with_turn,
-                tools=TOOLS,
-                messages=messages,
-            )
+            _append_tail_note(messages, "\n".join(notes))
 
-            # Check for interrupt after API call
-            if interrupt_flag and interrupt_flag():
-                return _make_result("⏹️ Task interrupted by user.")
+            # Keep long runs inside their context budget by eliding stale tool results
+            elided = _elide_stale_tool_results(messages, result_summaries, RUN_CONTEXT_BUDGET_TOKENS, KEEP_RECENT_TOOL_RESULTS)
+            if elided:
+                logger.info(f"Context editing: elided {elided} older tool result(s)")
+
+            # Call Claude API
+            request = {
+                "model": model,
+                "max_tokens": 8192,
+                "system": self.system_blocks,
+                "tools": tools,
+                "messages": _with_cache_breakpoints(messages),
+            }
+            with span("llm", turn=turn_count, model=model, messages=len(messages)) as llm_span:
+                with ORCHESTRATOR_SECONDS.time(model=model):
+                    response = await cancellable(self._create_message(request, text_stream), cancel_token)
+                if response.usage is not None:
+                    llm_span.set(
+                        input_tokens=_total_input_tokens(response.usage),
+                        output_tokens=response.usage.output_tokens,
+                        stop_reason=response.stop_reason,
+                    )
+            _log_usage(response.usage)
+            record_usage(model, response.usage)
+            if response.usage is not None and not read_only:
+                token_estimator.observe(
+                    self.static_prompt_chars + messages_chars(messages), _total_input_tokens(response.usage)
+                )
 
             # Check stop reason
             if response.stop_reason in ("end_turn", "max_tokens"):
@@ -285,66 +737,64 @@ class BlackbeardAgent:
                 return _make_result(final_text or "Done.")
 
             elif response.stop_reason == "tool_use":
+                # Narration before tool calls isn't the answer; clear the live draft
+                if text_stream:
+                    await text_stream.discard()
+
+                tool_blocks = [block for block in response.content if block.type == "tool_use"]
+                if read_only and any(
+                    block.name not in LOOKUP_TOOL_NAMES or any(_tool_resources(block.name, block.input).values())
+                    for block in tool_blocks
+                ):
+                    logger.info("Lookup tier wants to change state; handing over to the orchestrator")
+                    return None
+
                 # Agent wants to use tools
                 # Add assistant response to messages
                 messages.append({"role": "assistant", "content": response.content})
 
-                # Execute each tool call
+                # Execute this turn's tool calls (independent calls run concurrently)
+                outcomes = await self._execute_tool_calls(tool_blocks, cancel_token, progress_callback, prefetch)
+
                 tool_results = []
-                for block in response.content:
-                    if block.type == "tool_use":
-                        # Check for interrupt before tool execution
-                        if interrupt_flag and interrupt_flag():
-                            return _make_result("⏹️ Task interrupted by user.")
-
-                        tool_name = block.name
-                        tool_input = block.input
-
-                        # Notify progress callback that tool is starting
-                        if progress_callback:
-                            description = self._format_tool_description(tool_name, tool_input)
-                            progress_callback(description, summary=None, completed=False)
-
-                        # Execute the tool
-                        result = self._execute_tool(tool_name, tool_input)
-
-                        # Format result for Claude
-                        if result.get("success"):
-                            content = result.get("output") or result.get("content") or result.get("message", "")
-                        else:
-                            content = f"Error: {result.get('error', 'Unknown error')}"
-
-                        # Build compact summary for tool log and progress message
-                        summary = content[:200] if len(content) > 200 else content
-
-                        # Record in tool log for conversation history
-                        tool_log.append({
-                            "tool": tool_name,
-                            "input": tool_input.get("command", "") if tool_name == "execute_command" else tool_input.get("file", ""),
-                            "summary": summary,
-                        })
-
-                        # Notify progress callback with summary
-                        if progress_callback:
-                            description = self._format_tool_description(tool_name, tool_input)
-                            progress_callback(description, summary=summary, completed=True)
-
-                        # Executor already processed output, no truncation needed
-                        tool_results.append(
-                            {
-                                "type": "tool_result",
-                                "tool_use_id": block.id,
-                                "content": content,
-                            }
-                        )
+                for block, (content, log_entry) in zip(tool_blocks, outcomes):
+                    # Record in tool log for conversation history (original call order)
+                    tool_log.append(log_entry)
+
+                    # Executor already processed output, no truncation needed
+                    result_summaries[block.id] = log_entry["summary"]
+                    tool_results.append(
+                        {
+                            "type": "tool_result",
+                            "tool_use_id": block.id,
+                            "content": content,
+                        }
+                    )
 
                 # Add tool results to messages
                 messages.append({"role": "user", "content": tool_results})
 
+                # Offer the second turn whatever else was prefetched, unless this turn changed state
+                if prefetch:
+                    mutated = any(
+                        mutating and not key.startswith("docs:")
+                        for block in tool_blocks
+                        for key, mutating in _tool_resources(block.name, block.input).items()
+                    )
+                    context = "" if mutated else prefetch.ready_context()
+                    if context:
+                        _append_tail_note(messages, context)
+                    if not read_only:  # a lookup run may still hand the results over
+                        prefetch.cancel()
+                    prefetch = None
+
             else:
                 # Unexpected stop reason
                 return _make_result(f"Unexpected stop reason: {response.stop_reason}")
 
+        if read_only:
+            logger.info(f"Lookup tier used its {max_turns} turns; handing over to the orchestrator")
+            return None
         logger.warning(f"Max turns ({max_turns}) reached without completion")
         return _make_result(f"Reached maximum of {max_turns} steps. Task incomplete - consider breaking into smaller subtasks.")
 
@@ -0,0 +1,242 @@
+"""
+Sonarr/Radarr Connect webhooks: event-driven state and notifications.
+
+Sonarr and Radarr POST an event to `{ARR_WEBHOOK_PATH}/sonarr` or
+`/radarr` on the embedded HTTP server whenever a release is grabbed,
+imported, renamed or deleted. Each event
+
+- invalidates the service cache entries it makes stale,
+- refreshes (or removes) the item in the library catalog,
+- is kept in a short in-memory log that `arr-events` answers from, and
+- is reported to the chats that requested the series/movie.
+
+Configure it in Sonarr/Radarr under Settings → Connect → Webhook (method
+POST, password = ARR_WEBHOOK_SECRET).
+"""
+
+import asyncio
+import base64
+import hmac
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from bot.http_server import Request, Response
+
+logger = logging.getLogger(__name__)
+
+MAX_EVENTS = 200
+
+# Per service: the catalog kind, the payload key holding the item, and its delete event
+SOURCES = {
+    "sonarr": {"kind": "series", "item": "series", "delete": "SeriesDelete"},
+    "radarr": {"kind": "movie", "item": "movie", "delete": "MovieDelete"},
+}
+
+# Cached resources each event makes stale (None = everything for the service)
+STALE_RESOURCES = {
+    "sonarr": {
+        "Grab": ["queue", "history", "wanted"],
+        "Download": ["series", "episode", "queue", "wanted", "history"],
+        "Rename": ["series", "episode"],
+        "EpisodeFileDelete": ["series", "episode", "wanted"],
+        "SeriesDelete": None,
+    },
+    "radarr": {
+        "Grab": ["queue", "history"],
+        "Download": ["movie", "queue", "history"],
+        "Rename": ["movie"],
+        "MovieFileDelete": ["movie"],
+        "MovieDelete": None,
+    },
+}
+
+Notifier = Callable[[int, str], Awaitable[Any]]
+
+
+def _episode_label(episodes: List[Dict[str, Any]]) -> str:
+    """'S01E02', 'S01E02-E04' or 'S01E02 +3 more' for a webhook episode list."""
+    if not episodes:
+        return ""
+    episodes = sorted(episodes, key=lambda e: (e.get("seasonNumber", 0), e.get("episodeNumber", 0)))
+    first, last = episodes[0], episodes[-1]
+    label = f"S{first.get('seasonNumber', 0):02d}E{first.get('episodeNumber', 0):02d}"
+    if len(episodes) == 1:
+        return label
+    numbers = [e.get("episodeNumber", 0) for e in episodes]
+    consecutive = numbers == list(range(numbers[0], numbers[0] + len(numbers)))
+    if consecutive and first.get("seasonNumber") == last.get("seasonNumber"):
+        return f"{label}-E{last.get('episodeNumber', 0):02d}"
+    return f"{label} +{len(episodes) - 1} more"
+
+
+def summarize(service: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a webhook payload to a compact event record."""
+    source = SOURCES[service]
+    item = payload.get(source["item"]) or {}
+    title = item.get("title") or "Unknown"
+    if service == "radarr" and item.get("year"):
+        title = f"{title} ({item['year']})"
+
+    quality = (
+        (payload.get("release") or {}).get("quality")
+        or ((payload.get("episodeFile") or payload.get("movieFile") or {}).get("quality"))
+    )
+    return {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "service": service,
+        "event": payload.get("eventType", ""),
+        "id": item.get("id"),
+        "title": title,
+        "episodes": _episode_label(payload.get("episodes") or []),
+        "quality": quality,
+        "upgrade": bool(payload.get("isUpgrade")),
+        "download_id": (payload.get("downloadId") or "").lower() or None,
+    }
+
+
+def notification_text(event: Dict[str, Any]) -> Optional[str]:
+    """The chat message for an event, or None if it isn't worth one."""
+    name = f"{event['title']} {event['episodes']}".strip()
+    quality = f" ({event['quality']})" if event["quality"] else ""
+    if event["event"] == "Grab":
+        return f"⬇️ Downloading: {name}{quality}"
+    if event["event"] == "Download":
+        if event["upgrade"]:
+            return f"⬆️ Upgraded: {name}{quality}"
+        return f"✅ Ready to watch: {name}{quality}"
+    if event["event"] in ("SeriesDelete", "MovieDelete"):
+        return f"🗑️ Removed from the library: {event['title']}"
+    return None
+
+
+class ArrEventReceiver:
+    """Handles Connect webhook POSTs from Sonarr and Radarr."""
+
+    def __init__(self, secret: str):
+        self.secret = secret
+        self.events: deque = deque(maxlen=MAX_EVENTS)
+        self.notifier: Optional[Notifier] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def handler(self, service: str) -> Callable[[Request], Awaitable[Response]]:
+        """Build the HTTP handler for one service's webhook."""
+
+        async def handle(request: Request) -> Response:
+            if not self._authorized(request):
+                logger.warning(f"Rejected {service} webhook with bad credentials from {request.peer}")
+                return Response(401, "Unauthorized\n")
+            try:
+                payload = request.json()
+            except ValueError:
+                return Response(400, "Malformed payload\n")
+            if not isinstance(payload, dict) or not payload.get("eventType"):
+                return Response(400, "Missing eventType\n")
+
+            self.handle_event(service, payload)
+            return Response(200, "")
+
+        return handle
+
+    def _authorized(self, request: Request) -> bool:
+        """Accept the secret as the Basic auth password or a `token` query parameter."""
+        supplied = request.query.get("token", "")
+        authorization = request.headers.get("authorization", "")
+        if authorization.lower().startswith("basic "):
+            try:
+                supplied = base64.b64decode(authorization[6:]).decode().partition(":")[2]
+            except (ValueError, UnicodeDecodeError):
+                return False
+        return hmac.compare_digest(supplied.encode(), self.secret.encode())
+
+    def handle_event(self, service: str, payload: Dict[str, Any]):
+        """Apply an event: invalidate caches, log it, and update catalog and chats in the background."""
+        event = summarize(service, payload)
+        if event["event"] == "Test":
+            logger.info(f"{service} webhook test received")
+            return
+        logger.info(f"{service} event: {event['event']} {event['title']} {event['episodes']}".rstrip())
+        self.events.append(event)
+
+        self._invalidate(service, event["event"])
+        self._spawn(self._apply(service, event))
+
+    def _invalidate(self, service: str, event_type: str):
+        from bot.tools.service_client import get_service_client
+
+        cache = get_service_client().cache
+        if cache is None:
+            return
+        stale = STALE_RESOURCES[service]
+        if event_type in stale:
+            cache.invalidate(service, stale[event_type])
+        if event_type == "Grab":
+            cache.invalidate("qbt", ["torrents"])
+        elif event_type == "Download":
+            cache.invalidate("plex", ["library"])
+
+    async def _apply(self, service: str, event: Dict[str, Any]):
+        """Bring the catalog in line with the event and tell the requesting chats."""
+        from bot.catalog import get_catalog
+        from bot.torrents import get_torrent_tracker
+
+        catalog = get_catalog()
+        kind = SOURCES[service]["kind"]
+        item_id = event["id"]
+        if not isinstance(item_id, int):
+            return
+
+        chats = await asyncio.to_thread(catalog.requesters, kind, item_id)
+        try:
+            if event["event"] == SOURCES[service]["delete"]:
+                await asyncio.to_thread(catalog.delete, kind, item_id)
+            elif event["event"] in STALE_RESOURCES[service]:
+                await catalog.refresh_item(kind, item_id)
+        except Exception as e:
+            logger.warning(f"Catalog update for {service} {event['event']} failed: {e}")
+
+        if event["event"] == "Grab":
+            get_torrent_tracker().poke()
+
+        text = notification_text(event)
+        if text and self.notifier:
+            for chat_id in chats:
+                try:
+                    await self.notifier(chat_id, text)
+                except Exception as e:
+                    logger.warning(f"Failed to notify chat {chat_id}: {e}")
+
+    def _spawn(self, coroutine: Awaitable):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def recent(self, count: int = 20, service: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The latest events, newest first."""
+        events = [e for e in reversed(self.events) if service is None or e["service"] == service]
+        return events[:count]
+
+
+def format_events(events: List[Dict[str, Any]]) -> str:
+    """Render events for `arr-events` (JSON, like the other helpers)."""
+    return json.dumps(
+        [{key: value for key, value in event.items() if value not in (None, "", False)} for event in events],
+        indent=2,
+        ensure_ascii=False,
+    ) + "\n"
+
+
+_receiver: Optional[ArrEventReceiver] = None
+
+
+def get_arr_events() -> Optional[ArrEventReceiver]:
+    """Return the process-wide receiver, or None if ARR_WEBHOOK_SECRET isn't set."""
+    global _receiver
+    if _receiver is None:
+        from bot.config import ARR_WEBHOOK_SECRET
+
+        if ARR_WEBHOOK_SECRET:
+            _receiver = ArrEventReceiver(ARR_WEBHOOK_SECRET)
+    return _receiver
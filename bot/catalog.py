@@ -0,0 +1,597 @@
+"""
+Local library catalog for fast title lookups.
+
+Mirrors the Sonarr series and Radarr movie libraries into SQLite with FTS5
+indexes, so `sonarr-find` / `radarr-find` answer in milliseconds instead of
+downloading the whole library on every search.
+
+Sync model:
+- Immediate upserts/deletes when the bot itself adds, edits or deletes a
+  series/movie through the service client, or when Sonarr/Radarr report
+  a change through their Connect webhooks (bot/arr_events.py)
+- A full sync at startup, to catch up on changes made while the bot was down
+  (only rows whose content changed are rewritten)
+- A rare full reconciliation on the same diff basis, for changes no event
+  reported; a lookup that finds nothing resyncs early if the catalog is a
+  few minutes old, so titles added in the Sonarr/Radarr UI show up at once
+
+The chats that added or searched for an item are remembered as its
+requesters, so download and import events can be reported back to them.
+"""
+
+import asyncio
+import difflib
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from bot.scheduler import current_chat
+
+logger = logging.getLogger(__name__)
+
+# Library kinds: where they come from and what a search result looks like
+KINDS = {
+    "series": {
+        "service": "sonarr",
+        "endpoint": "/series",
+        "fields": ["id", "title", "monitored", "tvdbId"],
+    },
+    "movie": {
+        "service": "radarr",
+        "endpoint": "/movie",
+        "fields": ["id", "title", "year", "monitored", "hasFile", "tmdbId"],
+    },
+}
+
+# Extra fields kept per item (beyond the search output) for other consumers
+EXTRA_FIELDS = {
+    "series": ["year", "status", "path", "statistics"],
+    "movie": ["status", "path", "sizeOnDisk"],
+}
+
+# A lookup that finds nothing resyncs a catalog at least this old
+MISS_RESYNC_AGE = 300  # seconds
+# Minimum wait between reconciliation attempts (e.g. while a service is down)
+RECONCILE_RETRY_DELAY = 60  # seconds
+
+FUZZY_MIN_RATIO = 0.6
+FUZZY_CANDIDATES = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    rowid INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    norm_title TEXT NOT NULL,
+    aliases TEXT NOT NULL DEFAULT '',
+    record TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    UNIQUE (kind, item_id)
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    norm_title, aliases,
+    content='items', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS items_tri USING fts5(
+    norm_title, aliases,
+    content='items', content_rowid='rowid',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts(rowid, norm_title, aliases) VALUES (new.rowid, new.norm_title, new.aliases);
+    INSERT INTO items_tri(rowid, norm_title, aliases) VALUES (new.rowid, new.norm_title, new.aliases);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, norm_title, aliases) VALUES ('delete', old.rowid, old.norm_title, old.aliases);
+    INSERT INTO items_tri(items_tri, rowid, norm_title, aliases) VALUES ('delete', old.rowid, old.norm_title, old.aliases);
+END;
+
+CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, norm_title, aliases) VALUES ('delete', old.rowid, old.norm_title, old.aliases);
+    INSERT INTO items_tri(items_tri, rowid, norm_title, aliases) VALUES ('delete', old.rowid, old.norm_title, old.aliases);
+    INSERT INTO items_fts(rowid, norm_title, aliases) VALUES (new.rowid, new.norm_title, new.aliases);
+    INSERT INTO items_tri(rowid, norm_title, aliases) VALUES (new.rowid, new.norm_title, new.aliases);
+END;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    kind TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    item_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS requesters (
+    kind TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    chat_id INTEGER NOT NULL,
+    requested_at REAL NOT NULL,
+    PRIMARY KEY (kind, item_id, chat_id)
+);
+"""
+
+
+def normalize_title(text: str) -> str:
+    """Lowercase, strip diacritics and punctuation, collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    cleaned = re.sub(r"[^\w\s]", " ", stripped.lower().replace("&", " and "))
+    return " ".join(cleaned.split())
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Render search results the way the find helpers print them."""
+    return json.dumps(results, indent=2, ensure_ascii=False) + "\n"
+
+
+def _fts_phrase(token: str) -> str:
+    """Quote a token for an FTS5 MATCH expression."""
+    return '"' + token.replace('"', '""') + '"'
+
+
+class LibraryCatalog:
+    """SQLite-backed index of the Sonarr/Radarr libraries."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._pending_writes: Set[asyncio.Task] = set()  # on_mutation writes in flight
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _row_for(kind: str, item: Dict[str, Any]) -> tuple:
+        """Build (item_id, title, norm_title, aliases, record, fingerprint) for an API item."""
+        fields = KINDS[kind]["fields"] + EXTRA_FIELDS[kind]
+        record = {field: item.get(field) for field in fields}
+        aliases = " ".join(
+            normalize_title(alt.get("title", ""))
+            for alt in item.get("alternateTitles") or []
+            if alt.get("title")
+        )
+        record_json = json.dumps(record, sort_keys=True, separators=(",", ":"))
+        fingerprint = hashlib.sha1((record_json + aliases).encode()).hexdigest()
+        title = item.get("title") or ""
+        return item["id"], title, normalize_title(title), aliases, record_json, fingerprint
+
+    def replace_all(self, kind: str, items: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Reconcile the catalog with a full library listing.
+
+        Only changed rows are rewritten, so repeat syncs are cheap.
+
+        Returns:
+            Counts of added, updated and removed items
+        """
+        rows = {item["id"]: self._row_for(kind, item) for item in items if "id" in item}
+        added = updated = 0
+
+        with self._lock:
+            existing = {
+                row["item_id"]: row["fingerprint"]
+                for row in self._conn.execute("SELECT item_id, fingerprint FROM items WHERE kind = ?", (kind,))
+            }
+            removed = [item_id for item_id in existing if item_id not in rows]
+
+            with self._conn:
+                for item_id, row in rows.items():
+                    if item_id not in existing:
+                        self._insert(kind, row)
+                        added += 1
+                    elif existing[item_id] != row[-1]:
+                        self._update(kind, row)
+                        updated += 1
+                self._conn.executemany(
+                    "DELETE FROM items WHERE kind = ? AND item_id = ?",
+                    [(kind, item_id) for item_id in removed],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (kind, synced_at, item_count) VALUES (?, ?, ?)",
+                    (kind, time.time(), len(rows)),
+                )
+
+        return {"added": added, "updated": updated, "removed": len(removed)}
+
+    def upsert(self, kind: str, item: Dict[str, Any]):
+        """Insert or update a single item."""
+        row = self._row_for(kind, item)
+        with self._lock, self._conn:
+            exists = self._conn.execute(
+                "SELECT 1 FROM items WHERE kind = ? AND item_id = ?", (kind, row[0])
+            ).fetchone()
+            if exists:
+                self._update(kind, row)
+            else:
+                self._insert(kind, row)
+
+    def delete(self, kind: str, item_id: int):
+        """Remove a single item and forget who requested it."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM items WHERE kind = ? AND item_id = ?", (kind, item_id))
+            self._conn.execute("DELETE FROM requesters WHERE kind = ? AND item_id = ?", (kind, item_id))
+
+    def add_requester(self, kind: str, item_id: int, chat_id: int):
+        """Remember that a chat asked for an item (to notify it about downloads)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO requesters (kind, item_id, chat_id, requested_at) VALUES (?, ?, ?, ?)",
+                (kind, item_id, chat_id, time.time()),
+            )
+
+    def _insert(self, kind: str, row: tuple):
+        self._conn.execute(
+            "INSERT INTO items (kind, item_id, title, norm_title, aliases, record, fingerprint) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (kind,) + row,
+        )
+
+    def _update(self, kind: str, row: tuple):
+        item_id, title, norm_title, aliases, record, fingerprint = row
+        self._conn.execute(
+            "UPDATE items SET title = ?, norm_title = ?, aliases = ?, record = ?, fingerprint = ? "
+            "WHERE kind = ? AND item_id = ?",
+            (title, norm_title, aliases, record, fingerprint, kind, item_id),
+        )
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def synced_age(self, kind: str) -> Optional[float]:
+        """Seconds since the kind's last full sync, or None if it never synced."""
+        with self._lock:
+            row = self._conn.execute("SELECT synced_at FROM sync_state WHERE kind = ?", (kind,)).fetchone()
+        return time.time() - row["synced_at"] if row else None
+
+    def get(self, kind: str, item_id: int) -> Optional[Dict[str, Any]]:
+        """Return the stored record for an item."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM items WHERE kind = ? AND item_id = ?", (kind, item_id)
+            ).fetchone()
+        return json.loads(row["record"]) if row else None
+
+    def requesters(self, kind: str, item_id: int) -> List[int]:
+        """Chats that asked for an item."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chat_id FROM requesters WHERE kind = ? AND item_id = ? ORDER BY requested_at",
+                (kind, item_id),
+            ).fetchall()
+        return [row["chat_id"] for row in rows]
+
+    def search(self, kind: str, term: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Find library items by title.
+
+        Matching is case- and diacritic-insensitive. Word (prefix) matches are
+        tried first, ranked with exact and leading matches on the main title
+        above alias hits; then substring matches; then typo-tolerant fuzzy
+        matching over trigram candidates.
+
+        Returns:
+            Records with the kind's search fields, best match first
+        """
+        norm = normalize_title(term)
+        if not norm:
+            return []
+
+        with self._lock:
+            rows = self._word_matches(kind, norm, limit)
+            if not rows:
+                rows = self._substring_matches(kind, norm, limit)
+            if not rows:
+                rows = self._fuzzy_matches(kind, norm, limit)
+
+        fields = KINDS[kind]["fields"]
+        results = []
+        for row in rows:
+            record = json.loads(row["record"])
+            results.append({field: record.get(field) for field in fields})
+        return results
+
+    def _word_matches(self, kind: str, norm: str, limit: int) -> List[sqlite3.Row]:
+        query = " AND ".join(_fts_phrase(token) + "*" for token in norm.split())
+        return self._conn.execute(
+            """
+            SELECT items.record FROM items_fts
+            JOIN items ON items.rowid = items_fts.rowid
+            WHERE items_fts MATCH ? AND items.kind = ?
+            ORDER BY (items.norm_title = ?) DESC,
+                     (items.norm_title LIKE ? || '%') DESC,
+                     bm25(items_fts, 10.0, 1.0),
+                     length(items.norm_title)
+            LIMIT ?
+            """,
+            (query, kind, norm, norm, limit),
+        ).fetchall()
+
+    def _substring_matches(self, kind: str, norm: str, limit: int) -> List[sqlite3.Row]:
+        if len(norm) < 3:
+            return []
+        return self._conn.execute(
+            """
+            SELECT items.record FROM items_tri
+            JOIN items ON items.rowid = items_tri.rowid
+            WHERE items_tri MATCH ? AND items.kind = ?
+            ORDER BY length(items.norm_title)
+            LIMIT ?
+            """,
+            (_fts_phrase(norm), kind, limit),
+        ).fetchall()
+
+    def _fuzzy_matches(self, kind: str, norm: str, limit: int) -> List[sqlite3.Row]:
+        grams = {norm[i:i + 3] for i in range(len(norm) - 2)}
+        candidates = []
+        if grams:
+            query = " OR ".join(_fts_phrase(gram) for gram in grams)
+            candidates = self._conn.execute(
+                """
+                SELECT items.record, items.norm_title, items.aliases FROM items_tri
+                JOIN items ON items.rowid = items_tri.rowid
+                WHERE items_tri MATCH ? AND items.kind = ?
+                ORDER BY bm25(items_tri)
+                LIMIT ?
+                """,
+                (query, kind, FUZZY_CANDIDATES),
+            ).fetchall()
+
+        # Short terms with a typo can share no trigram with the title ("dnue"),
+        # so also consider titles of about the same length
+        if len(norm) <= 6:
+            candidates += self._conn.execute(
+                """
+                SELECT record, norm_title, aliases FROM items
+                WHERE kind = ? AND length(norm_title) BETWEEN ? AND ?
+                LIMIT ?
+                """,
+                (kind, len(norm) - 2, len(norm) + 2, FUZZY_CANDIDATES * 10),
+            ).fetchall()
+
+        scored = []
+        seen = set()
+        for row in candidates:
+            if row["record"] in seen:
+                continue
+            seen.add(row["record"])
+            names = [row["norm_title"]] + ([row["aliases"]] if row["aliases"] else [])
+            ratio = max(difflib.SequenceMatcher(None, norm, name).ratio() for name in names)
+            if ratio >= FUZZY_MIN_RATIO:
+                scored.append((ratio, row))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return [row for _, row in scored[:limit]]
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    async def sync(self, kind: str) -> Dict[str, int]:
+        """Pull the full library for a kind from its service and reconcile."""
+        from bot.tools.service_client import get_service_client
+
+        source = KINDS[kind]
+        started = time.monotonic()
+        response = await get_service_client().request(source["service"], "GET", source["endpoint"], fresh=True)
+        if not response["ok"] or not isinstance(response["json"], list):
+            raise RuntimeError(f"{source['service']} returned HTTP {response['status']}")
+
+        counts = await asyncio.to_thread(self.replace_all, kind, response["json"])
+        logger.info(
+            f"Catalog: synced {len(response['json'])} {kind} in {time.monotonic() - started:.2f}s "
+            f"(+{counts['added']} ~{counts['updated']} -{counts['removed']})"
+        )
+        return counts
+
+    async def find(self, kind: str, term: str, max_age: float) -> List[Dict[str, Any]]:
+        """
+        Search, syncing first if the catalog is empty or older than max_age seconds.
+
+        If a stale catalog can't be synced, the existing rows are searched. A
+        search that finds nothing in a catalog older than MISS_RESYNC_AGE syncs
+        and searches again, in case the item was added outside the bot.
+
+        Raises:
+            RuntimeError, ServiceError: If the catalog never synced and syncing fails
+        """
+        age = await asyncio.to_thread(self.synced_age, kind)
+        if age is None or age > max_age:
+            age = await self._sync_or_keep(kind, age)
+        results = await asyncio.to_thread(self.search, kind, term)
+        if not results and age > MISS_RESYNC_AGE and await self._sync_or_keep(kind, age) == 0:
+            results = await asyncio.to_thread(self.search, kind, term)
+        return results
+
+    async def _sync_or_keep(self, kind: str, age: Optional[float]) -> float:
+        """Sync a kind and return its new age, keeping the existing rows if that fails."""
+        try:
+            await self.sync(kind)
+            return 0
+        except Exception as e:
+            if age is None:  # nothing to fall back on
+                raise
+            logger.warning(f"Catalog: {kind} sync failed, searching the copy from {age:.0f}s ago: {e}")
+            return age
+
+    async def sync_all(self):
+        """Sync every kind, logging (not raising) failures."""
+        for kind in KINDS:
+            try:
+                await self.sync(kind)
+            except Exception as e:
+                logger.warning(f"Catalog: {kind} sync failed: {e}")
+
+    def start(self, refresh_interval: float):
+        """Start the background sync loop (full sync now, then a reconciliation every refresh_interval)."""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(refresh_interval))
+
+    async def stop(self):
+        """Stop background syncing and close the database."""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+        with self._lock:
+            self._conn.close()
+
+    async def _refresh_loop(self, interval: float):
+        await self.sync_all()
+        while True:
+            # Syncs done on demand by find() push the next reconciliation back
+            ages = [await asyncio.to_thread(self.synced_age, kind) for kind in KINDS]
+            wait = min(interval - age if age is not None else 0 for age in ages)
+            await asyncio.sleep(max(wait, RECONCILE_RETRY_DELAY))
+            for kind in KINDS:
+                age = await asyncio.to_thread(self.synced_age, kind)
+                if age is None or age >= interval - RECONCILE_RETRY_DELAY:
+                    try:
+                        await self.sync(kind)
+                    except Exception as e:
+                        logger.warning(f"Catalog: {kind} sync failed: {e}")
+
+    def on_mutation(self, service: str, method: str, endpoint: str, response: Dict[str, Any]):
+        """
+        Apply a series/movie mutation made through the service client.
+
+        POST/PUT responses carry the full item, so they're upserted directly;
+        DELETE /series/{id} or /movie/{id} removes the item. The writes run in
+        a worker thread so the event loop never waits on SQLite.
+        """
+        writes = self._mutation_writes(service, method, endpoint, response, current_chat.get())
+        if not writes:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # called outside the bot's loop (scripts)
+            self._apply_writes(writes)
+            return
+        task = loop.create_task(asyncio.to_thread(self._apply_writes, writes))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._write_done)
+
+    def _mutation_writes(self, service: str, method: str, endpoint: str, response: Dict[str, Any], chat_id: Optional[int]) -> list:
+        """The (write, args) calls a mutation response implies."""
+        writes = []
+        for kind, source in KINDS.items():
+            if source["service"] != service or not response.get("ok"):
+                continue
+            if chat_id is not None and method == "POST" and endpoint.rstrip("/") == "/command":
+                # Searches started by a chat (SeriesSearch, EpisodeSearch, MoviesSearch, ...)
+                for item_id in _command_item_ids(kind, response["json"]):
+                    writes.append((self.add_requester, (kind, item_id, chat_id)))
+                continue
+            match = re.match(rf"^{source['endpoint']}(?:/(\d+))?/?$", endpoint)
+            if not match:
+                continue
+
+            if method == "DELETE" and match.group(1):
+                writes.append((self.delete, (kind, int(match.group(1)))))
+            elif method in ("POST", "PUT"):
+                items = response["json"] if isinstance(response["json"], list) else [response["json"]]
+                for item in items:
+                    if isinstance(item, dict) and "id" in item and "title" in item:
+                        writes.append((self.upsert, (kind, item)))
+                        if chat_id is not None and method == "POST":
+                            writes.append((self.add_requester, (kind, item["id"], chat_id)))
+        return writes
+
+    @staticmethod
+    def _apply_writes(writes: list):
+        for write, args in writes:
+            write(*args)
+
+    def _write_done(self, task: asyncio.Task):
+        self._pending_writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Catalog: applying a mutation failed: {task.exception()}")
+
+    async def refresh_item(self, kind: str, item_id: int):
+        """Re-fetch one item from its service and upsert it."""
+        from bot.tools.service_client import get_service_client
+
+        source = KINDS[kind]
+        response = await get_service_client().request(
+            source["service"], "GET", f"{source['endpoint']}/{item_id}", fresh=True
+        )
+        if response["ok"] and isinstance(response["json"], dict) and "id" in response["json"]:
+            await asyncio.to_thread(self.upsert, kind, response["json"])
+        elif response["status"] == 404:
+            await asyncio.to_thread(self.delete, kind, item_id)
+
+
+def _command_item_ids(kind: str, command: Any) -> List[int]:
+    """Series/movie IDs a Sonarr/Radarr command response refers to."""
+    body = command.get("body") if isinstance(command, dict) else None
+    if not isinstance(body, dict):
+        return []
+    if kind == "series":
+        ids = [body.get("seriesId")] + list(body.get("seriesIds") or [])
+    else:
+        ids = list(body.get("movieIds") or [])
+    return [item_id for item_id in ids if isinstance(item_id, int)]
+
+
+_catalog: Optional[LibraryCatalog] = None
+
+
+def get_catalog() -> LibraryCatalog:
+    """Return the process-wide catalog."""
+    global _catalog
+    if _catalog is None:
+        from bot.config import CATALOG_DB_PATH
+
+        _catalog = LibraryCatalog(CATALOG_DB_PATH)
+    return _catalog
+
+
+async def run_find_cli(kind: str, argv: List[str]) -> int:
+    """Entry point for the `sonarr-find` / `radarr-find` scripts."""
+    from bot.config import CATALOG_DB_PATH, CATALOG_REFRESH_INTERVAL
+    from bot.tools.service_client import ServiceError, get_service_client
+
+    name = "sonarr-find" if kind == "series" else "radarr-find"
+    if len(argv) != 1:
+        print(f"Usage: {name} <search_term>")
+        return 1
+
+    catalog = LibraryCatalog(CATALOG_DB_PATH)
+    try:
+        results = await catalog.find(kind, argv[0], max_age=CATALOG_REFRESH_INTERVAL * 2)
+    except (ServiceError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        await get_service_client().aclose()
+        await catalog.stop()
+
+    sys.stdout.write(format_results(results))
+    return 0
@@ -34,6 +34,99 @@ EXECUTOR_MODEL = os.getenv("EXECUTOR_MODEL", "claude-haiku-4-5-20251001")
 MAX_EXECUTOR_INPUT_TOKENS = int(os.getenv("MAX_EXECUTOR_INPUT_TOKENS", "50000"))
 MAX_EXECUTOR_OUTPUT_TOKENS = int(os.getenv("MAX_EXECUTOR_OUTPUT_TOKENS", "4000"))
 
+# Map-reduce for outputs over MAX_EXECUTOR_INPUT_TOKENS: chunk size, chunk cap, parallel calls
+EXECUTOR_CHUNK_TOKENS = int(os.getenv("EXECUTOR_CHUNK_TOKENS", "25000"))
+MAX_EXECUTOR_CHUNKS = int(os.getenv("MAX_EXECUTOR_CHUNKS", "20"))
+MAX_PARALLEL_EXECUTOR_CALLS = int(os.getenv("MAX_PARALLEL_EXECUTOR_CALLS", "5"))
+
+# Conversation history: token budget per chat, rolling summary size, exchanges always kept verbatim
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "12000"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "800"))
+HISTORY_KEEP_EXCHANGES = int(os.getenv("HISTORY_KEEP_EXCHANGES", "2"))
+HISTORY_ENTRY_MAX_TOKENS = int(os.getenv("HISTORY_ENTRY_MAX_TOKENS", "2500"))
+
+# Conversation persistence (SQLite, WAL); set HISTORY_DB_PATH empty to keep history in memory only
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", str(PROJECT_ROOT / "data" / "history.db"))
+HISTORY_CACHE_CHATS = int(os.getenv("HISTORY_CACHE_CHATS", "100"))  # chats kept in memory
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "1.0"))  # seconds between batched writes
+
+# Within-run context editing: past this many prompt tokens, older tool results are
+# replaced by their short summaries (the newest KEEP_RECENT_TOOL_RESULTS stay verbatim)
+RUN_CONTEXT_BUDGET_TOKENS = int(os.getenv("RUN_CONTEXT_BUDGET_TOKENS", "30000"))
+KEEP_RECENT_TOOL_RESULTS = int(os.getenv("KEEP_RECENT_TOOL_RESULTS", "4"))
+
+# Agent job scheduling (concurrent sessions across chats, queued work per chat)
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "4"))
+MAX_QUEUED_JOBS_PER_CHAT = int(os.getenv("MAX_QUEUED_JOBS_PER_CHAT", "3"))
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", "20"))
+
+# Independent tool calls from one orchestrator turn that may run at once
+MAX_PARALLEL_TOOLS = int(os.getenv("MAX_PARALLEL_TOOLS", "4"))
+
+# Intent routing: status questions answered from templates (no model), read-only questions by
+# EXECUTOR_MODEL with read-only tools (at most LOOKUP_MAX_TURNS turns), the rest by the orchestrator
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Ask EXECUTOR_MODEL to place messages the local rules can't (otherwise they go to the orchestrator)
+ROUTER_CLASSIFIER = os.getenv("ROUTER_CLASSIFIER", "false").lower() in ("1", "true", "yes")
+LOOKUP_MAX_TURNS = int(os.getenv("LOOKUP_MAX_TURNS", "6"))
+
+# Start likely lookups (find helpers, qbt-status, df) from the message text while the first orchestrator call runs
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Stream the orchestrator's answer into a live Telegram message as it's generated
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() in ("1", "true", "yes")
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))  # seconds between edits
+PROGRESS_EDIT_INTERVAL = float(os.getenv("PROGRESS_EDIT_INTERVAL", "1.5"))  # seconds between progress edits
+
+# Read-through cache for service GETs (invalidated by mutations to the same service)
+SERVICE_CACHE_ENABLED = os.getenv("SERVICE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Seconds after a mutation during which GETs to that service skip the cache (verification reads)
+SERVICE_CACHE_VERIFY_WINDOW = float(os.getenv("SERVICE_CACHE_VERIFY_WINDOW", "30"))
+
+# Library catalog (local index behind sonarr-find / radarr-find)
+CATALOG_DB_PATH = Path(os.getenv("CATALOG_DB_PATH", str(PROJECT_ROOT / "data" / "catalog.db")))
+# Seconds between full reconciliations with Sonarr/Radarr; the bot's own changes,
+# webhooks and lookups that miss keep the catalog current in between
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "21600"))
+
+# Live torrent table from qBittorrent's /sync/maindata deltas (behind qbt-status and completion notices)
+QBT_SYNC_ENABLED = os.getenv("QBT_SYNC_ENABLED", "true").lower() in ("1", "true", "yes")
+QBT_SYNC_INTERVAL = float(os.getenv("QBT_SYNC_INTERVAL", "2"))  # seconds between polls while downloading
+QBT_SYNC_IDLE_INTERVAL = float(os.getenv("QBT_SYNC_IDLE_INTERVAL", "30"))  # seconds between polls otherwise
+
+# Embedded HTTP server (Telegram webhook, /metrics); only started when something needs it
+HTTP_LISTEN = os.getenv("HTTP_LISTEN", "127.0.0.1")
+HTTP_PORT = int(os.getenv("HTTP_PORT", "8443"))
+
+# Telegram webhook mode (set WEBHOOK_URL to the public HTTPS URL to use it instead of polling)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+# Checked against X-Telegram-Bot-Api-Secret-Token; random per start if unset
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+
+# Sonarr/Radarr Connect webhooks at {ARR_WEBHOOK_PATH}/sonarr and /radarr (enabled when the secret is set)
+ARR_WEBHOOK_SECRET = os.getenv("ARR_WEBHOOK_SECRET", "")
+ARR_WEBHOOK_PATH = os.getenv("ARR_WEBHOOK_PATH", "/arr")
+
+# Prometheus-format metrics at GET /metrics on the embedded HTTP server
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+# Bearer token scrapers must send ("Authorization: Bearer <token>"); unauthenticated if unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Users allowed to run admin commands (/metrics); defaults to the first allowed user
+ADMIN_USER_IDS = [
+    int(uid.strip())
+    for uid in os.getenv("ADMIN_USER_IDS", "").split(",")
+    if uid.strip()
+] or ALLOWED_USER_IDS[:1]
+
+# Bot and conversation logs (one file per day)
+LOG_DIR = Path(os.getenv("LOG_DIR", str(PROJECT_ROOT / "logs")))
+
+# Per-request span traces (JSONL, one file per day) behind the /trace command
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_DIR = Path(os.getenv("TRACE_DIR", str(LOG_DIR / "traces")))
+
 # Service URLs (for reference, actual API calls use api-call script)
 SONARR_URL = os.getenv("SONARR_URL", "http://192.168.1.14:8989")
 RADARR_URL = os.getenv("RADARR_URL", "http://192.168.1.14:7878")
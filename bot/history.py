@@ -0,0 +1,211 @@
+"""Per-chat conversation history kept within a token budget."""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from bot.tokens import token_estimator
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_HEADER = "[Summary of our earlier conversation]"
+SUMMARY_FOOTER = "[End of summary]"
+
+
+def truncate_to_tokens(content: str, max_tokens: int) -> str:
+    """Truncate text to roughly max_tokens, noting how much was cut."""
+    if token_estimator.estimate(content) <= max_tokens:
+        return content
+    max_chars = int(max_tokens * token_estimator.chars_per_token)
+    return content[:max_chars] + f"\n\n[... truncated {len(content) - max_chars} characters]"
+
+
+async def summarize_exchanges(previous_summary: str, entries: List[Dict[str, Any]], max_tokens: int) -> str:
+    """Fold exchanges into a running summary with the executor model."""
+    from bot.tools.executor import call_executor
+
+    transcript = "\n\n".join(f"{entry['role'].upper()}: {entry['content']}" for entry in entries)
+    previous = previous_summary or "(none yet)"
+    prompt = f"""You maintain the running summary of a Telegram conversation between a user and Blackbeard, an assistant that manages a Plex media server (Sonarr, Radarr, qBittorrent).
+
+Update the summary so it also covers the older exchanges below. Keep what later requests may depend on:
+• Titles, IDs, seasons/episodes and files that were discussed
+• Actions taken and their outcomes (added, searched, deleted, failed)
+• User preferences and unresolved requests or follow-ups
+Drop greetings, chit-chat and step-by-step tool detail. Write terse bullet points, under {max_tokens * 3 // 4} words. Output only the summary.
+
+Current summary:
+{previous}
+
+Older exchanges to fold in:
+{transcript}"""
+
+    summary = await call_executor(prompt, max_tokens=max_tokens)
+    return truncate_to_tokens(summary.strip(), max_tokens)
+
+
+class ChatHistory:
+    """One chat's rolling summary plus its recent exchanges verbatim."""
+
+    def __init__(self, summary: str = "", entries: Optional[List[Dict[str, str]]] = None):
+        self.summary = summary
+        self.entries: List[Dict[str, str]] = entries or []  # alternating user/assistant messages
+        self.summary_task: Optional[asyncio.Task] = None
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens this history adds to a prompt."""
+        total = token_estimator.estimate(self.summary) if self.summary else 0
+        return total + sum(token_estimator.estimate(entry["content"]) for entry in self.entries)
+
+
+class HistoryManager:
+    """
+    Keeps each chat's history within a token budget.
+
+    When a chat's history outgrows the budget, its oldest exchanges are folded
+    into a compact rolling summary by the executor model. Summarization runs
+    in the background: until it lands, the exchanges being folded stay in
+    the prompt verbatim, so nothing is lost and no request waits on it.
+
+    With a HistoryStore, histories persist across restarts: only the most
+    recently active chats stay in memory, and others are loaded lazily on
+    their next message.
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int = 12000,
+        summary_tokens: int = 800,
+        keep_exchanges: int = 2,
+        entry_max_tokens: int = 2500,
+        store=None,
+        max_cached_chats: int = 100,
+    ):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.keep_exchanges = keep_exchanges
+        self.entry_max_tokens = entry_max_tokens
+        self.store = store  # Optional HistoryStore
+        self.max_cached_chats = max_cached_chats
+        self._chats: "OrderedDict[int, ChatHistory]" = OrderedDict()
+
+    async def messages(self, chat_id: int) -> List[Dict[str, str]]:
+        """Return the chat's history as API messages (summary folded into the first one)."""
+        history = await self._get(chat_id)
+        if history is None or not history.entries:
+            return []
+
+        messages = [{"role": entry["role"], "content": entry["content"]} for entry in history.entries]
+        if history.summary:
+            messages[0]["content"] = (
+                f"{SUMMARY_HEADER}\n{history.summary}\n{SUMMARY_FOOTER}\n\n{messages[0]['content']}"
+            )
+        return messages
+
+    async def append_exchange(self, chat_id: int, user_message: str, assistant_message: str):
+        """Record a completed exchange and fold old ones if over budget."""
+        history = await self._get(chat_id)
+        if history is None:
+            history = ChatHistory()
+            self._remember(chat_id, history)
+        history.entries.append({"role": "user", "content": truncate_to_tokens(user_message, self.entry_max_tokens)})
+        history.entries.append(
+            {"role": "assistant", "content": truncate_to_tokens(assistant_message, self.entry_max_tokens)}
+        )
+        self._persist(chat_id, history)
+        self._maybe_fold(chat_id, history)
+
+    async def clear(self, chat_id: int) -> bool:
+        """Forget a chat's history. Returns True if there was any."""
+        history = await self._get(chat_id)
+        self._chats.pop(chat_id, None)
+        if history is None:
+            return False
+        if history.summary_task:
+            history.summary_task.cancel()
+        if self.store:
+            self.store.queue_delete(chat_id)
+        return bool(history.entries or history.summary)
+
+    async def _get(self, chat_id: int) -> Optional[ChatHistory]:
+        """Return a chat's history from memory, loading it from the store on a miss."""
+        history = self._chats.get(chat_id)
+        if history is not None:
+            self._chats.move_to_end(chat_id)
+            return history
+        if self.store is None:
+            return None
+
+        snapshot = await self.store.load(chat_id)
+        # Another task may have loaded or created it while we waited on the store
+        if chat_id in self._chats:
+            return await self._get(chat_id)
+        if snapshot is None:
+            return None
+
+        history = ChatHistory(summary=snapshot[0], entries=list(snapshot[1]))
+        self._remember(chat_id, history)
+        logger.info(f"History for chat {chat_id}: loaded {len(history.entries)} messages from store")
+        self._maybe_fold(chat_id, history)
+        return history
+
+    def _remember(self, chat_id: int, history: ChatHistory):
+        """Add a history to the in-memory tier, evicting the least recently used chats."""
+        self._chats[chat_id] = history
+        self._chats.move_to_end(chat_id)
+        if self.store is None:
+            return  # nothing to reload evicted chats from
+
+        excess = len(self._chats) - self.max_cached_chats
+        for old_id in list(self._chats):
+            if excess <= 0:
+                break
+            # Chats mid-summarization stay until the summary lands (it edits them in place)
+            if old_id != chat_id and self._chats[old_id].summary_task is None:
+                del self._chats[old_id]
+                excess -= 1
+
+    def _persist(self, chat_id: int, history: ChatHistory):
+        if self.store:
+            self.store.queue_save(chat_id, history.summary, history.entries)
+
+    def _maybe_fold(self, chat_id: int, history: ChatHistory):
+        """Start a background summarization if the history is over budget."""
+        if history.summary_task is not None or history.tokens <= self.budget_tokens:
+            return
+
+        # Fold whole exchanges, oldest first, until the verbatim part fits
+        # alongside a full-size summary; always keep the newest exchanges
+        target = self.budget_tokens - self.summary_tokens
+        remaining = sum(token_estimator.estimate(entry["content"]) for entry in history.entries)
+        foldable = len(history.entries) - self.keep_exchanges * 2
+        fold = 0
+        while fold + 2 <= foldable and remaining > target:
+            remaining -= sum(token_estimator.estimate(entry["content"]) for entry in history.entries[fold:fold + 2])
+            fold += 2
+
+        if fold:
+            history.summary_task = asyncio.create_task(self._fold(chat_id, history, fold))
+
+    async def _fold(self, chat_id: int, history: ChatHistory, count: int):
+        """Summarize the oldest `count` entries into the rolling summary."""
+        before = history.tokens
+        folded = history.entries[:count]
+        try:
+            history.summary = await summarize_exchanges(history.summary, folded, self.summary_tokens)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Keep the budget even if summarizing failed — the old summary stays
+            logger.warning(f"History summarization failed for chat {chat_id}, dropping {count} messages: {e}")
+
+        del history.entries[:count]
+        history.summary_task = None
+        self._persist(chat_id, history)
+        logger.info(
+            f"History for chat {chat_id}: folded {count} messages into summary "
+            f"(~{before:,} → ~{history.tokens:,} tokens)"
+        )
+        self._maybe_fold(chat_id, history)
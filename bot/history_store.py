@@ -0,0 +1,136 @@
+"""SQLite persistence for per-chat conversation history."""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_history (
+    chat_id INTEGER PRIMARY KEY,
+    summary TEXT NOT NULL,
+    entries TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Snapshot of one chat: (summary, entries), or None to delete it
+Snapshot = Optional[Tuple[str, List[Dict[str, str]]]]
+
+
+class HistoryStore:
+    """
+    Persists chat histories in SQLite (WAL mode).
+
+    Writes are queued and flushed in batches from a background task, off the
+    event loop; repeated saves of the same chat between flushes coalesce into
+    one row write. Reads check the unflushed queue first, so a chat evicted
+    from memory and reloaded before the next flush sees its latest state.
+    """
+
+    def __init__(self, db_path: Path, flush_interval: float = 1.0):
+        self.db_path = Path(db_path)
+        self.flush_interval = flush_interval
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+        self._pending: Dict[int, Snapshot] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    async def load(self, chat_id: int) -> Snapshot:
+        """Load a chat's history (None if it has none)."""
+        if chat_id in self._pending:
+            return self._pending[chat_id]
+        return await asyncio.to_thread(self._load, chat_id)
+
+    def queue_save(self, chat_id: int, summary: str, entries: List[Dict[str, str]]):
+        """Queue a chat's current history for the next batched write."""
+        self._queue(chat_id, (summary, list(entries)))
+
+    def queue_delete(self, chat_id: int):
+        """Queue removal of a chat's history."""
+        self._queue(chat_id, None)
+
+    async def flush(self):
+        """Write everything queued so far."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except (Exception, asyncio.CancelledError) as e:
+            # Keep the batch (unless newer state was queued meanwhile) for the next attempt;
+            # rewriting a batch that did land is harmless
+            for chat_id, snapshot in batch.items():
+                self._pending.setdefault(chat_id, snapshot)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            logger.error(f"History store: failed to write {len(batch)} chat(s): {e}")
+
+    async def close(self):
+        """Flush pending writes, stop the writer and close the database."""
+        if self._writer:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        await self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def _queue(self, chat_id: int, snapshot: Snapshot):
+        self._pending[chat_id] = snapshot
+        if self._writer is None:
+            self._wakeup = asyncio.Event()
+            self._writer = asyncio.create_task(self._write_loop())
+        self._wakeup.set()
+
+    async def _write_loop(self):
+        """Flush queued snapshots at most once per flush interval."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await self.flush()
+            await asyncio.sleep(self.flush_interval)
+
+    def _load(self, chat_id: int) -> Snapshot:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, entries FROM chat_history WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _write(self, batch: Dict[int, Snapshot]):
+        now = time.time()
+        saves = [
+            (chat_id, snapshot[0], json.dumps(snapshot[1], ensure_ascii=False), now)
+            for chat_id, snapshot in batch.items()
+            if snapshot is not None
+        ]
+        deletes = [(chat_id,) for chat_id, snapshot in batch.items() if snapshot is None]
+        with self._lock, self._conn:
+            if saves:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chat_history (chat_id, summary, entries, updated_at) VALUES (?, ?, ?, ?)",
+                    saves,
+                )
+            if deletes:
+                self._conn.executemany("DELETE FROM chat_history WHERE chat_id = ?", deletes)
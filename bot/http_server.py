@@ -0,0 +1,179 @@
+"""
+Minimal embedded HTTP server for inbound webhooks and local endpoints.
+
+Built directly on asyncio streams so it runs inside the bot's event loop
+without extra dependencies. Supports what webhook senders need: routing by
+method and path, Content-Length bodies, and keep-alive connections.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADER_LINES = 100
+READ_TIMEOUT = 30  # seconds
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    202: "Accepted",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class Request:
+    """An inbound HTTP request."""
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes, peer: Any = None):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers  # lowercase names
+        self.body = body
+        self.peer = peer
+
+    def json(self) -> Any:
+        """Parse the body as JSON (raises ValueError if it isn't)."""
+        return json.loads(self.body or b"null")
+
+
+class Response:
+    """An HTTP response to send back."""
+
+    def __init__(self, status: int = 200, body: Any = b"", content_type: str = "text/plain; charset=utf-8"):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+            content_type = "application/json"
+        self.status = status
+        self.body = body.encode() if isinstance(body, str) else body
+        self.content_type = content_type
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class HttpServer:
+    """Routes requests by (method, path) to async handlers."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._routes: Dict[Tuple[str, str], Handler] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    def route(self, method: str, path: str, handler: Handler):
+        """Register a handler for a method and exact path."""
+        self._routes[(method.upper(), path)] = handler
+
+    async def start(self):
+        """Start listening (no-op if already running)."""
+        if self._server is not None:
+            return
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        routes = ", ".join(f"{method} {path}" for method, path in self._routes)
+        logger.info(f"HTTP server listening on {self.host}:{self.port} ({routes})")
+
+    async def stop(self):
+        """Stop accepting connections, close open (keep-alive) ones and the listener."""
+        if self._server:
+            self._server.close()
+            connections = dict(self._connections)
+            for writer in connections.values():
+                writer.close()
+            await asyncio.gather(*connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                request = await asyncio.wait_for(self._read_request(reader, peer), READ_TIMEOUT)
+                if request is None:
+                    break
+                if isinstance(request, Response):
+                    await self._write_response(writer, request, keep_alive=False)
+                    break
+
+                response = await self._dispatch(request)
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.pop(asyncio.current_task(), None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader, peer):
+        """Read one request; returns None on clean EOF or a Response for malformed input."""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return Response(400, "Malformed request line\n")
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = (await reader.readline()).decode("latin-1").rstrip("\r\n")
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            return Response(400, "Too many headers\n")
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            return Response(400, "Invalid Content-Length\n")
+        if length > MAX_BODY_BYTES:
+            return Response(413, "Body too large\n")
+        body = await reader.readexactly(length) if length else b""
+
+        return Request(method.upper(), target, headers, body, peer)
+
+    async def _dispatch(self, request: Request) -> Response:
+        handler = self._routes.get((request.method, request.path))
+        if handler is None:
+            if any(path == request.path for _, path in self._routes):
+                return Response(405, "Method not allowed\n")
+            return Response(404, "Not found\n")
+        try:
+            return await handler(request)
+        except Exception as e:
+            logger.error(f"HTTP handler for {request.method} {request.path} failed: {e}", exc_info=True)
+            return Response(500, "Internal error\n")
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, response: Response, keep_alive: bool):
+        head = (
+            f"HTTP/1.1 {response.status} {REASONS.get(response.status, '')}\r\n"
+            f"Content-Type: {response.content_type}\r\n"
+            f"Content-Length: {len(response.body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + response.body)
+        await writer.drain()
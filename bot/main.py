@@ -1,12 +1,18 @@
 """Blackbeard - AI media server manager. Telegram bot entry point."""
 
 import asyncio
+import hmac
 import logging
+import secrets
+import time
 from pathlib import Path
 from datetime import datetime
-from telegram import Update
+from typing import Optional, Tuple
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.error import BadRequest
 from telegram.ext import (
     Application,
+    CallbackQueryHandler,
     CommandHandler,
     MessageHandler,
     filters,
@@ -14,12 +20,68 @@ from telegram.ext import (
 )
 from telegram.request import HTTPXRequest
 
-from bot.config import TELEGRAM_BOT_TOKEN, ALLOWED_USER_IDS, validate_config, PROJECT_ROOT
+from bot.config import (
+    TELEGRAM_BOT_TOKEN,
+    ALLOWED_USER_IDS,
+    MAX_CONCURRENT_JOBS,
+    MAX_QUEUED_JOBS_PER_CHAT,
+    MAX_QUEUED_JOBS,
+    STREAM_RESPONSES,
+    STREAM_EDIT_INTERVAL,
+    PROGRESS_EDIT_INTERVAL,
+    CATALOG_REFRESH_INTERVAL,
+    QBT_SYNC_ENABLED,
+    HISTORY_TOKEN_BUDGET,
+    HISTORY_SUMMARY_TOKENS,
+    HISTORY_KEEP_EXCHANGES,
+    HISTORY_ENTRY_MAX_TOKENS,
+    HISTORY_DB_PATH,
+    HISTORY_CACHE_CHATS,
+    HISTORY_FLUSH_INTERVAL,
+    HTTP_LISTEN,
+    HTTP_PORT,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    METRICS_ENABLED,
+    METRICS_TOKEN,
+    ARR_WEBHOOK_SECRET,
+    ARR_WEBHOOK_PATH,
+    ADMIN_USER_IDS,
+    TRACE_ENABLED,
+    TRACE_DIR,
+    LOG_DIR,
+    validate_config,
+)
 from bot.agent import create_agent
+from bot.arr_events import get_arr_events
+from bot.catalog import get_catalog
+from bot.history import HistoryManager
+from bot.history_store import HistoryStore
+from bot.http_server import HttpServer, Request, Response
+from bot.metrics import REGISTRY
+from bot.quick import (
+    QuickError,
+    disk_usage,
+    find_titles,
+    format_disk,
+    format_downloads,
+    format_find,
+    format_missing,
+    missing_episodes,
+    missing_page_count,
+    page_count,
+    torrent_list,
+)
+from bot.scheduler import Job, JobScheduler, SchedulerFull
+from bot.streaming import ProgressRenderer, TelegramStreamWriter, chunk_message
+from bot.tools.service_client import get_service_client
+from bot.torrents import get_torrent_tracker
+from bot.tracing import Tracer, render_waterfall, span
+from bot.webhook import run_webhook
 
 # Configure logging to both file and console
-LOG_DIR = PROJECT_ROOT / "logs"
-LOG_DIR.mkdir(exist_ok=True)
+LOG_DIR.mkdir(parents=True, exist_ok=True)
 
 log_file = LOG_DIR / f"bot_{datetime.now().strftime('%Y%m%d')}.log"
 
@@ -40,47 +102,19 @@ conversation_handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s")
 conversation_logger.addHandler(conversation_handler)
 conversation_logger.setLevel(logging.INFO)
 
-# Global agent instance and processing state
+# Global agent instance, job scheduler and conversation history
+# (token-budgeted per chat, older exchanges folded into a summary, persisted)
 agent = None
-processing_interrupted = False
-
-# Conversation history per user (limited to last N messages)
-conversation_history = {}
-MAX_HISTORY_MESSAGES = 10  # Keep last 10 exchanges (20 messages total)
-MAX_MESSAGE_LENGTH = 8000  # Truncate messages longer than this
-
-
-def truncate_message(content: str, max_length: int = MAX_MESSAGE_LENGTH) -> str:
-    """Truncate long messages to prevent context overflow."""
-    if len(content) <= max_length:
-        return content
-    return content[:max_length] + f"\n\n[... truncated {len(content) - max_length} characters]"
-
-
-TELEGRAM_MAX_LENGTH = 4096
+scheduler = None
+history_manager = None
+http_server = None  # embedded HTTP server, when webhook mode or metrics need one
+tracer = Tracer(TRACE_ENABLED, TRACE_DIR)
 
+# Update types the handlers below actually consume (messages and commands, page buttons)
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
 
-def chunk_message(text: str, max_length: int = TELEGRAM_MAX_LENGTH) -> list[str]:
-    """Split a long message into Telegram-safe chunks, breaking at newlines."""
-    if len(text) <= max_length:
-        return [text]
-
-    chunks = []
-    while text:
-        if len(text) <= max_length:
-            chunks.append(text)
-            break
-
-        # Find a newline to break at within the limit
-        split_at = text.rfind("\n", 0, max_length)
-        if split_at == -1 or split_at < max_length // 2:
-            # No good newline break — hard split at limit
-            split_at = max_length
-
-        chunks.append(text[:split_at])
-        text = text[split_at:].lstrip("\n")
-
-    return chunks
+# Telegram caps inline button callback data at 64 bytes
+MAX_CALLBACK_DATA = 64
 
 
 def is_authorized(update: Update) -> bool:
@@ -125,6 +159,13 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 /help - This help message
 /status - Check bot status
 /stop - Interrupt current task
+/trace - Timing breakdown of your last request
+
+**Instant (no AI, under a second):**
+/downloads [filter] - Torrents (downloading, completed, stalled, seeding, ...)
+/disk - Free space on the media and downloads drives
+/missing <series> - Missing episodes by season
+/find <title> - Look a title up in the TV and movie libraries
 
 **How to use:**
 Just send me messages naturally! I understand requests like:
@@ -163,20 +204,74 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Unauthorized user.")
         return
 
-    await update.message.reply_text("🏴‍☠️ Blackbeard is online and ready.")
+    status = (
+        "🏴‍☠️ Blackbeard is online and ready.\n"
+        f"Tasks running: {scheduler.running_count}/{scheduler.max_concurrent}, "
+        f"queued: {scheduler.queued_count}"
+    )
+
+    cache = get_service_client().cache
+    if cache:
+        stats = cache.stats()
+        status += (
+            f"\nAPI cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['coalesced']} shared ({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries)"
+        )
+
+    await update.message.reply_text(status)
 
 
 async def stop_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle /stop command - interrupt current processing."""
-    global processing_interrupted
+    """Handle /stop command - cancel this chat's running and queued tasks."""
+    if not is_authorized(update):
+        await update.message.reply_text("Unauthorized user.")
+        return
+
+    chat_id = update.effective_chat.id
+    cancelled = scheduler.cancel_chat(chat_id)
+    logger.info(f"Stop command received for chat {chat_id} - cancelled {cancelled} job(s)")
+    if cancelled:
+        await update.message.reply_text("⏹️ Stopping current task...")
+    else:
+        await update.message.reply_text("Nothing to stop.")
+
+
+async def metrics_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /metrics command - latency, token and error summary (admins only)."""
+    if update.effective_user.id not in ADMIN_USER_IDS:
+        await update.message.reply_text("Unauthorized user.")
+        return
+
+    for chunk in chunk_message(f"📊 Metrics since start\n\n{REGISTRY.summary()}"):
+        await update.message.reply_text(chunk)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Serve metrics in the Prometheus text format (bearer METRICS_TOKEN required if set)."""
+    if METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", "").encode(), f"Bearer {METRICS_TOKEN}".encode()
+    ):
+        logger.warning(f"Rejected /metrics request without a valid token from {request.peer}")
+        return Response(401, "Unauthorized\n")
+    return Response(200, REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
+
+async def trace_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /trace command - waterfall of the last request in this chat."""
     if not is_authorized(update):
         await update.message.reply_text("Unauthorized user.")
         return
 
-    processing_interrupted = True
-    logger.info("Stop command received - interrupting agent processing")
-    await update.message.reply_text("⏹️ Stopping current task...")
+    if not tracer.enabled:
+        await update.message.reply_text("Tracing is disabled (set TRACE_ENABLED=true).")
+        return
+
+    trace = tracer.last.get(update.effective_chat.id)
+    if trace is None:
+        await update.message.reply_text("No trace yet — send me a request first.")
+        return
+
+    await update.message.reply_text(render_waterfall(trace), parse_mode="HTML")
 
 
 async def clear_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -185,19 +280,143 @@ async def clear_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Unauthorized user.")
         return
 
-    user_id = update.effective_user.id
-    if user_id in conversation_history:
-        conversation_history[user_id] = []
-        logger.info(f"Cleared conversation history for user {user_id}")
+    chat_id = update.effective_chat.id
+    if await history_manager.clear(chat_id):
+        logger.info(f"Cleared conversation history for chat {chat_id}")
         await update.message.reply_text("🗑️ Conversation history cleared.")
     else:
         await update.message.reply_text("No conversation history to clear.")
 
 
-async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle incoming messages."""
-    global processing_interrupted, conversation_history
+def _page_keyboard(view: str, arg: str, page: int, pages: int) -> Optional[InlineKeyboardMarkup]:
+    """Prev / refresh / next buttons for a paged view (none for a single page)."""
+    if pages <= 1 and view != "dl":
+        return None
+
+    def data(target: int) -> str:
+        prefix = f"{view}:{target}:"
+        # Trim the argument (a search term) to fit the callback data limit
+        budget = MAX_CALLBACK_DATA - len(prefix.encode())
+        return prefix + arg.encode()[:budget].decode(errors="ignore")
+
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton("◀ Prev", callback_data=data(page - 1)))
+    buttons.append(InlineKeyboardButton(f"↻ {page + 1}/{pages}", callback_data=data(page)))
+    if page + 1 < pages:
+        buttons.append(InlineKeyboardButton("Next ▶", callback_data=data(page + 1)))
+    return InlineKeyboardMarkup([buttons])
+
+
+async def _downloads_view(state_filter: str, page: int) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+    torrents = await torrent_list(state_filter)
+    pages = page_count(len(torrents))
+    page = min(page, pages - 1)
+    return format_downloads(torrents, state_filter, page), _page_keyboard("dl", state_filter, page, pages)
+
+
+async def _missing_view(series: str, page: int) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+    record, episodes = await missing_episodes(series)
+    pages = missing_page_count(episodes)
+    page = min(page, pages - 1)
+    # Page buttons carry the series ID so later pages don't depend on the search
+    return format_missing(record, episodes, page), _page_keyboard("ms", str(record["id"]), page, pages)
+
+
+async def _find_view(term: str, page: int) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+    items = await find_titles(term)
+    pages = page_count(len(items))
+    page = min(page, pages - 1)
+    return format_find(term, items, page), _page_keyboard("fd", term, page, pages)
+
+
+# Paged views by callback prefix, rendered straight from the service layer (no agent, no tokens)
+PAGED_VIEWS = {"dl": _downloads_view, "ms": _missing_view, "fd": _find_view}
+
+
+async def _reply_view(update: Update, view: str, arg: str):
+    """Render page 1 of a view as a reply."""
+    started = time.monotonic()
+    try:
+        text, keyboard = await PAGED_VIEWS[view](arg, 0)
+    except QuickError as e:
+        await update.message.reply_text(f"⚠️ {e}")
+        return
+    await update.message.reply_text(text, reply_markup=keyboard)
+    logger.info(f"/{update.message.text.split()[0].lstrip('/')} answered in {time.monotonic() - started:.2f}s")
+
+
+async def downloads_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /downloads [filter] - torrent list from the live table."""
+    if not is_authorized(update):
+        await update.message.reply_text("Unauthorized user.")
+        return
+
+    await _reply_view(update, "dl", context.args[0].lower() if context.args else "all")
+
 
+async def disk_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /disk - free space on MEDIA_ROOT and DOWNLOADS_DIR."""
+    if not is_authorized(update):
+        await update.message.reply_text("Unauthorized user.")
+        return
+
+    await update.message.reply_text(format_disk(await disk_usage()))
+
+
+async def missing_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /missing <series> - missing monitored episodes by season."""
+    if not is_authorized(update):
+        await update.message.reply_text("Unauthorized user.")
+        return
+
+    if not context.args:
+        await update.message.reply_text("Usage: /missing <series title or ID>")
+        return
+    await _reply_view(update, "ms", " ".join(context.args))
+
+
+async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /find <title> - search the TV and movie libraries together."""
+    if not is_authorized(update):
+        await update.message.reply_text("Unauthorized user.")
+        return
+
+    if not context.args:
+        await update.message.reply_text("Usage: /find <title>")
+        return
+    await _reply_view(update, "fd", " ".join(context.args))
+
+
+async def page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle page buttons: re-render the view's requested page in place."""
+    query = update.callback_query
+    if not is_authorized(update):
+        await query.answer("Unauthorized user.")
+        return
+
+    view, _, rest = (query.data or "").partition(":")
+    page, _, arg = rest.partition(":")
+    if view not in PAGED_VIEWS or not page.isdigit():
+        await query.answer()
+        return
+
+    try:
+        text, keyboard = await PAGED_VIEWS[view](arg, int(page))
+    except QuickError as e:
+        await query.answer(str(e)[:200], show_alert=True)
+        return
+    await query.answer()
+    try:
+        await query.edit_message_text(text, reply_markup=keyboard)
+    except BadRequest as e:
+        # Refreshing a page that hasn't changed
+        if "not modified" not in str(e).lower():
+            raise
+
+
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle incoming messages by queueing an agent job for the chat."""
     # Check authorization
     if not is_authorized(update):
         logger.warning(
@@ -207,26 +426,41 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Unauthorized user.")
         return
 
-    user_id = update.effective_user.id
+    chat_id = update.effective_chat.id
     user_message = update.message.text
     username = update.effective_user.username or update.effective_user.first_name
 
     logger.info(f"User {username}: {user_message}")
     conversation_logger.info(f"USER [{username}]: {user_message}")
 
-    # Initialize conversation history for this user if needed
-    if user_id not in conversation_history:
-        conversation_history[user_id] = []
+    async def run_job(job: Job):
+        await process_request(update, user_message, job)
+
+    try:
+        job = scheduler.submit(chat_id, run_job, label=user_message)
+    except SchedulerFull as e:
+        logger.warning(f"Rejected message from chat {chat_id}: {e}")
+        await update.message.reply_text(f"🚦 {e}")
+        return
+
+    position = scheduler.position(job)
+    if position:
+        await update.message.reply_text(
+            f"📥 Queued — you're #{position} in line. I'll start as soon as a slot frees up."
+        )
+
 
-    # Reset interrupt flag
-    processing_interrupted = False
+async def process_request(update: Update, user_message: str, job: Job):
+    """Run the agent for one queued message and deliver the response."""
+    chat_id = job.chat_id
 
     try:
         # Send initial progress message
         progress_message = await update.message.reply_text("⏳ Working on your request...")
+        progress = ProgressRenderer(progress_message, PROGRESS_EDIT_INTERVAL)
 
-        # Get recent conversation history
-        history = conversation_history[user_id]
+        # Get recent conversation history (rolling summary + recent exchanges)
+        history = await history_manager.messages(chat_id)
 
         # Track progress actions
         actions = []
@@ -262,37 +496,42 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
             progress_text = "\n".join(lines) if lines else "⏳ Working on your request..."
 
-            # Schedule message edit (runs async without blocking agent)
-            try:
-                loop = asyncio.get_running_loop()
-                loop.create_task(progress_message.edit_text(progress_text))
-            except Exception as e:
-                logger.warning(f"Failed to update progress message: {e}")
-
-        # Process message with agent (with history and progress callback)
-        result = agent.process_message(
-            user_message,
-            conversation_history=history,
-            interrupt_flag=lambda: processing_interrupted,
-            progress_callback=progress_callback
-        )
-
-        response = result["response"]
-        tool_log = result["tool_log"]
+            # Coalesced, rate-limited edit (never blocks the agent)
+            progress.update(progress_text)
 
-        # Check if interrupted
-        if processing_interrupted:
-            response = "⏹️ Task interrupted."
-            processing_interrupted = False
+        # Stream the answer into a live message as it's generated
+        text_stream = TelegramStreamWriter(update.message, STREAM_EDIT_INTERVAL) if STREAM_RESPONSES else None
 
-        # Send final response as NEW message (don't edit progress message)
-        # Telegram limits messages to 4096 chars — chunk if needed
-        if len(response) <= 4096:
-            await update.message.reply_text(response)
-        else:
-            chunks = chunk_message(response)
-            for chunk in chunks:
-                await update.message.reply_text(chunk)
+        # Trace the whole run (LLM turns, tools, subprocesses) for /trace
+        async with tracer.record(chat_id, user_message):
+            # Process message with agent (with history and progress callback)
+            try:
+                result = await agent.process_message(
+                    user_message,
+                    conversation_history=history,
+                    cancel_token=job.token,
+                    progress_callback=progress_callback,
+                    text_stream=text_stream,
+                )
+            finally:
+                # Final progress state lands before the answer; no edits outlive the request
+                await progress.finish()
+
+            response = result["response"]
+            tool_log = result["tool_log"]
+
+            # Check if interrupted
+            if result["interrupted"]:
+                response = "⏹️ Task interrupted."
+
+            # Send final response as NEW message (don't edit progress message).
+            # When streaming, the live message already holds it — just finalize.
+            with span("deliver", chars=len(response)):
+                delivered = text_stream is not None and await text_stream.finish(response)
+                if not delivered:
+                    # Telegram limits messages to 4096 chars — chunk if needed
+                    for chunk in chunk_message(response):
+                        await update.message.reply_text(chunk)
 
         # Build history entry with tool log for procedural memory
         assistant_entry = response
@@ -303,14 +542,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             assistant_entry = f"[Actions: {actions_summary}]\n\n{response}"
 
-        # Update conversation history (truncate long messages to prevent context overflow)
-        history.append({"role": "user", "content": truncate_message(user_message)})
-        history.append({"role": "assistant", "content": truncate_message(assistant_entry)})
-
-        # Trim history if too long (keep last N exchanges = 2N messages)
-        if len(history) > MAX_HISTORY_MESSAGES * 2:
-            history = history[-(MAX_HISTORY_MESSAGES * 2):]
-            conversation_history[user_id] = history
+        # Update conversation history (older exchanges get summarized in the background)
+        await history_manager.append_exchange(chat_id, user_message, assistant_entry)
 
         logger.info(f"Bot response: {response[:100]}...")
         conversation_logger.info(f"BOT: {response}")
@@ -324,6 +557,36 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+async def on_startup(application: Application):
+    """Start the library catalog and torrent syncs and keep them current with the bot's own mutations."""
+    catalog = get_catalog()
+    get_service_client().mutation_listeners.append(catalog.on_mutation)
+    catalog.start(CATALOG_REFRESH_INTERVAL)
+
+    if QBT_SYNC_ENABLED:
+        tracker = get_torrent_tracker()
+        tracker.notifier = lambda chat_id, text: application.bot.send_message(chat_id=chat_id, text=text)
+        get_service_client().mutation_listeners.append(tracker.on_mutation)
+        tracker.start()
+
+    receiver = get_arr_events()
+    if receiver:
+        receiver.notifier = lambda chat_id, text: application.bot.send_message(chat_id=chat_id, text=text)
+    if http_server:
+        await http_server.start()
+
+
+async def on_shutdown(application: Application):
+    """Stop background work and release pooled service connections."""
+    if http_server:
+        await http_server.stop()
+    await get_torrent_tracker().stop()
+    await get_catalog().stop()
+    await get_service_client().aclose()
+    if history_manager.store:
+        await history_manager.store.close()
+
+
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle errors."""
     logger.error(f"Update {update} caused error {context.error}", exc_info=context.error)
@@ -331,7 +594,7 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 def main():
     """Start the bot."""
-    global agent
+    global agent, scheduler, history_manager, http_server
 
     # Validate configuration
     if not validate_config():
@@ -342,7 +605,24 @@ def main():
     agent = create_agent()
     logger.info(f"Agent initialized with model: {agent.model}")
 
-    # Create Telegram application with generous timeouts for home server
+    scheduler = JobScheduler(
+        max_concurrent=MAX_CONCURRENT_JOBS,
+        max_queued_per_chat=MAX_QUEUED_JOBS_PER_CHAT,
+        max_queued_total=MAX_QUEUED_JOBS,
+    )
+
+    history_manager = HistoryManager(
+        budget_tokens=HISTORY_TOKEN_BUDGET,
+        summary_tokens=HISTORY_SUMMARY_TOKENS,
+        keep_exchanges=HISTORY_KEEP_EXCHANGES,
+        entry_max_tokens=HISTORY_ENTRY_MAX_TOKENS,
+        store=HistoryStore(HISTORY_DB_PATH, HISTORY_FLUSH_INTERVAL) if HISTORY_DB_PATH else None,
+        max_cached_chats=HISTORY_CACHE_CHATS,
+    )
+
+    # Create Telegram application with generous timeouts for home server.
+    # Updates are handled concurrently so a long agent task doesn't block
+    # /stop or messages from other users.
     logger.info("Starting Telegram bot...")
     request = HTTPXRequest(
         connect_timeout=20.0,
@@ -354,6 +634,9 @@ def main():
         Application.builder()
         .token(TELEGRAM_BOT_TOKEN)
         .request(request)
+        .concurrent_updates(True)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
         .build()
     )
 
@@ -363,14 +646,39 @@ def main():
     application.add_handler(CommandHandler("status", status_command))
     application.add_handler(CommandHandler("stop", stop_command))
     application.add_handler(CommandHandler("clear", clear_command))
+    application.add_handler(CommandHandler("metrics", metrics_command))
+    application.add_handler(CommandHandler("trace", trace_command))
+    application.add_handler(CommandHandler("downloads", downloads_command))
+    application.add_handler(CommandHandler("disk", disk_command))
+    application.add_handler(CommandHandler("missing", missing_command))
+    application.add_handler(CommandHandler("find", find_command))
+    application.add_handler(CallbackQueryHandler(page_callback, pattern=r"^(dl|ms|fd):"))
     application.add_handler(
         MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
     )
     application.add_error_handler(error_handler)
 
-    # Start polling
-    logger.info("Bot is running! Press Ctrl+C to stop.")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    # Embedded HTTP server (started in on_startup) for webhooks and metrics
+    if WEBHOOK_URL or METRICS_ENABLED or ARR_WEBHOOK_SECRET:
+        http_server = HttpServer(HTTP_LISTEN, HTTP_PORT)
+    if METRICS_ENABLED:
+        http_server.route("GET", "/metrics", metrics_endpoint)
+        if not METRICS_TOKEN and HTTP_LISTEN not in ("127.0.0.1", "localhost", "::1"):
+            logger.warning(f"/metrics on {HTTP_LISTEN}:{HTTP_PORT} is open to anyone who can reach it; set METRICS_TOKEN")
+    if ARR_WEBHOOK_SECRET:
+        for service in ("sonarr", "radarr"):
+            http_server.route("POST", f"{ARR_WEBHOOK_PATH}/{service}", get_arr_events().handler(service))
+        logger.info(f"Accepting Sonarr/Radarr webhooks on {HTTP_LISTEN}:{HTTP_PORT}{ARR_WEBHOOK_PATH}/<service>")
+
+    if WEBHOOK_URL:
+        # Webhook mode: Telegram POSTs updates to the embedded HTTP server
+        logger.info(f"Bot is running in webhook mode on {HTTP_LISTEN}:{HTTP_PORT}{WEBHOOK_PATH}")
+        secret = WEBHOOK_SECRET or secrets.token_urlsafe(32)
+        asyncio.run(run_webhook(application, http_server, WEBHOOK_URL, WEBHOOK_PATH, secret, ALLOWED_UPDATES))
+    else:
+        # Start polling
+        logger.info("Bot is running! Press Ctrl+C to stop.")
+        application.run_polling(allowed_updates=ALLOWED_UPDATES)
 
 
 if __name__ == "__main__":
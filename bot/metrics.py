@@ -0,0 +1,220 @@
+"""
+In-process metrics: counters and latency histograms.
+
+Rendered in the Prometheus text exposition format for scraping, and as a
+compact summary for the /metrics Telegram command. Implemented here rather
+than with prometheus_client to avoid a dependency for a handful of series.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TURN_BUCKETS = (1, 2, 3, 4, 5, 8, 12, 16, 20)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Base for labelled metrics."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+            for key, value in sorted(self.values().items())
+        ]
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, List[float]] = {}  # bucket counts..., sum, count
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 2))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block in seconds."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def series(self) -> Dict[LabelValues, List[float]]:
+        with self._lock:
+            return {key: list(values) for key, values in self._series.items()}
+
+    def quantile(self, q: float, values: List[float]) -> float:
+        """Estimate a quantile from bucket counts (linear within the bucket)."""
+        count = values[-1]
+        if not count:
+            return 0.0
+        rank = q * count
+        lower, previous = 0.0, 0
+        for index, bound in enumerate(self.buckets):
+            cumulative = values[index]
+            if cumulative >= rank:
+                if bound == math.inf:
+                    return lower
+                in_bucket = cumulative - previous
+                fraction = (rank - previous) / in_bucket if in_bucket else 0
+                return lower + (bound - lower) * fraction
+            lower, previous = bound, cumulative
+        return lower
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, values in sorted(self.series().items()):
+            for index, bound in enumerate(self.buckets):
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_number(values[index])}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(values[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_number(values[-1])}")
+        return lines
+
+
+class Registry:
+    """Holds every metric and renders them."""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Compact human-readable summary (counts, p50/p95 and totals)."""
+        lines = []
+        for metric in self.metrics:
+            if isinstance(metric, Histogram):
+                for key, values in sorted(metric.series().items()):
+                    count = int(values[-1])
+                    if not count:
+                        continue
+                    label = "/".join(key)
+                    lines.append(
+                        f"{metric.name.removeprefix('blackbeard_')}{f' [{label}]' if label else ''}: "
+                        f"n={count} avg={values[-2] / count:.2f} "
+                        f"p50={metric.quantile(0.5, values):.2f} p95={metric.quantile(0.95, values):.2f}"
+                    )
+            else:
+                for key, value in sorted(metric.values().items()):
+                    label = "/".join(key)
+                    lines.append(f"{metric.name.removeprefix('blackbeard_')}{f' [{label}]' if label else ''}: {value:,.0f}")
+        return "\n".join(lines) if lines else "No metrics recorded yet."
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter("blackbeard_requests_total", "User requests handled by the agent", ["outcome"])
+REQUEST_SECONDS = REGISTRY.histogram("blackbeard_request_seconds", "End-to-end agent time per request")
+REQUEST_TURNS = REGISTRY.histogram("blackbeard_request_turns", "Orchestrator turns per request", buckets=TURN_BUCKETS)
+ROUTES = REGISTRY.counter("blackbeard_routes_total", "Routing decisions by tier and reason", ["tier", "reason"])
+ROUTE_ESCALATIONS = REGISTRY.counter("blackbeard_route_escalations_total", "Requests handed up to the orchestrator", ["cause"])
+ROUTE_SECONDS = REGISTRY.histogram("blackbeard_route_request_seconds", "End-to-end agent time per request by answering tier", ["tier"])
+QUEUE_WAIT_SECONDS = REGISTRY.histogram("blackbeard_queue_wait_seconds", "Time requests wait for a job slot")
+
+ORCHESTRATOR_SECONDS = REGISTRY.histogram("blackbeard_orchestrator_call_seconds", "Orchestrator API call latency", ["model"])
+EXECUTOR_SECONDS = REGISTRY.histogram("blackbeard_executor_call_seconds", "Executor API call latency", ["model"])
+TOKENS = REGISTRY.counter("blackbeard_tokens_total", "API tokens by model and kind (input, output, cache_read, cache_write)", ["model", "kind"])
+
+TOOL_CALLS = REGISTRY.counter("blackbeard_tool_calls_total", "Tool calls by tool and outcome", ["tool", "outcome"])
+TOOL_SECONDS = REGISTRY.histogram("blackbeard_tool_seconds", "Tool call latency", ["tool"])
+SUBPROCESS_SECONDS = REGISTRY.histogram("blackbeard_subprocess_seconds", "Shell subprocess run time", ["command"])
+PREFETCHES = REGISTRY.counter("blackbeard_prefetch_total", "Speculative lookups by outcome (used, attached, unused)", ["outcome"])
+SERVICE_REQUEST_SECONDS = REGISTRY.histogram("blackbeard_service_request_seconds", "Upstream service API latency", ["service", "outcome"])
+
+
+def record_usage(model: str, usage):
+    """Count tokens from an API response's usage block."""
+    if usage is None:
+        return
+    TOKENS.inc(usage.input_tokens, model=model, kind="input")
+    TOKENS.inc(usage.output_tokens, model=model, kind="output")
+    TOKENS.inc(getattr(usage, "cache_read_input_tokens", 0) or 0, model=model, kind="cache_read")
+    TOKENS.inc(getattr(usage, "cache_creation_input_tokens", 0) or 0, model=model, kind="cache_write")
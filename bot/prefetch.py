@@ -0,0 +1,262 @@
+"""
+Speculative prefetch: start the obvious lookups before the orchestrator asks.
+
+Most requests begin with the orchestrator spending a whole round-trip to
+decide to run `sonarr-find`, `radarr-find`, `qbt-status` or `df`. A few
+local rules pick titles and status questions out of the message and start
+those read-only commands while the first orchestrator call is in flight:
+
+- a first-turn tool call for the same command takes the prefetched output
+  instead of running it again, and
+- successful results nobody asked for are attached to the second turn as
+  context, so a follow-up lookup can be skipped.
+
+Whatever is left after the second turn is cancelled. If the lookup tier
+hands a request over to the orchestrator, the orchestrator's run is
+offered the same results again (see Prefetch.release).
+"""
+
+import asyncio
+import logging
+import re
+import shlex
+from typing import Dict, List, Optional, Set, Tuple
+
+from bot.metrics import PREFETCHES
+from bot.tracing import span
+
+logger = logging.getLogger(__name__)
+
+MAX_TITLES = 2  # title guesses looked up per message
+PREFETCH_TIMEOUT = 10  # seconds
+MAX_CONTEXT_CHARS = 3000  # prefetched output attached to the second turn, in total
+
+STATUS_WORDS = re.compile(r"\b(downloading|downloads|torrents?|progress|eta|seeding|stalled)\b", re.I)
+DISK_WORDS = re.compile(r"\b(disk|space|storage|drive)\b", re.I)
+MOVIE_WORDS = re.compile(r"\b(movies?|films?)\b", re.I)
+SERIES_WORDS = re.compile(r"\b(shows?|series|seasons?|episodes?|s\d{1,2}(e\d{1,3})?)\b", re.I)
+
+QUOTED = re.compile(r"[\"“”]([^\"“”]{2,80})[\"“”]")
+CLAUSE = re.compile(r"[^,.;!?\n]+")
+LEAD_IN = re.compile(
+    r"^(?:(?:hey|please|pls|can you|could you|would you|will you|i want to|i'd like to)\s+)*"
+    r"(?:download|add|get|grab|find|search for|search|look up|lookup|queue up|queue|request|do we have|do i have|have we got)\s+"
+    r"(?:me\s+)?(?:the\s+)?(?:(?:movie|film|show|series|tv show)\s+)?(?P<title>.+)$",
+    re.I,
+)
+STATUS_OF = re.compile(
+    r"^(?:is|are|did|has|have)\s+(?P<title>.+?)\s+(?:downloaded|downloading|done|ready|finished|available|in plex|on plex|there)\b",
+    re.I,
+)
+QUALIFIER = re.compile(
+    r"\s+(?:season|seasons|s\d{1,2}\b|episode|episodes|ep\b|in\s+\d{3,4}p|in\s+4k|4k|\d{3,4}p|to\s+(?:my|the)\s+(?:library|list|queue)|(?:to|in|on)\s+plex|please|pls|for me|too|as well|again|yet|now)\b.*$",
+    re.I,
+)
+CONNECTORS = {"of", "the", "and", "a", "an", "in", "on", "to", "&", "-", "vs", "at", "for"}
+STOPWORDS = CONNECTORS | {
+    "i", "i'm", "i'd", "am", "can", "could", "would", "will", "you", "please", "pls", "what", "what's", "whats",
+    "is", "are", "was", "do", "does", "did", "we", "have", "has", "how", "much", "many", "when", "where",
+    "why", "which", "who", "hey", "hi", "ok", "okay", "yes", "no", "or", "my", "me", "it", "it's", "that",
+    "this", "there", "any", "some", "download", "add", "get", "grab", "find", "search", "check", "show",
+    "list", "tell", "start", "stop", "delete", "remove", "thanks", "also", "then", "now", "blackbeard",
+    "plex", "sonarr", "radarr", "qbittorrent", "qbt", "telegram", "tv", "movie", "movies", "season", "episode",
+}
+
+
+def _clean_title(title: str) -> Optional[str]:
+    """Trim qualifiers ('season 2', 'in 4k') and filler from a title guess."""
+    title = QUALIFIER.sub("", title.strip(" \"'“”"))
+    words = title.split()
+    while words and words[0].lower() in STOPWORDS:
+        words.pop(0)
+    while words and words[-1].lower() in CONNECTORS:
+        words.pop()
+    if not words or all(word.lower() in STOPWORDS for word in words):
+        return None
+    title = " ".join(words)
+    return title if len(title) >= 3 else None
+
+
+def _title_case_runs(clause: str) -> List[str]:
+    """
+    Runs of capitalized words (with connectors between them): 'Breaking Bad', 'Lord of the Rings'.
+
+    A clause's first word only starts a run on its own if the next word is
+    capitalized too, since it is usually capitalized just for starting the sentence.
+    """
+    runs, current = [], []
+    words = clause.split()
+    for index, word in enumerate(words):
+        bare = word.strip("\"'“”()")
+        capitalized = bare[:1].isupper() or bare[:1].isdigit()
+        next_capitalized = index + 1 < len(words) and words[index + 1][:1].isupper()
+        if index == 0 and len(words) > 1 and not next_capitalized:
+            continue
+        if capitalized or (current and bare.lower() in CONNECTORS and next_capitalized):
+            current.append(bare)
+        elif current:
+            runs.append(" ".join(current))
+            current = []
+    if current:
+        runs.append(" ".join(current))
+    return runs
+
+
+def extract_titles(message: str) -> List[str]:
+    """Guess the titles a message is about, best guesses first."""
+    # Quoted titles are explicit; otherwise fall back to phrasing and capitalization
+    guesses = QUOTED.findall(message)
+    for clause in [] if guesses else CLAUSE.findall(message):
+        clause = clause.strip()
+        for pattern in (LEAD_IN, STATUS_OF):
+            if match := pattern.match(clause):
+                guesses.append(match.group("title"))
+        guesses.extend(_title_case_runs(clause))
+
+    titles, seen = [], set()
+    for guess in guesses:
+        title = _clean_title(guess)
+        if title and title.lower() not in seen:
+            seen.add(title.lower())
+            titles.append(title)
+    return titles[:MAX_TITLES]
+
+
+def plan(message: str) -> List[str]:
+    """The read-only commands worth starting for a message."""
+    from bot.config import MEDIA_ROOT
+
+    commands = []
+    if match := STATUS_WORDS.search(message):
+        commands.append("qbt-status downloading" if match.group(1).lower() == "downloading" else "qbt-status")
+    if DISK_WORDS.search(message):
+        commands.append(f"df -h {MEDIA_ROOT}")
+
+    wants_movie, wants_series = bool(MOVIE_WORDS.search(message)), bool(SERIES_WORDS.search(message))
+    for title in extract_titles(message):
+        if wants_series or not wants_movie:
+            commands.append(f"sonarr-find {shlex.quote(title)}")
+        if wants_movie or not wants_series:
+            commands.append(f"radarr-find {shlex.quote(title)}")
+    return commands
+
+
+def command_key(command: str) -> Optional[str]:
+    """Normalize a command so quoting and case differences still match."""
+    try:
+        return " ".join(shlex.split(command.strip())).lower().rstrip("/")
+    except ValueError:
+        return None
+
+
+class Prefetch:
+    """The speculative lookups started for one request."""
+
+    def __init__(self, commands: List[str]):
+        self.commands: Dict[str, str] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        for command in commands:
+            key = command_key(command)
+            if key and key not in self.tasks:
+                self.commands[key] = command
+                self.tasks[key] = asyncio.create_task(self._run(command))
+        self.used: Set[str] = set()  # claimed by any run (for metrics)
+        self.claimed: Set[str] = set()  # claimed by the current run
+
+    @staticmethod
+    async def _run(command: str) -> Tuple[int, str, str]:
+        from bot.tools.command_executor import run_command
+
+        with span("prefetch", command=command[:80]) as prefetch_span:
+            result = await run_command(command, PREFETCH_TIMEOUT)
+            prefetch_span.set(returncode=result[0], stdout_bytes=len(result[1]))
+        return result
+
+    async def take(self, command: str) -> Optional[Tuple[int, str, str]]:
+        """
+        Claim the prefetched output for a command, waiting if it's still running.
+
+        Returns:
+            (returncode, stdout, stderr), or None if the command wasn't prefetched
+            (or its prefetch failed) and should run normally
+        """
+        key = command_key(command)
+        task = self.tasks.get(key) if key else None
+        if task is None:
+            return None
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                task.cancel()
+                raise
+            return None
+        except Exception as e:
+            logger.info(f"Prefetch of '{command}' failed, running it normally: {e}")
+            return None
+        self.used.add(key)
+        self.claimed.add(key)
+        PREFETCHES.inc(outcome="used")
+        logger.info(f"Prefetch hit: {command}")
+        return result
+
+    def ready_context(self) -> str:
+        """
+        Render finished, non-empty prefetched results this run hasn't claimed, for its second turn.
+
+        The results are claimed by this call (they won't be offered again in this run).
+        """
+        sections, remaining = [], MAX_CONTEXT_CHARS
+        for key, task in self.tasks.items():
+            if key in self.claimed or not task.done() or task.cancelled() or task.exception() is not None:
+                continue
+            returncode, stdout, _ = task.result()
+            output = stdout.strip()
+            if returncode != 0 or output in ("", "[]") or remaining <= 0:
+                continue
+            if len(output) > remaining:
+                output = output[:remaining] + "\n[...truncated]"
+            remaining -= len(output)
+            sections.append(f"$ {self.commands[key]}\n{output}")
+            self.used.add(key)
+            self.claimed.add(key)
+            PREFETCHES.inc(outcome="attached")
+        if not sections:
+            return ""
+        return (
+            "[SYSTEM: Already fetched for this request at its start — use these instead of re-running them:]\n"
+            + "\n\n".join(sections)
+        )
+
+    def release(self):
+        """
+        Offer every result again, to a run taking over from one that gave up.
+
+        A read-only run leaves nothing stale behind, so its claims don't
+        have to cost the next run a lookup.
+        """
+        self.claimed.clear()
+
+    def cancel(self):
+        """Cancel whatever is still running and count what was never used."""
+        for key, task in self.tasks.items():
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # retrieved, so a failed lookup isn't logged as unhandled
+            if key not in self.used:
+                PREFETCHES.inc(outcome="unused")
+        self.tasks.clear()
+
+
+def start_prefetch(message: str) -> Optional[Prefetch]:
+    """Start the lookups for a message, or return None if there is nothing to prefetch."""
+    from bot.config import PREFETCH_ENABLED
+
+    if not PREFETCH_ENABLED:
+        return None
+    commands = plan(message)
+    if not commands:
+        return None
+    logger.info(f"Prefetching: {', '.join(commands)}")
+    return Prefetch(commands)
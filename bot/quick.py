@@ -0,0 +1,283 @@
+"""
+Fixed-template answers for routine questions, straight from the service layer.
+
+No model is involved: torrents come from the live torrent table (or one
+`/torrents/info` call when it's stale), titles from the library catalog,
+missing episodes from one Sonarr `/episode` call, and disk usage from the
+filesystem. Lists render one page at a time.
+"""
+
+import asyncio
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from bot.torrents import DOWNLOADING_STATES, ERRORED_STATES, FILTERS, PAUSED_STATES, SEEDING_STATES
+
+GB = 1024 ** 3
+MB = 1024 ** 2
+LOW_SPACE_BYTES = 10 * GB  # AGENT.md: warn under 10GB free
+INFINITE_ETA = 8640000  # qBittorrent's "unknown" ETA
+PAGE_SIZE = 10  # torrents, titles or seasons per page
+
+
+class QuickError(Exception):
+    """A quick answer couldn't be produced (service unreachable, unknown filter)."""
+
+
+async def torrent_list(state_filter: str = "all") -> List[Dict[str, Any]]:
+    """
+    Torrents matching a qbt-status filter, from the live table when it's fresh.
+
+    Raises:
+        QuickError: If the filter is unknown or qBittorrent can't be reached
+    """
+    from bot.config import QBT_SYNC_ENABLED
+    from bot.tools.service_client import ServiceError, get_service_client
+    from bot.torrents import get_torrent_tracker
+
+    if state_filter not in FILTERS:
+        raise QuickError(f"Unknown filter '{state_filter}' (try: {', '.join(FILTERS)})")
+    torrents = get_torrent_tracker().status(state_filter) if QBT_SYNC_ENABLED else None
+    if torrents is not None:
+        return torrents
+
+    query = None if state_filter == "all" else f"filter={state_filter}"
+    try:
+        response = await get_service_client().request("qbt", "GET", "/torrents/info", query)
+    except ServiceError as e:
+        raise QuickError(str(e)) from e
+    if not response["ok"] or not isinstance(response["json"], list):
+        raise QuickError(f"qBittorrent returned HTTP {response['status']}")
+    return sorted(response["json"], key=lambda t: (t.get("added_on", 0), t.get("name", "")))
+
+
+def _size(num_bytes: float) -> str:
+    if num_bytes >= 1024 * GB:
+        return f"{num_bytes / (1024 * GB):.1f} TB"
+    if num_bytes >= GB:
+        return f"{num_bytes / GB:.1f} GB"
+    return f"{num_bytes / MB:.0f} MB"
+
+
+def _eta(seconds: int) -> str:
+    if seconds is None or seconds < 0 or seconds >= INFINITE_ETA:
+        return "∞"
+    if seconds >= 86400:
+        return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+    return f"{max(seconds // 60, 1)}m"
+
+
+def _icon(torrent: Dict[str, Any]) -> str:
+    state = torrent.get("state")
+    if state in ERRORED_STATES:
+        return "❌"
+    if state in PAUSED_STATES:
+        return "⏸️"
+    if state == "stalledDL":
+        return "⚠️"
+    if torrent.get("progress", 0) >= 1 or state in SEEDING_STATES:
+        return "✅"
+    return "⬇️"
+
+
+def torrent_line(torrent: Dict[str, Any]) -> str:
+    """One torrent: '⬇️ Name — 45% of 4.2 GB · 3.1 MB/s · ETA 12m'."""
+    progress = torrent.get("progress", 0)
+    size = torrent.get("size") or torrent.get("total_size") or 0
+    line = f"{_icon(torrent)} {torrent.get('name', '?')} — "
+    if progress >= 1:
+        return line + f"done, {_size(size)}"
+    line += f"{progress * 100:.0f}% of {_size(size)}"
+    if torrent.get("state") in DOWNLOADING_STATES and torrent.get("dlspeed"):
+        line += f" · {torrent['dlspeed'] / MB:.1f} MB/s · ETA {_eta(torrent.get('eta'))}"
+    elif torrent.get("state") == "stalledDL":
+        line += " · stalled"
+    return line
+
+
+def page_count(total: int, page_size: int = PAGE_SIZE) -> int:
+    return max(1, -(-total // page_size))
+
+
+def _page(lines: List[str], page: int, page_size: int) -> List[str]:
+    """One page of lines, followed by how many come after it."""
+    shown = lines[page * page_size:(page + 1) * page_size]
+    remaining = len(lines) - (page + 1) * page_size
+    return shown + ([f"… and {remaining} more"] if remaining > 0 else [])
+
+
+def format_downloads(torrents: List[Dict[str, Any]], state_filter: str = "all", page: int = 0, page_size: int = PAGE_SIZE) -> str:
+    """Render a page of a torrent list under a one-line header."""
+    label = "torrents" if state_filter == "all" else f"{state_filter.replace('_', ' ')} torrents"
+    if not torrents:
+        return f"📭 No {label}."
+    speed = sum(t.get("dlspeed", 0) for t in torrents)
+    header = f"📥 {len(torrents)} {label}" + (f" · {speed / MB:.1f} MB/s total" if speed else "")
+    return "\n".join([header, ""] + _page([torrent_line(t) for t in torrents], page, page_size))
+
+
+async def disk_usage() -> List[Dict[str, Any]]:
+    """Usage of the media and downloads filesystems (missing paths are reported, not raised)."""
+    from bot.config import DOWNLOADS_DIR, MEDIA_ROOT
+
+    def measure(path: Path) -> Dict[str, Any]:
+        try:
+            usage = shutil.disk_usage(path)
+        except OSError as e:
+            return {"path": str(path), "error": e.strerror or str(e)}
+        return {"path": str(path), "total": usage.total, "used": usage.used, "free": usage.free}
+
+    return await asyncio.to_thread(lambda: [measure(path) for path in (MEDIA_ROOT, DOWNLOADS_DIR)])
+
+
+def format_disk(usages: List[Dict[str, Any]]) -> str:
+    """Render disk usage: '💾 /mnt/storage — 1.2 TB free of 7.3 TB (84% used)'."""
+    lines = []
+    for usage in usages:
+        if "error" in usage:
+            lines.append(f"❓ {usage['path']} — unavailable ({usage['error']})")
+            continue
+        percent = usage["used"] / usage["total"] * 100 if usage["total"] else 0
+        line = f"💾 {usage['path']} — {_size(usage['free'])} free of {_size(usage['total'])} ({percent:.0f}% used)"
+        if usage["free"] < LOW_SPACE_BYTES:
+            line += "\n⚠️ Under 10 GB free"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+async def _resolve_series(term: str) -> Dict[str, Any]:
+    """
+    A library series by ID or title (best catalog match).
+
+    An all-digit term is tried as an ID first and searched as a title ("24")
+    if no series has that ID.
+
+    Raises:
+        QuickError: If nothing matches or the catalog can't sync
+    """
+    from bot.catalog import get_catalog
+    from bot.config import CATALOG_REFRESH_INTERVAL
+    from bot.tools.service_client import ServiceError, get_service_client
+
+    catalog = get_catalog()
+    series = None
+    try:
+        if term.isdigit():
+            series = await asyncio.to_thread(catalog.get, "series", int(term))
+            if series is None:  # not indexed yet; ask Sonarr
+                response = await get_service_client().request("sonarr", "GET", f"/series/{term}")
+                series = response["json"] if response["ok"] and isinstance(response["json"], dict) else None
+        if series is None:
+            results = await catalog.find("series", term, max_age=CATALOG_REFRESH_INTERVAL * 2)
+            series = await asyncio.to_thread(catalog.get, "series", results[0]["id"]) if results else None
+    except (RuntimeError, ServiceError) as e:  # catalog sync or Sonarr failures
+        raise QuickError(str(e)) from e
+    if series is None:
+        raise QuickError(f"No series matching '{term}' in the library")
+    return series
+
+
+async def find_titles(term: str) -> List[Dict[str, Any]]:
+    """
+    Library series and movies matching a title, series first, with their stored details.
+
+    Raises:
+        QuickError: If the catalog can't sync
+    """
+    from bot.catalog import get_catalog
+    from bot.config import CATALOG_REFRESH_INTERVAL
+    from bot.tools.service_client import ServiceError
+
+    catalog = get_catalog()
+    try:
+        found = await asyncio.gather(*(
+            catalog.find(kind, term, max_age=CATALOG_REFRESH_INTERVAL * 2) for kind in ("series", "movie")
+        ))
+    except (RuntimeError, ServiceError) as e:  # catalog sync failures
+        raise QuickError(str(e)) from e
+
+    def details() -> List[Dict[str, Any]]:
+        return [
+            dict(catalog.get(kind, result["id"]) or result, kind=kind)
+            for kind, results in zip(("series", "movie"), found)
+            for result in results
+        ]
+
+    return await asyncio.to_thread(details)
+
+
+def title_line(item: Dict[str, Any]) -> str:
+    """One library item: '📺 Breaking Bad (2008) — 62/62 episodes · monitored · #1'."""
+    name = item.get("title") or "?"
+    if item.get("year"):
+        name += f" ({item['year']})"
+    if item["kind"] == "series":
+        statistics = item.get("statistics") or {}
+        have = f"{statistics.get('episodeFileCount', 0)}/{statistics['episodeCount']} episodes" if statistics.get("episodeCount") else None
+        parts = ["📺 " + name, have]
+    else:
+        on_disk = item.get("hasFile") or (item.get("sizeOnDisk") or 0) > 0
+        parts = ["🎬 " + name, f"on disk, {_size(item['sizeOnDisk'])}" if on_disk and item.get("sizeOnDisk") else ("on disk" if on_disk else "not downloaded")]
+    parts.append("monitored" if item.get("monitored") else "unmonitored")
+    parts.append(f"#{item.get('id')}")
+    return f"{parts[0]} — " + " · ".join(part for part in parts[1:] if part)
+
+
+def format_find(term: str, items: List[Dict[str, Any]], page: int = 0, page_size: int = PAGE_SIZE) -> str:
+    """Render a page of title matches."""
+    if not items:
+        return f"🔍 Nothing in the library matches '{term}'."
+    header = f"🔍 {len(items)} match{'es' if len(items) != 1 else ''} for '{term}'"
+    return "\n".join([header, ""] + _page([title_line(item) for item in items], page, page_size))
+
+
+async def missing_episodes(term: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    A series and its monitored episodes without files (what `sonarr-missing` reports).
+
+    Raises:
+        QuickError: If the series isn't in the library or Sonarr can't be reached
+    """
+    from bot.tools.service_client import ServiceError, get_service_client
+
+    series = await _resolve_series(term)
+    try:
+        response = await get_service_client().request("sonarr", "GET", "/episode", f"seriesId={series['id']}")
+    except ServiceError as e:
+        raise QuickError(str(e)) from e
+    if not response["ok"] or not isinstance(response["json"], list):
+        raise QuickError(f"Sonarr returned HTTP {response['status']}")
+    missing = [e for e in response["json"] if not e.get("hasFile") and e.get("monitored")]
+    missing.sort(key=lambda e: (e.get("seasonNumber", 0), e.get("episodeNumber", 0)))
+    return series, missing
+
+
+def _ranges(numbers: List[int]) -> str:
+    """[1, 2, 3, 5] -> 'E01-E03, E05'."""
+    spans: List[List[int]] = []
+    for number in numbers:
+        if spans and number == spans[-1][1] + 1:
+            spans[-1][1] = number
+        else:
+            spans.append([number, number])
+    return ", ".join(f"E{a:02d}" if a == b else f"E{a:02d}-E{b:02d}" for a, b in spans)
+
+
+def format_missing(series: Dict[str, Any], episodes: List[Dict[str, Any]], page: int = 0, page_size: int = PAGE_SIZE) -> str:
+    """Render a page of missing episodes, one line per season."""
+    title = series.get("title") or f"Series #{series.get('id')}"
+    if not episodes:
+        return f"✅ {title} has no missing monitored episodes."
+    seasons: Dict[int, List[int]] = {}
+    for episode in episodes:
+        seasons.setdefault(episode.get("seasonNumber", 0), []).append(episode.get("episodeNumber", 0))
+    lines = [f"S{season:02d} ({len(numbers)}): {_ranges(numbers)}" for season, numbers in seasons.items()]
+    header = f"📺 {title} — {len(episodes)} missing episode{'s' if len(episodes) != 1 else ''}"
+    return "\n".join([header, ""] + _page(lines, page, page_size))
+
+
+def missing_page_count(episodes: List[Dict[str, Any]], page_size: int = PAGE_SIZE) -> int:
+    return page_count(len({e.get("seasonNumber", 0) for e in episodes}), page_size)
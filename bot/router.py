@@ -0,0 +1,148 @@
+"""
+Intent routing: send each message to the cheapest tier that can answer it.
+
+- instant: plain status questions ("what's downloading?", "how much space is
+  left?") are answered from the torrent table and disk usage with a fixed
+  template — no model call at all
+- lookup: read-only questions ("do I have Dune?", "how many movies are in
+  Plex?") run on EXECUTOR_MODEL with read-only tools; it hands over to the
+  orchestrator if it tries to change anything or runs out of turns
+- full: everything else goes to the orchestrator with every tool
+
+Local rules place most messages. With ROUTER_CLASSIFIER on, the executor
+model breaks the tie for messages the rules can't place; otherwise they go
+to the orchestrator. Every decision is logged with its reason and timing.
+"""
+
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from bot.prefetch import DISK_WORDS, STATUS_WORDS, extract_titles
+
+logger = logging.getLogger(__name__)
+
+INSTANT = "instant"
+LOOKUP = "lookup"
+FULL = "full"
+
+MAX_INSTANT_WORDS = 10
+MAX_LOOKUP_WORDS = 25
+
+ACTION_WORDS = re.compile(
+    r"\b(add|download|grab|delete|remove|recycle|move|rename|copy|pause|resume|stop|start|restart|"
+    r"search|monitor|unmonitor|upgrade|replace|set|change|organi[sz]e|clean|retry|force|"
+    r"prioriti[sz]e|import|refresh|scan|update|continue|cancel|redownload|request|queue|remember|"
+    r"mark|tag|unpause)\b",
+    re.I,
+)
+DIAGNOSTIC_WORDS = re.compile(
+    r"\b(why|stuck|slow|fail(?:ed|ing)?|error|broken|wrong|issue|problem|not working|doesn't work|fix)\b", re.I
+)
+# References to earlier turns need the conversation and the orchestrator's judgement
+CONTEXT_WORDS = re.compile(r"\b(it|that|those|these|them|this one|again|same|previous|above|instead|also)\b", re.I)
+QUESTION = re.compile(
+    r"^(?:what|what's|whats|which|how|do|does|did|is|are|was|were|have|has|any|list|show me|when|where|who|"
+    r"tell me|check|am i)\b|\?\s*$",
+    re.I,
+)
+STATUS_FILTERS = [
+    (re.compile(r"\bstalled\b", re.I), "stalled"),
+    (re.compile(r"\bseeding\b", re.I), "seeding"),
+    (re.compile(r"\b(completed?|finished|done)\b", re.I), "completed"),
+    (re.compile(r"\bpaused\b", re.I), "paused"),
+    (re.compile(r"\b(errored|errors?)\b", re.I), "errored"),
+    (re.compile(r"\b(downloading|downloads|active)\b", re.I), "downloading"),
+]
+
+CLASSIFIER_PROMPT = """Classify this message to a home media server assistant (Sonarr, Radarr, qBittorrent, Plex).
+Reply with one word:
+LOOKUP - it only asks for information (what's in the library, missing episodes, download or disk status)
+FULL - it asks to change anything, to troubleshoot, or needs several dependent steps
+
+Message: {message}"""
+
+
+class Route:
+    """Where a message goes, and why."""
+
+    def __init__(self, tier: str, reason: str, status_filter: Optional[str] = None, disk: bool = False):
+        self.tier = tier
+        self.reason = reason
+        self.status_filter = status_filter  # instant: torrent list to show (None = none)
+        self.disk = disk  # instant: show disk usage
+        self.seconds = 0.0  # time spent deciding
+
+    def __repr__(self) -> str:
+        return f"Route({self.tier}, {self.reason})"
+
+
+def _status_filter(message: str) -> str:
+    for pattern, state_filter in STATUS_FILTERS:
+        if pattern.search(message):
+            return state_filter
+    return "all"
+
+
+def classify(message: str, has_history: bool = False) -> Optional[Route]:
+    """
+    Place a message with local rules.
+
+    Returns:
+        The route, or None if the rules can't tell
+    """
+    text = message.strip()
+    words = text.split()
+    if not words:
+        return Route(FULL, "empty")
+    if ACTION_WORDS.search(text):
+        return Route(FULL, "action")
+    if DIAGNOSTIC_WORDS.search(text):
+        return Route(FULL, "diagnostic")
+    if has_history and CONTEXT_WORDS.search(text):
+        return Route(FULL, "refers to earlier turns")
+
+    status, disk = bool(STATUS_WORDS.search(text)), bool(DISK_WORDS.search(text))
+    if (status or disk) and len(words) <= MAX_INSTANT_WORDS and not extract_titles(text):
+        return Route(INSTANT, "status" if status else "disk", _status_filter(text) if status else None, disk)
+
+    if QUESTION.search(text):
+        if len(words) <= MAX_LOOKUP_WORDS:
+            return Route(LOOKUP, "read-only question")
+        return Route(FULL, "long question")
+    if len(words) > MAX_LOOKUP_WORDS:
+        return Route(FULL, "long request")
+    return None
+
+
+async def _ask_classifier(message: str, cancel_token=None) -> Optional[str]:
+    """Ask the executor model for LOOKUP or FULL (None if it answers anything else or fails)."""
+    from bot.scheduler import JobCancelled
+    from bot.tools.executor import call_executor
+
+    try:
+        answer = await call_executor(CLASSIFIER_PROMPT.format(message=message[:1000]), cancel_token, max_tokens=5)
+    except JobCancelled:
+        raise
+    except Exception as e:
+        logger.warning(f"Router classifier failed: {e}")
+        return None
+    word = answer.strip().split()[0].strip(".,:;!\"'*").upper() if answer.strip() else ""
+    return {"LOOKUP": LOOKUP, "FULL": FULL}.get(word)
+
+
+async def route_message(message: str, conversation_history: List[Dict[str, Any]] = None, cancel_token=None) -> Route:
+    """Decide which tier handles a message."""
+    from bot.config import ROUTER_CLASSIFIER, ROUTER_ENABLED
+
+    started = time.monotonic()
+    if not ROUTER_ENABLED:
+        route = Route(FULL, "router disabled")
+    else:
+        route = classify(message, bool(conversation_history))
+        if route is None:
+            tier = await _ask_classifier(message, cancel_token) if ROUTER_CLASSIFIER else None
+            route = Route(tier, "classifier") if tier else Route(FULL, "unclassified")
+    route.seconds = time.monotonic() - started
+    return route
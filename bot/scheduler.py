@@ -0,0 +1,254 @@
+"""Per-chat job scheduling with bounded concurrency and per-job cancellation."""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from bot.metrics import QUEUE_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Chat whose job is running in the current task (None outside scheduled jobs)
+current_chat: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("current_chat", default=None)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when its cancellation token fires."""
+
+
+class SchedulerFull(Exception):
+    """Raised when a job can't be queued because the scheduler is overloaded."""
+
+
+class CancellationToken:
+    """Cooperative cancellation signal carried by a single job."""
+
+    def __init__(self):
+        self._event = asyncio.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """Signal cancellation to everything holding this token."""
+        self._event.set()
+
+    def raise_if_cancelled(self):
+        """Raise JobCancelled if the token has fired."""
+        if self.cancelled:
+            raise JobCancelled()
+
+    async def race(self, awaitable: Awaitable) -> Any:
+        """
+        Await something unless the token fires first.
+
+        The awaitable is cancelled (killing subprocesses, aborting HTTP requests)
+        as soon as the token fires, and JobCancelled is raised to the caller.
+        """
+        self.raise_if_cancelled()
+        task = asyncio.ensure_future(awaitable)
+        waiter = asyncio.ensure_future(self._event.wait())
+        try:
+            done, _ = await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            waiter.cancel()
+
+        if task in done:
+            return task.result()
+
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+        raise JobCancelled()
+
+
+async def cancellable(awaitable: Awaitable, cancel_token: Optional[CancellationToken]) -> Any:
+    """Await under a cancellation token, or plainly if there is none."""
+    if cancel_token is None:
+        return await awaitable
+    return await cancel_token.race(awaitable)
+
+
+class Job:
+    """A unit of agent work submitted on behalf of a chat."""
+
+    def __init__(self, chat_id: int, func: Callable[["Job"], Awaitable[Any]], label: str = ""):
+        self.chat_id = chat_id
+        self.func = func
+        self.label = label
+        self.token = CancellationToken()
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.done = asyncio.Event()
+
+    @property
+    def queue_wait(self) -> float:
+        """Seconds spent waiting in the queue before starting."""
+        if self.started_at is None:
+            return time.monotonic() - self.enqueued_at
+        return self.started_at - self.enqueued_at
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None and not self.done.is_set()
+
+
+class JobScheduler:
+    """
+    Runs agent jobs with a global concurrency limit and per-chat queues.
+
+    Each chat runs at most one job at a time (so its history stays consistent);
+    chats with pending work take turns round-robin for the global slots, so one
+    heavy user can't starve the others.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_queued_per_chat: int = 3, max_queued_total: int = 20):
+        self.max_concurrent = max_concurrent
+        self.max_queued_per_chat = max_queued_per_chat
+        self.max_queued_total = max_queued_total
+
+        self._queues: Dict[int, deque] = {}
+        self._ready: deque = deque()  # chat IDs with queued work and no running job
+        self._running: Dict[int, Job] = {}
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+    @property
+    def queued_count(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def submit(self, chat_id: int, func: Callable[[Job], Awaitable[Any]], label: str = "") -> Job:
+        """
+        Queue a job for a chat.
+
+        Args:
+            chat_id: Chat the job belongs to
+            func: Coroutine function called with the Job once a slot is free
+            label: Short description for logs
+
+        Returns:
+            The queued Job
+
+        Raises:
+            SchedulerFull: If the chat's queue or the global queue is full
+        """
+        queue = self._queues.get(chat_id, deque())
+        if len(queue) >= self.max_queued_per_chat:
+            raise SchedulerFull(
+                f"You already have {len(queue)} requests waiting. "
+                "Wait for them to finish or /stop them."
+            )
+        if self.queued_count >= self.max_queued_total:
+            raise SchedulerFull("I'm at capacity right now. Please try again in a minute.")
+
+        job = Job(chat_id, func, label)
+        queue.append(job)
+        self._queues[chat_id] = queue
+        if chat_id not in self._running and chat_id not in self._ready:
+            self._ready.append(chat_id)
+
+        logger.info(
+            f"Job queued for chat {chat_id} ({label[:50]}) — "
+            f"running={self.running_count}, queued={self.queued_count}"
+        )
+        self._dispatch()
+        return job
+
+    def position(self, job: Job) -> int:
+        """
+        Return the job's place in line (0 = running, 1 = next to start).
+
+        Simulates round-robin dispatch: each chat in rotation contributes one job
+        per round, and a chat with a running job rejoins the rotation at the end.
+        """
+        if job.started_at is not None:
+            return 0
+        queue = self._queues.get(job.chat_id)
+        if not queue or job not in queue:
+            return 0
+
+        rotation = list(self._ready) + [c for c in self._running if c not in self._ready]
+        target_round = list(queue).index(job)
+        target_index = rotation.index(job.chat_id)
+
+        ahead = 0
+        for index, chat_id in enumerate(rotation):
+            pending = len(self._queues.get(chat_id, ()))
+            rounds = target_round + (1 if index < target_index else 0)
+            ahead += min(pending, rounds)
+
+        free_slots = max(self.max_concurrent - self.running_count, 0)
+        return max(ahead - free_slots, 0) + 1
+
+    def cancel_chat(self, chat_id: int) -> int:
+        """Cancel the running job and drop queued jobs for a chat. Returns jobs affected."""
+        count = 0
+        queue = self._queues.pop(chat_id, deque())
+        for job in queue:
+            job.token.cancel()
+            job.done.set()
+            count += 1
+        if chat_id in self._ready:
+            self._ready.remove(chat_id)
+
+        job = self._running.get(chat_id)
+        if job:
+            job.token.cancel()
+            count += 1
+
+        if count:
+            logger.info(f"Cancelled {count} job(s) for chat {chat_id}")
+        return count
+
+    def running_job(self, chat_id: int) -> Optional[Job]:
+        """Return the chat's running job, if any."""
+        return self._running.get(chat_id)
+
+    def _dispatch(self):
+        """Start queued jobs round-robin until the concurrency limit is reached."""
+        while self._ready and len(self._running) < self.max_concurrent:
+            chat_id = self._ready.popleft()
+            queue = self._queues.get(chat_id)
+            if not queue:
+                self._queues.pop(chat_id, None)
+                continue
+
+            job = queue.popleft()
+            if not queue:
+                del self._queues[chat_id]
+
+            job.started_at = time.monotonic()
+            self._running[chat_id] = job
+            job.task = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: Job):
+        """Run a job and hand its slot to the next chat in rotation."""
+        logger.info(f"Job started for chat {job.chat_id} after {job.queue_wait:.2f}s in queue")
+        QUEUE_WAIT_SECONDS.observe(job.queue_wait)
+        current_chat.set(job.chat_id)
+        try:
+            await job.func(job)
+        except JobCancelled:
+            logger.info(f"Job for chat {job.chat_id} cancelled")
+        except Exception as e:
+            logger.error(f"Job for chat {job.chat_id} failed: {e}", exc_info=True)
+        finally:
+            job.finished_at = time.monotonic()
+            job.done.set()
+            self._running.pop(job.chat_id, None)
+            if self._queues.get(job.chat_id) and job.chat_id not in self._ready:
+                self._ready.append(job.chat_id)
+            self._dispatch()
@@ -0,0 +1,238 @@
+"""Live Telegram messages: streamed replies and tool progress updates."""
+
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_MAX_LENGTH = 4096
+
+
+def chunk_message(text: str, max_length: int = TELEGRAM_MAX_LENGTH) -> list[str]:
+    """Split a long message into Telegram-safe chunks, breaking at newlines."""
+    if len(text) <= max_length:
+        return [text]
+
+    chunks = []
+    while text:
+        if len(text) <= max_length:
+            chunks.append(text)
+            break
+
+        # Find a newline to break at within the limit
+        split_at = text.rfind("\n", 0, max_length)
+        if split_at == -1 or split_at < max_length // 2:
+            # No good newline break — hard split at limit
+            split_at = max_length
+
+        chunks.append(text[:split_at])
+        text = text[split_at:].lstrip("\n")
+
+    return chunks
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """Seconds to wait from a RetryAfter error (int or timedelta depending on PTB version)."""
+    retry_after = error.retry_after
+    if hasattr(retry_after, "total_seconds"):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class TelegramStreamWriter:
+    """
+    Renders streamed text into one or more live Telegram messages.
+
+    The first delta is sent immediately as a reply; later deltas are coalesced
+    into throttled edits. When the text outgrows Telegram's 4096-char limit the
+    overflow rolls over into new messages. Text streamed during a turn that ends
+    in tool use is discarded and its messages deleted, so narration doesn't sit
+    on screen while the tools run.
+    """
+
+    def __init__(self, reply_to: Message, edit_interval: float = 1.0):
+        self.reply_to = reply_to
+        self.edit_interval = edit_interval
+
+        self._text = ""
+        self._messages: List[Message] = []
+        self._rendered: List[str] = []
+        self._last_edit = 0.0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def write(self, delta: str):
+        """Append streamed text and schedule a render."""
+        if not delta:
+            return
+        self._text += delta
+
+        # First visible text goes out immediately for a fast time-to-first-token
+        if not self._messages:
+            try:
+                await self._render()
+            except TelegramError as e:
+                logger.warning(f"Failed to start streamed message: {e}")
+            return
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_render())
+
+    async def discard(self):
+        """Drop text from a turn that ended in tool use and delete its messages."""
+        await self._cancel_flush()
+        async with self._lock:
+            self._text = ""
+            messages, self._messages, self._rendered = self._messages, [], []
+            for message in messages:
+                try:
+                    await message.delete()
+                except TelegramError as e:
+                    logger.warning(f"Failed to delete discarded streamed message: {e}")
+
+    async def finish(self, final_text: str) -> bool:
+        """
+        Render the final response and tidy up leftover messages.
+
+        Returns:
+            True if the response was delivered through the live messages
+        """
+        await self._cancel_flush()
+        self._text = final_text
+        try:
+            await self._render(final=True)
+        except TelegramError as e:
+            logger.warning(f"Failed to deliver streamed response: {e}")
+            return False
+        return bool(self._messages)
+
+    async def _cancel_flush(self):
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+
+    async def _delayed_render(self):
+        """Wait out the edit interval, then render the latest text."""
+        wait = self._last_edit + self.edit_interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            await self._render()
+        except TelegramError as e:
+            logger.warning(f"Failed to update streamed message: {e}")
+
+    async def _render(self, final: bool = False):
+        """Bring the live messages in line with the current text."""
+        async with self._lock:
+            chunks = chunk_message(self._text) if self._text.strip() else []
+
+            for index, chunk in enumerate(chunks):
+                if index < len(self._messages):
+                    if self._rendered[index] != chunk:
+                        await self._call(self._messages[index].edit_text, chunk)
+                        self._rendered[index] = chunk
+                else:
+                    message = await self._call(self.reply_to.reply_text, chunk)
+                    self._messages.append(message)
+                    self._rendered.append(chunk)
+
+            # The final text may need fewer messages than an earlier draft did
+            if final:
+                while len(self._messages) > len(chunks):
+                    message = self._messages.pop()
+                    self._rendered.pop()
+                    try:
+                        await message.delete()
+                    except TelegramError as e:
+                        logger.warning(f"Failed to delete stale streamed message: {e}")
+
+            self._last_edit = time.monotonic()
+
+    async def _call(self, method, text: str):
+        """Send or edit, honouring flood-control waits once."""
+        try:
+            return await method(text)
+        except RetryAfter as e:
+            await asyncio.sleep(retry_after_seconds(e))
+            return await method(text)
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                return None
+            raise
+
+
+class ProgressRenderer:
+    """
+    Keeps one Telegram message in sync with the latest progress text.
+
+    Updates are coalesced: only the newest text is ever sent, at most one edit
+    is in flight, and edits are spaced at least `edit_interval` apart. Edits
+    that wouldn't change the text are skipped, and RetryAfter responses push
+    the next edit back by the requested delay. `finish()` flushes the final
+    state and waits for it, so nothing is left running after the request.
+    """
+
+    def __init__(self, message: Message, edit_interval: float = 1.0):
+        self.message = message
+        self.edit_interval = edit_interval
+
+        self._rendered = message.text or ""
+        self._pending: Optional[str] = None
+        self._next_edit = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def update(self, text: str):
+        """Set the latest progress text (safe to call from sync callbacks)."""
+        if self._closed:
+            return
+        self._pending = text
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def finish(self, text: Optional[str] = None):
+        """Render the final state (optionally new text) and stop updating."""
+        if text is not None:
+            self._pending = text
+        self._closed = True
+        if self._task and not self._task.done():
+            await self._task
+        # The loop may have exited before the final text arrived
+        await self._flush_loop()
+
+    async def _flush_loop(self):
+        """Send the newest pending text until there's nothing left to send."""
+        while self._pending is not None:
+            wait = self._next_edit - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            text, self._pending = self._pending, None
+            if text == self._rendered or not text.strip():
+                continue
+
+            try:
+                await self.message.edit_text(text[:TELEGRAM_MAX_LENGTH])
+                self._rendered = text
+                self._next_edit = time.monotonic() + self.edit_interval
+            except RetryAfter as e:
+                # Back off and retry with whatever is newest by then
+                if self._pending is None:
+                    self._pending = text
+                self._next_edit = time.monotonic() + retry_after_seconds(e)
+                logger.info(f"Progress edit rate-limited, retrying in {retry_after_seconds(e):.0f}s")
+            except BadRequest as e:
+                if "not modified" in str(e).lower():
+                    self._rendered = text
+                else:
+                    logger.warning(f"Failed to update progress message: {e}")
+            except TelegramError as e:
+                logger.warning(f"Failed to update progress message: {e}")
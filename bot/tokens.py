@@ -0,0 +1,79 @@
+"""Token estimation calibrated against the API's reported usage."""
+
+import json
+import logging
+import threading
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHARS_PER_TOKEN = 3.5
+# Weight of each new observation in the running average
+CALIBRATION_WEIGHT = 0.2
+# Observations below this size are too noisy to learn from
+MIN_CALIBRATION_CHARS = 2000
+# Bounds on the learned ratio, so a skewed request can't derail later budgets
+MIN_CHARS_PER_TOKEN = 2.0
+MAX_CHARS_PER_TOKEN = 5.0
+
+
+def content_chars(content: Any) -> int:
+    """Character count of message content (a string or a list of content blocks)."""
+    if isinstance(content, str):
+        return len(content)
+    total = 0
+    for block in content or []:
+        if isinstance(block, dict):
+            for key in ("text", "content"):
+                if key in block:
+                    total += content_chars(block[key])
+            if "input" in block:
+                total += len(json.dumps(block["input"]))
+        else:
+            total += len(getattr(block, "text", "") or "")
+            if getattr(block, "input", None) is not None:
+                total += len(json.dumps(block.input))
+    return total
+
+
+def messages_chars(messages: Iterable[dict]) -> int:
+    """Character count of a list of messages."""
+    return sum(content_chars(message.get("content")) for message in messages)
+
+
+class TokenEstimator:
+    """
+    Estimates token counts from character counts.
+
+    Starts from a conservative chars-per-token ratio and keeps a running
+    average of the ratio actually observed on orchestrator requests, so
+    estimates track the real tokenizer for this bot's mix of prose and JSON.
+    """
+
+    def __init__(self, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN):
+        self.chars_per_token = chars_per_token
+        self.observations = 0
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        """Estimated token count of a string."""
+        return self.estimate_chars(len(text))
+
+    def estimate_chars(self, chars: int) -> int:
+        """Estimated token count for a character count."""
+        return int(chars / self.chars_per_token) + 1
+
+    def observe(self, chars: int, tokens: int):
+        """Feed a measured (characters, tokens) pair from an API response."""
+        if chars < MIN_CALIBRATION_CHARS or tokens <= 0:
+            return
+        with self._lock:
+            ratio = chars / tokens
+            self.chars_per_token += CALIBRATION_WEIGHT * (ratio - self.chars_per_token)
+            self.chars_per_token = min(max(self.chars_per_token, MIN_CHARS_PER_TOKEN), MAX_CHARS_PER_TOKEN)
+            self.observations += 1
+        logger.debug(f"Token estimator: {ratio:.2f} chars/token observed, now {self.chars_per_token:.2f}")
+
+
+# Process-wide estimator shared by everything that budgets prompt size
+token_estimator = TokenEstimator()
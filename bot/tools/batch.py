@@ -0,0 +1,305 @@
+"""
+Batch mutation helpers: one bulk Sonarr/Radarr command for many episodes or movies.
+
+    sonarr-search <series> <episodes...> [--missing]   EpisodeSearch (monitors them first)
+    sonarr-monitor <series> <episodes...> [--off]      PUT /episode/monitor
+    radarr-search <movie> [<movie> ...]                MoviesSearch (monitors them first)
+
+Series and movies are given by ID or title (resolved through the library
+catalog). Episode specs can be mixed and comma-separated:
+
+    S02             a whole season          S01-S03          seasons 1 to 3
+    S01E05          one episode             S01E03-E07       a range in a season
+    S01E10-S02E04   a range across seasons  471-479          absolute numbers (anime)
+
+Each helper prints one compact JSON result listing what it matched and
+what it couldn't, so a multi-episode request is a single tool call.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_LISTED = 50  # per-item entries printed before summarizing the rest
+
+SEASON = re.compile(r"^s(\d+)$", re.I)
+SEASON_RANGE = re.compile(r"^s(\d+)-s(\d+)$", re.I)
+EPISODE = re.compile(r"^s(\d+)e(\d+)$", re.I)
+EPISODE_RANGE = re.compile(r"^s(\d+)e(\d+)-(?:s(\d+))?e?(\d+)$", re.I)
+ABSOLUTE = re.compile(r"^(\d+)(?:-(\d+))?$")
+
+USAGE = {
+    "sonarr-search": "Usage: sonarr-search <series id|title> <S01|S01E02|S01E02-E05|471-479 ...> [--missing]",
+    "sonarr-monitor": "Usage: sonarr-monitor <series id|title> <S01|S01E02|S01E02-E05|471-479 ...> [--off]",
+    "radarr-search": "Usage: radarr-search <movie id|title> [<movie id|title> ...]",
+}
+
+
+class BatchError(Exception):
+    """A batch helper couldn't run (unknown series, bad spec, service failure)."""
+
+
+class UsageError(BatchError):
+    """A batch helper was called with the wrong arguments."""
+
+
+def parse_episode_spec(spec: str):
+    """
+    Turn one episode spec into a predicate over Sonarr episode records.
+
+    Raises:
+        BatchError: If the spec isn't recognized
+    """
+    if match := SEASON.match(spec):
+        season = int(match.group(1))
+        return lambda e: e.get("seasonNumber") == season
+    if match := SEASON_RANGE.match(spec):
+        first, last = int(match.group(1)), int(match.group(2))
+        return lambda e: first <= e.get("seasonNumber", -1) <= last
+    if match := EPISODE.match(spec):
+        key = (int(match.group(1)), int(match.group(2)))
+        return lambda e: (e.get("seasonNumber"), e.get("episodeNumber")) == key
+    if match := EPISODE_RANGE.match(spec):
+        start = (int(match.group(1)), int(match.group(2)))
+        end = (int(match.group(3) or match.group(1)), int(match.group(4)))
+        return lambda e: start <= (e.get("seasonNumber", -1), e.get("episodeNumber", -1)) <= end
+    if match := ABSOLUTE.match(spec):
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        return lambda e: e.get("absoluteEpisodeNumber") is not None and first <= e["absoluteEpisodeNumber"] <= last
+    raise BatchError(f"Unrecognized episode spec '{spec}' (use S01, S01E02, S01E02-E05, S01-S03 or 471-479)")
+
+
+def episode_label(episode: Dict[str, Any]) -> str:
+    label = f"S{episode.get('seasonNumber', 0):02d}E{episode.get('episodeNumber', 0):02d}"
+    if episode.get("absoluteEpisodeNumber"):
+        label += f" ({episode['absoluteEpisodeNumber']})"
+    return label
+
+
+def _listed(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    listed: Dict[str, Any] = {"count": len(entries), "items": entries[:MAX_LISTED]}
+    if len(entries) > MAX_LISTED:
+        listed["more"] = len(entries) - MAX_LISTED
+    return listed
+
+
+async def _call(service: str, method: str, endpoint: str, query: str = None, body: Any = None) -> Any:
+    """Make a service request and return its JSON, raising BatchError on failure."""
+    from bot.tools.service_client import ServiceError, get_service_client
+
+    try:
+        response = await get_service_client().request(
+            service, method, endpoint, query, json.dumps(body) if body is not None else None
+        )
+    except ServiceError as e:
+        raise BatchError(str(e)) from e
+    if not response["ok"]:
+        raise BatchError(f"{service} {method} {endpoint} returned HTTP {response['status']}: {response['text'][:200]}")
+    return response["json"]
+
+
+def _command_summary(command: Any) -> Dict[str, Any]:
+    command = command if isinstance(command, dict) else {}
+    return {"name": command.get("name"), "id": command.get("id"), "status": command.get("status")}
+
+
+async def _resolve(catalog, kind: str, term: str) -> Optional[Dict[str, Any]]:
+    """
+    Find a library item by ID or title (best catalog match).
+
+    An all-digit term is only taken as an ID if the catalog has that ID;
+    otherwise it's searched as a title ("1917", "24").
+    """
+    from bot.config import CATALOG_REFRESH_INTERVAL
+
+    results = await catalog.find(kind, term, max_age=CATALOG_REFRESH_INTERVAL * 2)  # syncs a stale catalog
+    if term.isdigit():
+        record = await asyncio.to_thread(catalog.get, kind, int(term))
+        if record is not None:
+            return record
+    return results[0] if results else None
+
+
+async def _remember_requester(catalog, kind: str, item_ids: List[int]):
+    """Credit the current chat so import webhooks are reported back to it."""
+    from bot.scheduler import current_chat
+
+    chat_id = current_chat.get()
+    if chat_id is not None:
+        await asyncio.to_thread(lambda: [catalog.add_requester(kind, item_id, chat_id) for item_id in item_ids])
+
+
+async def _select_episodes(catalog, args: List[str], flags: List[str]) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[str]]:
+    """
+    Resolve `<series> <specs...>` to the series and its matching episodes.
+
+    Returns:
+        (series record, matching episodes in order, specs that matched nothing)
+    """
+    positional = [arg for arg in args if not arg.startswith("--")]
+    unknown = [arg for arg in args if arg.startswith("--") and arg not in flags]
+    if len(positional) < 2 or unknown:
+        raise UsageError()
+
+    series = await _resolve(catalog, "series", positional[0])
+    if series is None:
+        raise BatchError(f"No series matching '{positional[0]}' in the library (add it first)")
+
+    specs = [spec for arg in positional[1:] for spec in arg.split(",") if spec]
+    predicates = [(spec, parse_episode_spec(spec)) for spec in specs]
+
+    episodes = await _call("sonarr", "GET", "/episode", query=f"seriesId={series['id']}")
+    if not isinstance(episodes, list):
+        raise BatchError("Unexpected /episode response")
+    selected, unmatched = {}, []
+    for spec, matches in predicates:
+        hits = [e for e in episodes if matches(e)]
+        if not hits:
+            unmatched.append(spec)
+        for episode in hits:
+            selected[episode["id"]] = episode
+    ordered = sorted(selected.values(), key=lambda e: (e.get("seasonNumber", 0), e.get("episodeNumber", 0)))
+    return series, ordered, unmatched
+
+
+async def sonarr_search(catalog, args: List[str]) -> Dict[str, Any]:
+    """Monitor and search the selected episodes with one EpisodeSearch."""
+    series, episodes, unmatched = await _select_episodes(catalog, args, ["--missing"])
+    if "--missing" in args:
+        episodes = [e for e in episodes if not e.get("hasFile")]
+
+    result: Dict[str, Any] = {"series": {"id": series["id"], "title": series.get("title")}}
+    if episodes:
+        unmonitored = [e["id"] for e in episodes if not e.get("monitored")]
+        if unmonitored:
+            await _call("sonarr", "PUT", "/episode/monitor", body={"episodeIds": unmonitored, "monitored": True})
+        command = await _call("sonarr", "POST", "/command", body={
+            "name": "EpisodeSearch", "episodeIds": [e["id"] for e in episodes],
+        })
+        await _remember_requester(catalog, "series", [series["id"]])
+        result["command"] = _command_summary(command)
+        result["newly_monitored"] = len(unmonitored)
+    result["episodes"] = _listed([
+        {"episode": episode_label(e), "title": e.get("title"), "hasFile": bool(e.get("hasFile"))}
+        for e in episodes
+    ])
+    if unmatched:
+        result["unmatched"] = unmatched
+    return result
+
+
+async def sonarr_monitor(catalog, args: List[str]) -> Dict[str, Any]:
+    """Monitor (or with --off, unmonitor) the selected episodes with one PUT."""
+    series, episodes, unmatched = await _select_episodes(catalog, args, ["--off"])
+    monitored = "--off" not in args
+    changed = [e for e in episodes if bool(e.get("monitored")) != monitored]
+    if changed:
+        await _call("sonarr", "PUT", "/episode/monitor", body={
+            "episodeIds": [e["id"] for e in changed], "monitored": monitored,
+        })
+
+    result: Dict[str, Any] = {
+        "series": {"id": series["id"], "title": series.get("title")},
+        "monitored": monitored,
+        "changed": len(changed),
+        "episodes": _listed([{"episode": episode_label(e), "title": e.get("title")} for e in episodes]),
+    }
+    if unmatched:
+        result["unmatched"] = unmatched
+    return result
+
+
+async def radarr_search(catalog, args: List[str]) -> Dict[str, Any]:
+    """Monitor and search several library movies with one MoviesSearch."""
+    if not args:
+        raise UsageError()
+
+    movies, missing = {}, []
+    for term in args:
+        movie = await _resolve(catalog, "movie", term)
+        if movie is None:
+            missing.append(term)
+        else:
+            movies[movie["id"]] = dict(movie, query=term)
+
+    result: Dict[str, Any] = {}
+    if movies:
+        unmonitored = [movie_id for movie_id, movie in movies.items() if movie.get("monitored") is False]
+        if unmonitored:
+            await _call("radarr", "PUT", "/movie/editor", body={"movieIds": unmonitored, "monitored": True})
+            # Best effort: the search shouldn't fail because the local catalog couldn't catch up
+            refreshed = await asyncio.gather(
+                *(catalog.refresh_item("movie", movie_id) for movie_id in unmonitored), return_exceptions=True
+            )
+            for movie_id, outcome in zip(unmonitored, refreshed):
+                if isinstance(outcome, Exception):
+                    logger.warning(f"Catalog refresh of movie {movie_id} failed: {outcome}")
+        command = await _call("radarr", "POST", "/command", body={"name": "MoviesSearch", "movieIds": list(movies)})
+        await _remember_requester(catalog, "movie", list(movies))
+        result["command"] = _command_summary(command)
+        result["newly_monitored"] = len(unmonitored)
+    result["movies"] = _listed([
+        {"query": m["query"], "id": m["id"], "title": m.get("title"), "year": m.get("year"), "hasFile": m.get("hasFile")}
+        for m in movies.values()
+    ])
+    if missing:
+        result["not_in_library"] = missing
+    return result
+
+
+BATCH_COMMANDS = {
+    "sonarr-search": sonarr_search,
+    "sonarr-monitor": sonarr_monitor,
+    "radarr-search": radarr_search,
+}
+
+
+async def run_batch(name: str, args: List[str], catalog=None) -> Tuple[int, str, str]:
+    """
+    Run a batch helper.
+
+    Args:
+        name: Helper name (a BATCH_COMMANDS key)
+        args: Its arguments
+        catalog: Library catalog to resolve titles with (default: the process-wide one)
+
+    Returns:
+        (returncode, stdout, stderr)
+    """
+    from bot.catalog import get_catalog
+    from bot.tools.service_client import ServiceError
+
+    try:
+        result = await BATCH_COMMANDS[name](catalog or get_catalog(), args)
+    except UsageError:
+        return 1, "", USAGE[name]
+    except BatchError as e:
+        return 1, "", f"Error: {e}"
+    except (RuntimeError, ServiceError) as e:  # catalog sync failures
+        return 1, "", f"Error: {e}"
+    return 0, json.dumps(result, indent=2, ensure_ascii=False) + "\n", ""
+
+
+async def run_batch_cli(name: str, argv: List[str]) -> int:
+    """Entry point for the batch helper scripts."""
+    from bot.catalog import LibraryCatalog
+    from bot.config import CATALOG_DB_PATH
+    from bot.tools.service_client import get_service_client
+
+    catalog = LibraryCatalog(CATALOG_DB_PATH)
+    try:
+        returncode, stdout, stderr = await run_batch(name, argv, catalog)
+    finally:
+        await get_service_client().aclose()
+        await catalog.stop()
+
+    sys.stdout.write(stdout)
+    if stderr:
+        print(stderr, file=sys.stderr)
+    return returncode
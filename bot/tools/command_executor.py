@@ -1,10 +1,18 @@
 """Safe command execution with security constraints."""
 
-import subprocess
+import asyncio
+import os
 import shlex
+import signal
+import sys
+import time
 import logging
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+from bot.metrics import SUBPROCESS_SECONDS
+from bot.scheduler import JobCancelled, cancellable
+from bot.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +23,12 @@ ALLOWED_COMMANDS = [
     "sonarr-find",
     "radarr-find",
     "sonarr-missing",
+    "sonarr-search",
+    "sonarr-monitor",
+    "radarr-search",
     "qbt-status",
+    "qbt-watch",
+    "arr-events",
     "ls",
     "find",
     "mv",
@@ -96,15 +109,308 @@ def is_command_safe(command: str) -> tuple[bool, str]:
 MAX_RAW_OUTPUT_BYTES = 10000  # 10KB safety cap for raw mode
 
 
-def execute_command(command: str, timeout: int = 120, raw: bool = False, context: str = "") -> Dict[str, Any]:
+async def _kill_process_group(process: asyncio.subprocess.Process):
+    """Kill a shell and every pipeline stage it spawned, then reap it."""
+    if process.returncode is None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    await process.wait()
+
+
+def _command_env() -> Dict[str, str]:
+    """Minimal environment for child processes: scripts on PATH plus service credentials."""
+    # Add scripts directory to PATH so api-call and recycle-bin are available, and the
+    # bot's own interpreter directory so Python scripts run with the same packages (venv)
+    from bot.config import SCRIPTS_DIR
+
+    python_dir = os.path.dirname(sys.executable)
+    env = {"PATH": f"{SCRIPTS_DIR}:{python_dir}:/usr/local/bin:/usr/bin:/bin"}
+
+    # Copy over necessary env vars for API authentication
+    for key in [
+        "SONARR_API_KEY", "SONARR_URL",
+        "RADARR_API_KEY", "RADARR_URL",
+        "QBITTORRENT_USER", "QBITTORRENT_PASS", "QBITTORRENT_URL",
+        "PLEX_TOKEN", "PLEX_URL",
+        "BAZARR_API_KEY", "BAZARR_URL",
+    ]:
+        if key in os.environ:
+            env[key] = os.environ[key]
+
+    return env
+
+
+async def _run_shell(command: str, timeout: float, cancel_token=None, input_text: str = None) -> Tuple[int, str, str]:
+    """
+    Run a shell command as a child process without blocking the event loop.
+
+    Returns:
+        (returncode, stdout, stderr)
+
+    Raises:
+        asyncio.TimeoutError: If the command outlives the timeout (it is killed first)
+    """
+    program = os.path.basename(command.split(maxsplit=1)[0]) if command.strip() else ""
+    input_bytes = input_text.encode() if input_text is not None else None
+    with span("subprocess", command=command[:80], stdin_bytes=len(input_bytes or b"")) as process_span:
+        started = time.monotonic()
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdin=asyncio.subprocess.PIPE if input_text is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=_command_env(),
+            start_new_session=True,  # own process group, so pipelines can be killed as a unit
+        )
+        process_span.set(spawn_seconds=round(time.monotonic() - started, 4))
+        try:
+            stdout_bytes, stderr_bytes = await asyncio.wait_for(
+                cancellable(process.communicate(input_bytes), cancel_token), timeout=timeout
+            )
+        except (asyncio.TimeoutError, asyncio.CancelledError, JobCancelled):
+            # Don't leave orphaned children behind when the command times out or the job is cancelled
+            await _kill_process_group(process)
+            raise
+        finally:
+            SUBPROCESS_SECONDS.observe(
+                time.monotonic() - started, command=program if program in ALLOWED_COMMANDS else "other"
+            )
+        process_span.set(returncode=process.returncode, stdout_bytes=len(stdout_bytes), stderr_bytes=len(stderr_bytes))
+
+    return process.returncode, stdout_bytes.decode(errors="replace"), stderr_bytes.decode(errors="replace")
+
+
+async def _run_api_call(call: Dict[str, Any], timeout: float, cancel_token=None) -> Tuple[int, str, str]:
+    """
+    Serve an `api-call` invocation in-process through the pooled service client.
+
+    Output matches what the CLI would print; a trailing pipeline (`| jq ...`) is
+    fed the response on stdin.
+
+    Returns:
+        (returncode, stdout, stderr)
+    """
+    from bot.tools.service_client import ServiceError, format_output, get_service_client
+
+    deadline = asyncio.get_running_loop().time() + timeout
+    try:
+        response = await asyncio.wait_for(
+            cancellable(
+                get_service_client().request(
+                    call["service"], call["method"], call["endpoint"], call["query"], call["data"]
+                ),
+                cancel_token,
+            ),
+            timeout=timeout,
+        )
+    except ServiceError as e:
+        return 1, "", f"Error: {e}"
+
+    output = format_output(response)
+    if not response["ok"]:
+        return 1, "", f"HTTP {response['status']}: {output}"
+
+    if call["pipe"] is None:
+        return 0, output, ""
+
+    remaining = max(deadline - asyncio.get_running_loop().time(), 1)
+    return await _run_shell(call["pipe"], remaining, cancel_token, input_text=output)
+
+
+FIND_COMMANDS = {"sonarr-find": "series", "radarr-find": "movie"}
+
+
+async def _run_find(kind: str, args: List[str], pipe: Optional[str], timeout: float, cancel_token=None) -> Tuple[int, str, str]:
+    """
+    Serve `sonarr-find` / `radarr-find` in-process from the library catalog.
+
+    Returns:
+        (returncode, stdout, stderr)
+    """
+    from bot.catalog import get_catalog, format_results
+    from bot.config import CATALOG_REFRESH_INTERVAL
+
+    if len(args) != 1:
+        name = next(command for command, k in FIND_COMMANDS.items() if k == kind)
+        return 1, "", f"Usage: {name} <search_term>"
+
+    deadline = asyncio.get_running_loop().time() + timeout
+    try:
+        with span("catalog", kind=kind, command=args[0]) as find_span:
+            results = await asyncio.wait_for(
+                cancellable(get_catalog().find(kind, args[0], max_age=CATALOG_REFRESH_INTERVAL * 2), cancel_token),
+                timeout=timeout,
+            )
+            find_span.set(results=len(results))
+    except (asyncio.TimeoutError, asyncio.CancelledError, JobCancelled):
+        raise
+    except Exception as e:
+        return 1, "", f"Error: catalog lookup failed: {e}"
+
+    output = format_results(results)
+    if pipe is None:
+        return 0, output, ""
+
+    remaining = max(deadline - asyncio.get_running_loop().time(), 1)
+    return await _run_shell(pipe, remaining, cancel_token, input_text=output)
+
+
+BATCH_COMMANDS = {"sonarr-search", "sonarr-monitor", "radarr-search"}
+
+
+async def _run_batch(command: str, args: List[str], pipe: Optional[str], timeout: float, cancel_token=None) -> Tuple[int, str, str]:
+    """
+    Serve the batch mutation helpers in-process (one bulk Sonarr/Radarr command each).
+
+    Returns:
+        (returncode, stdout, stderr)
+    """
+    from bot.tools.batch import run_batch
+
+    deadline = asyncio.get_running_loop().time() + timeout
+    with span("batch", command=command, args=len(args)):
+        returncode, output, error = await asyncio.wait_for(
+            cancellable(run_batch(command, args), cancel_token), timeout=timeout
+        )
+    if returncode != 0 or pipe is None:
+        return returncode, output, error
+
+    remaining = max(deadline - asyncio.get_running_loop().time(), 1)
+    return await _run_shell(pipe, remaining, cancel_token, input_text=output)
+
+
+TORRENT_COMMANDS = {"qbt-status", "qbt-watch"}
+
+
+async def _run_torrents(command: str, args: List[str], pipe: Optional[str], timeout: float, cancel_token=None) -> Optional[Tuple[int, str, str]]:
+    """
+    Serve `qbt-status` / `qbt-watch` in-process from the live torrent table.
+
+    Returns:
+        (returncode, stdout, stderr), or None if `qbt-status` should fall back
+        to the script (sync disabled, table stale, or unknown filter)
+    """
+    from bot.config import QBT_SYNC_ENABLED
+    from bot.scheduler import current_chat
+    from bot.torrents import format_status, get_torrent_tracker
+
+    tracker = get_torrent_tracker()
+    if command == "qbt-status":
+        if not QBT_SYNC_ENABLED or len(args) > 1:
+            return None
+        with span("torrents", command=command, filter=args[0] if args else "all") as status_span:
+            torrents = tracker.status(args[0] if args else "all")
+            if torrents is None:
+                status_span.set(fallback=True)
+                return None
+            status_span.set(results=len(torrents))
+        output = format_status(torrents)
+    else:
+        if len(args) != 1:
+            return 1, "", "Usage: qbt-watch <hash|name>"
+        if not QBT_SYNC_ENABLED or not tracker.is_fresh():
+            return 1, "", "Error: torrent tracking is unavailable; check progress with qbt-status instead"
+        chat_id = current_chat.get()
+        if chat_id is None:
+            return 1, "", "Error: qbt-watch only works inside a chat request"
+        matches = [t for t in tracker.find(args[0]) if t.get("progress", 0) < 1]
+        if not matches:
+            return 1, "", f"Error: no unfinished torrent matches '{args[0]}'"
+        for torrent in matches:
+            tracker.watch(torrent["hash"], chat_id)
+        output = "Watching (the chat is notified when each finishes):\n" + "".join(
+            f"- {t.get('name')} ({round(t.get('progress', 0) * 100)}%)\n" for t in matches
+        )
+
+    if pipe is None:
+        return 0, output, ""
+    return await _run_shell(pipe, timeout, cancel_token, input_text=output)
+
+
+async def _run_arr_events(args: List[str], pipe: Optional[str], timeout: float, cancel_token=None) -> Tuple[int, str, str]:
+    """
+    Serve `arr-events [count] [sonarr|radarr]`: recent grabs/imports/renames/deletes
+    reported by the Sonarr/Radarr webhooks.
+
+    Returns:
+        (returncode, stdout, stderr)
+    """
+    from bot.arr_events import format_events, get_arr_events
+
+    receiver = get_arr_events()
+    if receiver is None:
+        return 1, "", "Error: Sonarr/Radarr webhooks are not configured (ARR_WEBHOOK_SECRET); use api-call ... /history"
+
+    count, service = 20, None
+    for arg in args:
+        if arg.isdigit():
+            count = int(arg)
+        elif arg in ("sonarr", "radarr"):
+            service = arg
+        else:
+            return 1, "", "Usage: arr-events [count] [sonarr|radarr]"
+
+    output = format_events(receiver.recent(count, service))
+    if pipe is None:
+        return 0, output, ""
+    return await _run_shell(pipe, timeout, cancel_token, input_text=output)
+
+
+async def run_command(command: str, timeout: float = 120, cancel_token=None) -> Tuple[int, str, str]:
+    """
+    Run an already-vetted command and capture its output.
+
+    Plain `api-call` invocations (optionally piped into other commands) are
+    served in-process by the pooled service client, `sonarr-find` /
+    `radarr-find` by the local library catalog, the batch helpers
+    (`sonarr-search`, `sonarr-monitor`, `radarr-search`) by bot.tools.batch,
+    `qbt-status` / `qbt-watch` by the live torrent table, and `arr-events`
+    by the webhook event log; everything else runs through the shell.
+
+    Returns:
+        (returncode, stdout, stderr)
+
+    Raises:
+        asyncio.TimeoutError: If the command outlives the timeout
+    """
+    from bot.tools.service_client import parse_api_call_command, split_leading_command
+
+    api_call = parse_api_call_command(command)
+    split = None if api_call else split_leading_command(command)
+    served = None
+    if api_call:
+        served = await _run_api_call(api_call, timeout, cancel_token)
+    elif split and split[0][0] in FIND_COMMANDS:
+        tokens, pipe = split
+        served = await _run_find(FIND_COMMANDS[tokens[0]], tokens[1:], pipe, timeout, cancel_token)
+    elif split and split[0][0] in TORRENT_COMMANDS:
+        tokens, pipe = split
+        served = await _run_torrents(tokens[0], tokens[1:], pipe, timeout, cancel_token)
+    elif split and split[0][0] in BATCH_COMMANDS:
+        tokens, pipe = split
+        served = await _run_batch(tokens[0], tokens[1:], pipe, timeout, cancel_token)
+    elif split and split[0][0] == "arr-events":
+        tokens, pipe = split
+        served = await _run_arr_events(tokens[1:], pipe, timeout, cancel_token)
+    if served is None:
+        served = await _run_shell(command, timeout, cancel_token)
+    return served
+
+
+async def execute_command(command: str, timeout: int = 120, raw: bool = False, context: str = "", cancel_token=None, captured: Tuple[int, str, str] = None) -> Dict[str, Any]:
     """
-    Execute a shell command safely.
+    Execute a shell command safely without blocking the event loop.
 
     Args:
-        command: The command to execute
+        command: The command to execute (see run_command for how it is served)
         timeout: Command timeout in seconds
         raw: If True, return output directly without executor processing
         context: Intent description passed to executor for better summarization
+        cancel_token: Optional CancellationToken; the child process is killed when it fires
+        captured: Already-captured (returncode, stdout, stderr) for this command, e.g.
+            from a prefetch; the command isn't run again
 
     Returns:
         dict with keys: success, output, error
@@ -115,44 +421,26 @@ def execute_command(command: str, timeout: int = 120, raw: bool = False, context
         return {"success": False, "output": "", "error": f"Security violation: {error_msg}"}
 
     try:
-        # Add scripts directory to PATH so api-call and recycle-bin are available
-        from bot.config import SCRIPTS_DIR
-
-        env = {"PATH": f"{SCRIPTS_DIR}:/usr/local/bin:/usr/bin:/bin"}
-
-        # Copy over necessary env vars for API authentication
-        import os
-        for key in [
-            "SONARR_API_KEY", "SONARR_URL",
-            "RADARR_API_KEY", "RADARR_URL",
-            "QBITTORRENT_USER", "QBITTORRENT_PASS", "QBITTORRENT_URL",
-            "PLEX_TOKEN", "PLEX_URL",
-            "BAZARR_API_KEY", "BAZARR_URL",
-        ]:
-            if key in os.environ:
-                env[key] = os.environ[key]
-
-        # Execute command
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            env=env,
-        )
+        try:
+            returncode, stdout, stderr = captured or await run_command(command, timeout, cancel_token)
+        except asyncio.TimeoutError:
+            return {
+                "success": False,
+                "output": "",
+                "error": f"Command timed out after {timeout} seconds",
+            }
 
         # If command failed, return error directly (no executor processing needed)
-        if result.returncode != 0:
+        if returncode != 0:
             return {
                 "success": False,
                 "output": "",
-                "error": result.stderr,
+                "error": stderr,
             }
 
         # Raw mode: return output directly with safety cap
         if raw:
-            output = result.stdout
+            output = stdout
             if len(output) > MAX_RAW_OUTPUT_BYTES:
                 output = (
                     output[:MAX_RAW_OUTPUT_BYTES]
@@ -165,15 +453,11 @@ def execute_command(command: str, timeout: int = 120, raw: bool = False, context
         # Route through executor for intelligent processing
         from bot.tools.executor import execute_with_executor
 
-        logger.info(f"Command succeeded, processing output with executor ({len(result.stdout)} chars)")
-        return execute_with_executor(command, result.stdout, context=context)
+        logger.info(f"Command succeeded, processing output with executor ({len(stdout)} chars)")
+        return await execute_with_executor(command, stdout, context=context, cancel_token=cancel_token)
 
-    except subprocess.TimeoutExpired:
-        return {
-            "success": False,
-            "output": "",
-            "error": f"Command timed out after {timeout} seconds",
-        }
+    except (asyncio.CancelledError, JobCancelled):
+        raise
 
     except Exception as e:
         return {"success": False, "output": "", "error": f"Execution error: {str(e)}"}
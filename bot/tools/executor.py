@@ -1,11 +1,30 @@
 """Executor agent for processing command outputs with AI."""
 
 import anthropic
+import asyncio
+import json
 import logging
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional, Tuple
+
+from bot.metrics import EXECUTOR_SECONDS, record_usage
+from bot.scheduler import JobCancelled, cancellable
+from bot.tracing import current_span, span
 
 logger = logging.getLogger(__name__)
 
+# Shared async client (reuses its HTTP connection pool across executor calls)
+_client = None
+
+
+def _get_client() -> anthropic.AsyncAnthropic:
+    """Return the shared executor client, creating it on first use."""
+    global _client
+    if _client is None:
+        from bot.config import ANTHROPIC_API_KEY
+
+        _client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+    return _client
+
 
 def estimate_tokens(text: str) -> int:
     """Rough estimate: 1 token ≈ 4 characters."""
@@ -22,9 +41,10 @@ def should_use_pagination(command: str) -> bool:
     ])
 
 
-def generate_pagination_suggestion(command: str, output_size: int) -> str:
+def generate_pagination_suggestion(command: str, raw_output: str) -> str:
     """Generate specific pagination advice for the command."""
-    estimated_tokens = estimate_tokens(str(output_size))
+    output_size = len(raw_output)
+    estimated_tokens = estimate_tokens(raw_output)
 
     if "plex" in command.lower():
         return (
@@ -34,31 +54,248 @@ def generate_pagination_suggestion(command: str, output_size: int) -> str:
             f"-q 'X-Plex-Container-Start=0&X-Plex-Container-Size=50'\n"
             f"• Filter by genre: api-call plex GET '/library/sections/1/all?genre=Comedy'\n"
             f"• Filter by year: api-call plex GET '/library/sections/1/all?year=2020'\n\n"
-            f"First 2000 characters:\n{str(output_size)[:2000]}"
+            f"First 2000 characters:\n{raw_output[:2000]}"
         )
     elif "radarr" in command.lower():
         return (
             f"⚠️ Response too large ({estimated_tokens:,} tokens, {output_size:,} chars).\n\n"
             f"Use pagination:\n"
             f"• api-call radarr GET /movie -q 'page=1&pageSize=50'\n\n"
-            f"First 2000 characters:\n{str(output_size)[:2000]}"
+            f"First 2000 characters:\n{raw_output[:2000]}"
         )
     elif "sonarr" in command.lower():
         return (
             f"⚠️ Response too large ({estimated_tokens:,} tokens, {output_size:,} chars).\n\n"
             f"Use pagination:\n"
             f"• api-call sonarr GET /series -q 'page=1&pageSize=50'\n\n"
-            f"First 2000 characters:\n{str(output_size)[:2000]}"
+            f"First 2000 characters:\n{raw_output[:2000]}"
         )
     else:
         return (
             f"⚠️ Response too large ({estimated_tokens:,} tokens, {output_size:,} chars).\n\n"
             f"Try limiting the output or using more specific queries.\n\n"
-            f"First 2000 characters:\n{str(output_size)[:2000]}"
+            f"First 2000 characters:\n{raw_output[:2000]}"
         )
 
 
-def execute_with_executor(command: str, raw_output: str, context: str = "") -> Dict[str, Any]:
+def _find_record_list(data: Any, depth: int = 0) -> Optional[Tuple[List[str], list]]:
+    """Locate the largest list of records in parsed JSON (top level or nested up to 3 deep)."""
+    if isinstance(data, list):
+        return [], data
+    if not isinstance(data, dict) or depth >= 3:
+        return None
+
+    best = None
+    for key, value in data.items():
+        found = _find_record_list(value, depth + 1)
+        if found and (best is None or len(found[1]) > len(best[1])):
+            best = ([key] + found[0], found[1])
+    return best
+
+
+def _pack(pieces: List[str], max_chars: int, joiner: str) -> List[List[str]]:
+    """Greedily group pieces into batches whose joined size stays under max_chars."""
+    batches, current, size = [], [], 0
+    for piece in pieces:
+        if current and size + len(piece) + len(joiner) > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece) + len(joiner)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def split_records(raw_output: str, max_chars: int) -> Tuple[List[str], str, str]:
+    """
+    Split output into chunks of at most ~max_chars on record boundaries.
+
+    JSON output is split between elements of its record list (the top-level
+    array, or the largest nested one such as Plex's MediaContainer.Metadata),
+    with each chunk re-serialized compactly. Anything else is split between
+    lines.
+
+    Returns:
+        (chunks, description of the records, JSON envelope around the record list or "")
+    """
+    try:
+        data = json.loads(raw_output)
+    except ValueError:
+        data = None
+
+    found = _find_record_list(data) if data is not None else None
+    if found and found[1]:
+        path, records = found
+        pieces = []
+        for record in records:
+            piece = json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+            if len(piece) > max_chars:
+                piece = piece[:max_chars] + " [record truncated]"
+            pieces.append(piece)
+        chunks = ["[" + ",".join(batch) + "]" for batch in _pack(pieces, max_chars, ",")]
+
+        envelope = ""
+        if path:
+            # Show what surrounds the record list (totals, section names...) without the records
+            outer = data
+            for key in path[:-1]:
+                outer = outer[key]
+            outer[path[-1]] = f"<{len(records)} records, split across parts>"
+            envelope = json.dumps(data, separators=(",", ":"), ensure_ascii=False)[:2000]
+        location = f" at {'.'.join(path)}" if path else ""
+        return chunks, f"{len(records):,} JSON records{location}", envelope
+
+    lines = []
+    for line in raw_output.splitlines():
+        while len(line) > max_chars:
+            lines.append(line[:max_chars])
+            line = line[max_chars:]
+        lines.append(line)
+    chunks = ["\n".join(batch) for batch in _pack(lines, max_chars, "\n")]
+    return chunks, f"{len(lines):,} lines", ""
+
+
+async def call_executor(prompt: str, cancel_token=None, max_tokens: int = None) -> str:
+    """Run one executor model call and return its text."""
+    from bot.config import EXECUTOR_MODEL, MAX_EXECUTOR_OUTPUT_TOKENS
+
+    with span("executor", model=EXECUTOR_MODEL, prompt_chars=len(prompt)) as executor_span:
+        with EXECUTOR_SECONDS.time(model=EXECUTOR_MODEL):
+            response = await cancellable(
+                _get_client().messages.create(
+                    model=EXECUTOR_MODEL,
+                    max_tokens=max_tokens or MAX_EXECUTOR_OUTPUT_TOKENS,
+                    messages=[{"role": "user", "content": prompt}],
+                ),
+                cancel_token,
+            )
+        if response.usage is not None:
+            executor_span.set(input_tokens=response.usage.input_tokens, output_tokens=response.usage.output_tokens)
+    record_usage(EXECUTOR_MODEL, response.usage)
+    return response.content[0].text
+
+
+async def _gather_all(coroutines: List, limit: int) -> List[str]:
+    """Run coroutines with bounded parallelism; cancel the rest if one fails."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    tasks = [asyncio.ensure_future(bounded(c)) for c in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def map_reduce_output(command: str, raw_output: str, context_block: str, cancel_token=None) -> Optional[str]:
+    """
+    Process output too large for one executor call.
+
+    Map: each chunk is processed in parallel, extracting what the context asks
+    for. Reduce: partial results are merged into one answer (in rounds, if
+    the partials themselves exceed the executor's input limit).
+
+    Returns:
+        The merged result, or None if the output needs more than MAX_EXECUTOR_CHUNKS chunks
+    """
+    from bot.config import (
+        EXECUTOR_CHUNK_TOKENS,
+        MAX_EXECUTOR_CHUNKS,
+        MAX_EXECUTOR_INPUT_TOKENS,
+        MAX_PARALLEL_EXECUTOR_CALLS,
+    )
+
+    chunk_chars = min(EXECUTOR_CHUNK_TOKENS, MAX_EXECUTOR_INPUT_TOKENS) * 4
+    chunks, description, envelope = split_records(raw_output, chunk_chars)
+    if len(chunks) > MAX_EXECUTOR_CHUNKS:
+        logger.warning(f"Output needs {len(chunks)} chunks (> {MAX_EXECUTOR_CHUNKS} limit), not map-reducing")
+        return None
+
+    logger.info(f"Map-reduce: {description} in {len(chunks)} chunks")
+    current_span().set(map_reduce_chunks=len(chunks))
+    envelope_block = f"\nThe records sit inside this response envelope:\n{envelope}\n" if envelope else ""
+    need = (
+        "Extract exactly what the agent needs from this part."
+        if context_block else
+        "List every item in this part compactly, one line each with its identifying fields "
+        "(e.g. id, title, year, status, size)."
+    )
+
+    def map_prompt(index: int, chunk: str) -> str:
+        return f"""You are processing one part of a command's output that was too large to read at once.
+Command: {command}
+{context_block}{envelope_block}
+The whole output has {description}, split into {len(chunks)} parts; the other parts are processed separately and merged afterwards.
+{need} Don't drop matching items to save space and don't estimate totals for the whole output — report counts for this part only. Output only the extracted data (JSON snippets preferred), or "No relevant items." if nothing matches.
+
+Part {index + 1}/{len(chunks)}:
+{chunk}"""
+
+    partials = await _gather_all(
+        [call_executor(map_prompt(i, chunk), cancel_token) for i, chunk in enumerate(chunks)],
+        MAX_PARALLEL_EXECUTOR_CALLS,
+    )
+
+    def reduce_prompt(parts: List[str]) -> str:
+        body = "\n\n".join(f"### Part {i + 1}/{len(parts)}\n{part}" for i, part in enumerate(parts))
+        return f"""You ran this command: {command}
+{context_block}
+Its output ({description}) was too large to read at once, so it was split into parts and each part was processed separately. Merge the partial results below into one answer:
+• Combine the lists, drop duplicates and "No relevant items." parts
+• Add up per-part counts so totals are exact
+• If the merged list is long, show the most relevant items and say how many more there are
+• Note any errors or warnings
+• Prefer JSON snippets over prose descriptions
+
+The main agent needs accurate information to respond to the user.
+
+Partial results:
+{body}"""
+
+    # Merge in rounds until everything fits in one reduce call
+    max_reduce_chars = MAX_EXECUTOR_INPUT_TOKENS * 4
+    while len(partials) > 1 and len(reduce_prompt(partials)) > max_reduce_chars:
+        groups = _pack(partials, max_reduce_chars // 2, "\n\n")
+        if len(groups) == len(partials):
+            break  # partials can't be grouped any tighter
+        partials = await _gather_all(
+            [call_executor(reduce_prompt(group), cancel_token) for group in groups],
+            MAX_PARALLEL_EXECUTOR_CALLS,
+        )
+
+    return await call_executor(reduce_prompt(partials), cancel_token)
+
+
+def _oversized_output(command: str, raw_output: str, estimated_tokens: int) -> Dict[str, Any]:
+    """Fallback for output beyond even the map-reduce limit: pagination advice or truncation."""
+    if should_use_pagination(command):
+        return {
+            "success": False,
+            "output": "",
+            "error": generate_pagination_suggestion(command, raw_output),
+        }
+
+    # For non-API commands, truncate with warning
+    return {
+        "success": True,
+        "output": (
+            f"⚠️ Output too large to process ({estimated_tokens:,} tokens). "
+            f"Showing first 4000 characters:\n\n"
+            f"{raw_output[:4000]}\n\n"
+            f"[... truncated {len(raw_output) - 4000:,} characters]"
+        ),
+        "error": "",
+    }
+
+
+async def execute_with_executor(command: str, raw_output: str, context: str = "", cancel_token=None) -> Dict[str, Any]:
     """
     Process command output using executor AI agent.
 
@@ -66,57 +303,42 @@ def execute_with_executor(command: str, raw_output: str, context: str = "") -> D
     - Returns short outputs as-is
     - Summarizes long outputs
     - Extracts structured data from API responses
+    - Map-reduces outputs larger than MAX_EXECUTOR_INPUT_TOKENS
 
     Args:
         command: The command that was executed
         raw_output: The raw output from the command
         context: Optional intent from the orchestrator describing what data is needed
+        cancel_token: Optional CancellationToken that aborts the executor call
 
     Returns:
         Dict with success, output, and error keys
     """
-    from bot.config import (
-        ANTHROPIC_API_KEY,
-        EXECUTOR_MODEL,
-        MAX_EXECUTOR_INPUT_TOKENS,
-        MAX_EXECUTOR_OUTPUT_TOKENS,
-    )
-
-    # Pre-flight check: is output too large for executor?
-    estimated_tokens = estimate_tokens(raw_output)
-
-    if estimated_tokens > MAX_EXECUTOR_INPUT_TOKENS:
-        logger.warning(
-            f"Output too large for executor: {estimated_tokens:,} tokens "
-            f"({len(raw_output):,} chars) > {MAX_EXECUTOR_INPUT_TOKENS:,} limit"
-        )
-
-        # Return helpful pagination suggestion
-        if should_use_pagination(command):
-            return {
-                "success": False,
-                "output": "",
-                "error": generate_pagination_suggestion(command, len(raw_output)),
-            }
-        else:
-            # For non-API commands, truncate with warning
-            return {
-                "success": True,
-                "output": (
-                    f"⚠️ Output too large to process ({estimated_tokens:,} tokens). "
-                    f"Showing first 4000 characters:\n\n"
-                    f"{raw_output[:4000]}\n\n"
-                    f"[... truncated {len(raw_output) - 4000:,} characters]"
-                ),
-                "error": "",
-            }
+    from bot.config import EXECUTOR_MODEL, MAX_EXECUTOR_INPUT_TOKENS
 
-    # Output is reasonable size, send to executor AI
     context_block = ""
     if context:
         context_block = f"\nThe agent specifically needs: {context}\nPrioritize returning exactly what was requested.\n"
 
-    executor_prompt = f"""You are a command execution assistant. You ran this command:
+    estimated_tokens = estimate_tokens(raw_output)
+
+    try:
+        # Too large for one executor call: split, process chunks in parallel, merge
+        if estimated_tokens > MAX_EXECUTOR_INPUT_TOKENS:
+            logger.info(
+                f"Output too large for one executor call: {estimated_tokens:,} tokens "
+                f"({len(raw_output):,} chars) > {MAX_EXECUTOR_INPUT_TOKENS:,} limit, map-reducing"
+            )
+            processed_output = await map_reduce_output(command, raw_output, context_block, cancel_token)
+            if processed_output is None:
+                return _oversized_output(command, raw_output, estimated_tokens)
+
+            logger.info(
+                f"Executor map-reduced {len(raw_output):,} chars → {len(processed_output):,} chars"
+            )
+            return {"success": True, "output": processed_output, "error": ""}
+
+        executor_prompt = f"""You are a command execution assistant. You ran this command:
 {command}
 {context_block}
 The full output is below. Your job:
@@ -135,20 +357,11 @@ The main agent needs accurate information to respond to the user.
 Output:
 {raw_output}"""
 
-    try:
-        client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-
         logger.info(
             f"Calling executor ({EXECUTOR_MODEL}) with {estimated_tokens:,} token input"
         )
 
-        response = client.messages.create(
-            model=EXECUTOR_MODEL,
-            max_tokens=MAX_EXECUTOR_OUTPUT_TOKENS,
-            messages=[{"role": "user", "content": executor_prompt}],
-        )
-
-        processed_output = response.content[0].text
+        processed_output = await call_executor(executor_prompt, cancel_token)
 
         logger.info(
             f"Executor processed {len(raw_output):,} chars → {len(processed_output):,} chars"
@@ -187,6 +400,9 @@ Output:
                 "error": f"Processing error: {str(e)}",
             }
 
+    except JobCancelled:
+        raise
+
     except Exception as e:
         logger.error(f"Unexpected error in executor: {e}", exc_info=True)
         return {
@@ -0,0 +1,452 @@
+"""
+Workflow macros: multi-step Sonarr/Radarr/qBittorrent/Plex workflows as single tools.
+
+Each macro runs the whole sequence the skill docs describe — lookup,
+profile/root folder selection, the mutation, and the Rule 3 verification
+GET — server-side, and returns one compact JSON result. Ambiguous input
+(several equally good lookup matches) returns candidates instead of
+guessing, so the agent can ask the user.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import re
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote, urlencode
+
+from bot.catalog import normalize_title
+
+logger = logging.getLogger(__name__)
+
+VERIFY_TIMEOUT = 10.0  # seconds to wait for an asynchronous change to show up
+VERIFY_INTERVAL = 1.0
+MAX_CANDIDATES = 5
+
+SERIES_MONITOR_OPTIONS = ["all", "future", "missing", "existing", "firstSeason", "latestSeason", "pilot", "none"]
+
+# Tool definitions (appended to the agent's TOOLS)
+MACRO_TOOLS = [
+    {
+        "name": "add_series",
+        "description": (
+            "Add a TV series to Sonarr in one step: looks it up, picks the quality profile and root folder, "
+            "adds it, optionally starts the search, and verifies it with a follow-up GET. "
+            "Returns status 'added', 'exists' (already in the library) or 'ambiguous' (with candidates to ask about)."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string", "description": "Series title to look up"},
+                "tvdb_id": {"type": "integer", "description": "TVDB ID, to pick an exact match"},
+                "year": {"type": "integer", "description": "First-aired year, to disambiguate remakes"},
+                "quality_profile": {"type": "string", "description": "Quality profile name (default: the first profile)"},
+                "root_folder": {"type": "string", "description": "Root folder path (default: the first root folder)"},
+                "monitor": {
+                    "type": "string",
+                    "enum": SERIES_MONITOR_OPTIONS,
+                    "description": "Which episodes to monitor (default: all)",
+                },
+                "search": {"type": "boolean", "description": "Search for missing episodes right away (default: true)"},
+            },
+            "required": ["title"],
+        },
+    },
+    {
+        "name": "add_movie",
+        "description": (
+            "Add a movie to Radarr in one step: looks it up, picks the quality profile and root folder, "
+            "adds it, optionally starts the search, and verifies it with a follow-up GET. "
+            "Returns status 'added', 'exists' or 'ambiguous' (with candidates to ask about)."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string", "description": "Movie title to look up"},
+                "tmdb_id": {"type": "integer", "description": "TMDB ID, to pick an exact match"},
+                "year": {"type": "integer", "description": "Release year, to disambiguate remakes"},
+                "quality_profile": {"type": "string", "description": "Quality profile name (default: the first profile)"},
+                "root_folder": {"type": "string", "description": "Root folder path (default: the first root folder)"},
+                "search": {"type": "boolean", "description": "Search for the movie right away (default: true)"},
+            },
+            "required": ["title"],
+        },
+    },
+    {
+        "name": "add_torrent",
+        "description": (
+            "Add a magnet link or torrent URL to qBittorrent and verify it appears in the torrent list. "
+            "The chat is notified when it finishes. Returns status 'added' or 'duplicate'."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "url": {"type": "string", "description": "Magnet link or .torrent URL"},
+                "savepath": {"type": "string", "description": "Download directory (default: qBittorrent's default)"},
+                "category": {"type": "string", "description": "qBittorrent category (e.g. tv-sonarr, radarr)"},
+            },
+            "required": ["url"],
+        },
+    },
+    {
+        "name": "refresh_library",
+        "description": (
+            "Start a Plex library scan (movies, tv or all) and verify that it started. "
+            "Use after moving or organizing files."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "section": {
+                    "type": "string",
+                    "enum": ["movies", "tv", "all"],
+                    "description": "Which library to scan (default: all)",
+                },
+            },
+        },
+    },
+]
+
+# Macro tool name -> (service it changes)
+MACRO_SERVICES = {"add_series": "sonarr", "add_movie": "radarr", "add_torrent": "qbt", "refresh_library": "plex"}
+
+
+class MacroError(Exception):
+    """A macro step failed; the message says which one."""
+
+
+async def _call(service: str, method: str, endpoint: str, query: str = None, body: Any = None, fresh: bool = False) -> Dict[str, Any]:
+    """Make a service request, raising MacroError on transport failures."""
+    from bot.tools.service_client import ServiceError, get_service_client
+
+    try:
+        return await get_service_client().request(
+            service, method, endpoint, query, json.dumps(body) if body is not None else None, fresh=fresh
+        )
+    except ServiceError as e:
+        raise MacroError(f"{service} {method} {endpoint}: {e}") from e
+
+
+async def _get_json(service: str, endpoint: str, query: str = None, fresh: bool = False) -> Any:
+    response = await _call(service, "GET", endpoint, query, fresh=fresh)
+    if not response["ok"]:
+        raise MacroError(f"{service} GET {endpoint} returned HTTP {response['status']}: {response['text'][:200]}")
+    return response["json"]
+
+
+def _result(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {"success": True, "output": json.dumps(payload, ensure_ascii=False), "error": ""}
+
+
+def _candidate(item: Dict[str, Any], id_field: str) -> Dict[str, Any]:
+    return {"title": item.get("title"), "year": item.get("year"), id_field: item.get(id_field)}
+
+
+def _pick(results: List[Dict[str, Any]], title: str, id_field: str, wanted_id: Optional[int], year: Optional[int]):
+    """
+    Choose the lookup result to add.
+
+    Returns:
+        (chosen item or None, candidates when the choice is ambiguous)
+    """
+    if wanted_id is not None:
+        chosen = next((item for item in results if item.get(id_field) == wanted_id), None)
+        return chosen, [] if chosen else [_candidate(item, id_field) for item in results[:MAX_CANDIDATES]]
+
+    if year is not None:
+        results = [item for item in results if item.get("year") == year] or results
+    norm = normalize_title(title)
+    exact = [item for item in results if normalize_title(item.get("title") or "") == norm]
+    if len(exact) == 1:
+        return exact[0], []
+    pool = exact or results
+    if len(pool) == 1 or (year is not None and pool):
+        return pool[0], []
+    return None, [_candidate(item, id_field) for item in pool[:MAX_CANDIDATES]]
+
+
+async def _profile_and_folder(service: str, quality_profile: Optional[str], root_folder: Optional[str]) -> Dict[str, Any]:
+    """Resolve the quality profile and root folder to add with (the first of each by default)."""
+    profiles, folders = await asyncio.gather(
+        _get_json(service, "/qualityprofile"), _get_json(service, "/rootfolder")
+    )
+    if not profiles:
+        raise MacroError(f"{service} has no quality profiles")
+    if not folders:
+        raise MacroError(f"{service} has no root folders")
+
+    profile = profiles[0]
+    if quality_profile:
+        profile = next((p for p in profiles if p.get("name", "").lower() == quality_profile.lower()), None)
+        if profile is None:
+            raise MacroError(
+                f"No quality profile '{quality_profile}' (available: {', '.join(p.get('name', '') for p in profiles)})"
+            )
+    folder = folders[0]
+    if root_folder:
+        folder = next((f for f in folders if f.get("path", "").rstrip("/") == root_folder.rstrip("/")), None)
+        if folder is None:
+            raise MacroError(
+                f"No root folder '{root_folder}' (available: {', '.join(f.get('path', '') for f in folders)})"
+            )
+    return {"profile": profile, "folder": folder}
+
+
+async def add_series(tool_input: Dict[str, Any]) -> Dict[str, Any]:
+    title = tool_input["title"]
+    tvdb_id = tool_input.get("tvdb_id")
+    term = f"tvdb:{tvdb_id}" if tvdb_id else title
+    results = await _get_json("sonarr", "/series/lookup", urlencode({"term": term}, quote_via=quote))
+    if not results:
+        return {"success": False, "output": "", "error": f"No series found for '{term}'"}
+
+    series, candidates = _pick(results, title, "tvdbId", tvdb_id, tool_input.get("year"))
+    if series is None:
+        return _result({"status": "ambiguous", "candidates": candidates})
+    if series.get("id"):
+        return _result({"status": "exists", "series": {
+            "id": series["id"], "title": series.get("title"), "year": series.get("year"),
+            "monitored": series.get("monitored"), "path": series.get("path"),
+        }})
+
+    chosen = await _profile_and_folder("sonarr", tool_input.get("quality_profile"), tool_input.get("root_folder"))
+    search = tool_input.get("search", True)
+    payload = dict(series)
+    payload.update({
+        "qualityProfileId": chosen["profile"]["id"],
+        "rootFolderPath": chosen["folder"]["path"],
+        "seasonFolder": True,
+        "monitored": tool_input.get("monitor", "all") != "none",
+        "addOptions": {"monitor": tool_input.get("monitor", "all"), "searchForMissingEpisodes": search},
+    })
+    # Sonarr v3 also needs a language profile (v4 dropped them)
+    languages = await _call("sonarr", "GET", "/languageprofile")
+    if languages["ok"] and languages["json"]:
+        payload["languageProfileId"] = languages["json"][0]["id"]
+
+    response = await _call("sonarr", "POST", "/series", body=payload)
+    if not response["ok"] or not isinstance(response["json"], dict):
+        raise MacroError(f"sonarr POST /series returned HTTP {response['status']}: {response['text'][:300]}")
+    added = response["json"]
+
+    # Rule 3: confirm it's really there
+    verified = await _get_json("sonarr", f"/series/{added['id']}", fresh=True)
+    return _result({
+        "status": "added",
+        "verified": verified.get("id") == added["id"],
+        "series": {
+            "id": verified.get("id"), "title": verified.get("title"), "year": verified.get("year"),
+            "tvdbId": verified.get("tvdbId"), "seasons": verified.get("seasonCount", len(verified.get("seasons") or [])),
+            "monitored": verified.get("monitored"), "path": verified.get("path"),
+        },
+        "quality_profile": chosen["profile"].get("name"),
+        "search_started": search,
+    })
+
+
+async def add_movie(tool_input: Dict[str, Any]) -> Dict[str, Any]:
+    title = tool_input["title"]
+    tmdb_id = tool_input.get("tmdb_id")
+    term = f"tmdb:{tmdb_id}" if tmdb_id else title
+    results = await _get_json("radarr", "/movie/lookup", urlencode({"term": term}, quote_via=quote))
+    if not results:
+        return {"success": False, "output": "", "error": f"No movie found for '{term}'"}
+
+    movie, candidates = _pick(results, title, "tmdbId", tmdb_id, tool_input.get("year"))
+    if movie is None:
+        return _result({"status": "ambiguous", "candidates": candidates})
+    if movie.get("id"):
+        return _result({"status": "exists", "movie": {
+            "id": movie["id"], "title": movie.get("title"), "year": movie.get("year"),
+            "monitored": movie.get("monitored"), "hasFile": movie.get("hasFile"),
+        }})
+
+    chosen = await _profile_and_folder("radarr", tool_input.get("quality_profile"), tool_input.get("root_folder"))
+    search = tool_input.get("search", True)
+    payload = dict(movie)
+    payload.update({
+        "qualityProfileId": chosen["profile"]["id"],
+        "rootFolderPath": chosen["folder"]["path"],
+        "monitored": True,
+        "addOptions": {"searchForMovie": search},
+    })
+    response = await _call("radarr", "POST", "/movie", body=payload)
+    if not response["ok"] or not isinstance(response["json"], dict):
+        raise MacroError(f"radarr POST /movie returned HTTP {response['status']}: {response['text'][:300]}")
+    added = response["json"]
+
+    verified = await _get_json("radarr", f"/movie/{added['id']}", fresh=True)
+    return _result({
+        "status": "added",
+        "verified": verified.get("id") == added["id"],
+        "movie": {
+            "id": verified.get("id"), "title": verified.get("title"), "year": verified.get("year"),
+            "tmdbId": verified.get("tmdbId"), "monitored": verified.get("monitored"), "path": verified.get("path"),
+        },
+        "quality_profile": chosen["profile"].get("name"),
+        "search_started": search,
+    })
+
+
+def magnet_hash(url: str) -> Optional[str]:
+    """The lowercase hex v1 info-hash of a magnet link, if it has one."""
+    match = re.search(r"xt=urn:btih:([0-9a-fA-F]{40}|[A-Za-z2-7]{32})(?:&|$)", url)
+    if not match:
+        return None
+    value = match.group(1)
+    if len(value) == 32:
+        return base64.b32decode(value.upper()).hex()
+    return value.lower()
+
+
+def _torrent_summary(torrent: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": torrent.get("name"),
+        "hash": torrent.get("hash"),
+        "state": torrent.get("state"),
+        "progress": f"{round(torrent.get('progress', 0) * 100)}%",
+        "size_gb": round(max(torrent.get("total_size", 0), 0) / 1024 ** 3, 2),
+    }
+
+
+async def add_torrent(tool_input: Dict[str, Any]) -> Dict[str, Any]:
+    from bot.config import QBT_SYNC_ENABLED
+
+    url = tool_input["url"].strip()
+    info_hash = magnet_hash(url)
+    recent_query = "sort=added_on&reverse=true&limit=20"
+
+    if info_hash:
+        existing = await _get_json("qbt", "/torrents/info", f"hashes={info_hash}", fresh=True)
+        if existing:
+            return _result({"status": "duplicate", "torrent": _torrent_summary(existing[0])})
+        before = set()
+    else:
+        before = {t["hash"] for t in await _get_json("qbt", "/torrents/info", recent_query, fresh=True)}
+
+    form = {"urls": url}
+    if tool_input.get("savepath"):
+        form["savepath"] = tool_input["savepath"]
+    if tool_input.get("category"):
+        form["category"] = tool_input["category"]
+    response = await _call("qbt", "POST", "/torrents/add", body=form)
+    if not response["ok"] or response["text"].strip().lower().startswith("fails"):
+        raise MacroError(f"qBittorrent rejected the torrent: {response['text'][:200] or response['status']}")
+
+    # qBittorrent adds asynchronously (and magnets start without metadata); poll until it's listed
+    deadline = time.monotonic() + VERIFY_TIMEOUT
+    torrent = None
+    while torrent is None:
+        if info_hash:
+            listed = await _get_json("qbt", "/torrents/info", f"hashes={info_hash}", fresh=True)
+        else:
+            listed = [t for t in await _get_json("qbt", "/torrents/info", recent_query, fresh=True) if t["hash"] not in before]
+        if listed:
+            torrent = listed[0]
+        elif time.monotonic() >= deadline:
+            break
+        else:
+            await asyncio.sleep(VERIFY_INTERVAL)
+
+    if torrent is None:
+        return _result({
+            "status": "added",
+            "verified": False,
+            "note": f"qBittorrent accepted the request but the torrent wasn't listed within {VERIFY_TIMEOUT:.0f}s",
+        })
+    return _result({
+        "status": "added",
+        "verified": True,
+        "torrent": _torrent_summary(torrent),
+        "notify_on_completion": QBT_SYNC_ENABLED,
+    })
+
+
+async def _plex_sections() -> List[Dict[str, Any]]:
+    """Plex library sections (Plex answers in XML unless asked for JSON)."""
+    response = await _call("plex", "GET", "/library/sections", fresh=True)
+    if not response["ok"]:
+        raise MacroError(f"plex GET /library/sections returned HTTP {response['status']}")
+    if isinstance(response["json"], dict):
+        return response["json"].get("MediaContainer", {}).get("Directory", [])
+    try:
+        root = ElementTree.fromstring(response["text"])
+    except ElementTree.ParseError as e:
+        raise MacroError(f"Unreadable Plex section list: {e}") from e
+    return [dict(directory.attrib) for directory in root.iter("Directory")]
+
+
+async def refresh_library(tool_input: Dict[str, Any]) -> Dict[str, Any]:
+    wanted = tool_input.get("section", "all")
+    types = {"movies": {"movie"}, "tv": {"show"}, "all": {"movie", "show"}}.get(wanted)
+    if types is None:
+        return {"success": False, "output": "", "error": f"Unknown section '{wanted}' (use movies, tv or all)"}
+
+    sections = [s for s in await _plex_sections() if s.get("type") in types]
+    if not sections:
+        return {"success": False, "output": "", "error": f"No Plex {wanted} library sections found"}
+
+    before = {s["key"]: s.get("scannedAt") for s in sections}
+    for section in sections:
+        response = await _call("plex", "GET", f"/library/sections/{section['key']}/refresh")
+        if not response["ok"]:
+            raise MacroError(f"Plex refresh of '{section.get('title')}' returned HTTP {response['status']}")
+
+    # A scan shows up as refreshing=1 or a newer scannedAt
+    started: Dict[str, bool] = {key: False for key in before}
+    deadline = time.monotonic() + VERIFY_TIMEOUT
+    while True:
+        for section in await _plex_sections():
+            key = section.get("key")
+            if key in started and (section.get("refreshing") in (True, 1, "1") or section.get("scannedAt") != before[key]):
+                started[key] = True
+        if all(started.values()) or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(VERIFY_INTERVAL)
+
+    return _result({
+        "status": "scanning",
+        "verified": all(started.values()),
+        "sections": [
+            {"key": s["key"], "title": s.get("title"), "scan_started": started[s["key"]]} for s in sections
+        ],
+    })
+
+
+MACROS = {
+    "add_series": add_series,
+    "add_movie": add_movie,
+    "add_torrent": add_torrent,
+    "refresh_library": refresh_library,
+}
+
+
+async def run_macro(name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a workflow macro.
+
+    Args:
+        name: Macro tool name (a MACROS key)
+        tool_input: The tool call's input
+
+    Returns:
+        dict with keys: success, output, error
+    """
+    from bot.scheduler import JobCancelled
+
+    schema = next(tool["input_schema"] for tool in MACRO_TOOLS if tool["name"] == name)
+    missing = [field for field in schema.get("required", []) if not tool_input.get(field)]
+    if missing:
+        return {"success": False, "output": "", "error": f"Missing required field(s): {', '.join(missing)}"}
+    try:
+        return await MACROS[name](tool_input)
+    except MacroError as e:
+        return {"success": False, "output": "", "error": str(e)}
+    except JobCancelled:
+        raise
+    except Exception as e:  # unexpected response shapes
+        logger.exception(f"Macro {name} failed")
+        return {"success": False, "output": "", "error": f"{name} failed: {e!r}"}
@@ -0,0 +1,215 @@
+"""Read-through TTL cache for service GETs, with mutation-aware invalidation."""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cacheable GET endpoints and their TTLs in seconds. Unmatched endpoints are never cached.
+CACHE_TTLS = {
+    "sonarr": [
+        (r"^/series/lookup", 300),
+        (r"^/series(/\d+)?$", 60),
+        (r"^/episode", 30),
+        (r"^/(qualityprofile|languageprofile|rootfolder|tag)", 3600),
+        (r"^/(queue|wanted/missing|history)", 10),
+        (r"^/system/status", 30),
+    ],
+    "radarr": [
+        (r"^/movie/lookup", 300),
+        (r"^/movie(/\d+)?$", 60),
+        (r"^/(qualityprofile|rootfolder|tag)", 3600),
+        (r"^/(queue|history)", 10),
+        (r"^/system/status", 30),
+    ],
+    "qbt": [
+        (r"^/torrents/(info|files|properties)", 5),
+    ],
+    "plex": [
+        (r"^/library/sections$", 300),
+        (r"^/library/sections/\d+/all", 60),
+        (r"^/library/recentlyAdded", 30),
+    ],
+    "bazarr": [
+        (r"^/(badges|system/status)", 30),
+    ],
+}
+
+# Which cached resources (first path segment) a mutation to a resource affects.
+# Mutations to resources not listed here invalidate the whole service.
+INVALIDATES = {
+    "sonarr": {
+        "series": ["series", "episode", "queue", "wanted", "history"],
+        "episode": ["episode", "series", "wanted"],
+        "command": ["series", "episode", "queue", "wanted", "history"],
+        "queue": ["queue", "history"],
+    },
+    "radarr": {
+        "movie": ["movie", "queue", "history"],
+        "command": ["movie", "queue", "history"],
+        "queue": ["queue", "history"],
+    },
+    "qbt": {
+        "torrents": ["torrents"],
+    },
+}
+
+# GET endpoints that change server state (treated as mutations, never cached)
+MUTATING_GETS = {
+    "plex": [r"/refresh$"],
+}
+
+MAX_ENTRIES = 256
+
+
+def _resource(endpoint: str) -> str:
+    """First path segment of an endpoint ('/series/12' -> 'series')."""
+    return endpoint.strip("/").split("/", 1)[0].split("?", 1)[0]
+
+
+def _consume_exception(task: asyncio.Task):
+    """Retrieve a shared load's exception so an unawaited failure isn't logged as lost."""
+    if not task.cancelled():
+        task.exception()
+
+
+def is_mutating_get(service: str, endpoint: str) -> bool:
+    """Check whether a GET endpoint has side effects (e.g. Plex library refresh)."""
+    return any(re.search(pattern, endpoint) for pattern in MUTATING_GETS.get(service, []))
+
+
+class ServiceCache:
+    """
+    TTL cache in front of service GETs.
+
+    - Identical concurrent GETs share one upstream request.
+    - POST/PUT/PATCH/DELETE to a service invalidates the resources it affects.
+    - For a short window after a mutation, GETs to that service bypass the cache
+      so verification reads (AGENT.md Rule 3) always see fresh upstream state.
+    """
+
+    def __init__(self, verify_window: float = 30.0, max_entries: int = MAX_ENTRIES):
+        self.verify_window = verify_window
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self._generation: Dict[str, int] = {}
+        self._mutated_at: Dict[str, float] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bypassed = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def ttl_for(service: str, endpoint: str) -> int:
+        """TTL for an endpoint, or 0 if it isn't cacheable."""
+        for pattern, ttl in CACHE_TTLS.get(service, []):
+            if re.search(pattern, endpoint):
+                return ttl
+        return 0
+
+    async def fetch(
+        self,
+        service: str,
+        endpoint: str,
+        query: Optional[str],
+        loader: Callable[[], Awaitable[Dict[str, Any]]],
+        fresh: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Return a cached response or load it upstream.
+
+        Args:
+            service: Service name
+            endpoint: Endpoint path
+            query: Query string (part of the cache key)
+            loader: Coroutine function performing the upstream GET
+            fresh: Skip cached entries (the result still refreshes the cache)
+        """
+        ttl = self.ttl_for(service, endpoint)
+        if ttl <= 0:
+            return await loader()
+
+        key = (service, endpoint, query or "")
+        now = time.monotonic()
+
+        verifying = now - self._mutated_at.get(service, float("-inf")) < self.verify_window
+        if fresh or verifying:
+            self.bypassed += 1
+        else:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        generation = self._generation.get(service, 0)
+        inflight_key = key + (generation,)
+        task = self._inflight.get(inflight_key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # The upstream load runs as its own task so one caller being cancelled
+            # doesn't fail the other callers sharing it
+            task = asyncio.ensure_future(self._load(key, inflight_key, generation, ttl, loader))
+            task.add_done_callback(_consume_exception)
+            self._inflight[inflight_key] = task
+
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Tuple, inflight_key: Tuple, generation: int, ttl: int, loader) -> Dict[str, Any]:
+        """Load upstream and store the result unless a mutation raced with it."""
+        try:
+            response = await loader()
+            if response.get("ok") and self._generation.get(key[0], 0) == generation:
+                self._store(key, response, ttl)
+            return response
+        finally:
+            self._inflight.pop(inflight_key, None)
+
+    def record_mutation(self, service: str, endpoint: str):
+        """Invalidate what a mutation affects and open the verification window."""
+        self._generation[service] = self._generation.get(service, 0) + 1
+        self._mutated_at[service] = time.monotonic()
+
+        affected = INVALIDATES.get(service, {}).get(_resource(endpoint))
+        self.invalidate(service, affected)
+
+    def invalidate(self, service: str, resources: Optional[List[str]] = None):
+        """Drop cached entries for a service (optionally only some resources)."""
+        stale = [
+            key for key in self._entries
+            if key[0] == service and (resources is None or _resource(key[1]) in resources)
+        ]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self.invalidations += len(stale)
+            logger.info(f"Cache: invalidated {len(stale)} {service} entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+    def _store(self, key: Tuple, response: Dict[str, Any], ttl: int):
+        self._entries[key] = (time.monotonic() + ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,398 @@
+"""
+In-process API client for Blackbeard services.
+
+Handles authentication for Sonarr, Radarr, qBittorrent, Plex, and Bazarr and keeps
+a persistent keep-alive connection pool per service. The qBittorrent session
+cookie is cached and only re-acquired when the API answers 403.
+
+`scripts/api-call` is a thin CLI wrapper around this module, and
+`execute_command` routes `api-call ...` invocations here directly instead of
+spawning a new interpreter for every call.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shlex
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+import httpx
+
+from bot.metrics import SERVICE_REQUEST_SECONDS
+from bot.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Service configurations
+SERVICES = {
+    "sonarr": {
+        "base_url": os.getenv("SONARR_URL", "http://192.168.1.14:8989"),
+        "api_path": "/api/v3",
+        "auth_type": "header",
+        "auth_header": "X-Api-Key",
+        "auth_value": os.getenv("SONARR_API_KEY"),
+    },
+    "radarr": {
+        "base_url": os.getenv("RADARR_URL", "http://192.168.1.14:7878"),
+        "api_path": "/api/v3",
+        "auth_type": "header",
+        "auth_header": "X-Api-Key",
+        "auth_value": os.getenv("RADARR_API_KEY"),
+    },
+    "plex": {
+        "base_url": os.getenv("PLEX_URL", "http://192.168.1.14:32400"),
+        "auth_type": "header",
+        "auth_header": "X-Plex-Token",
+        "auth_value": os.getenv("PLEX_TOKEN"),
+    },
+    "qbt": {
+        "base_url": os.getenv("QBITTORRENT_URL", "http://192.168.1.14:8080"),
+        "api_path": "/api/v2",
+        "auth_type": "cookie",
+        "username": os.getenv("QBITTORRENT_USER", "admin"),
+        "password": os.getenv("QBITTORRENT_PASS"),
+    },
+    "bazarr": {
+        "base_url": os.getenv("BAZARR_URL", "http://192.168.1.14:6767"),
+        "api_path": "/api",
+        "auth_type": "header",
+        "auth_header": "X-API-KEY",
+        "auth_value": os.getenv("BAZARR_API_KEY"),
+    },
+}
+
+REQUEST_TIMEOUT = 120  # seconds
+MAX_CONNECTIONS_PER_SERVICE = 10
+
+
+class ServiceError(Exception):
+    """Raised when a service request can't be made (bad config, auth or network failure)."""
+
+
+def parse_query_string(query_str):
+    """Parse query string like 'key1=value1&key2=value2' into dict (percent-escapes are decoded)."""
+    if not query_str:
+        return {}
+    params = {}
+    for item in query_str.split("&"):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            params[unquote(key)] = unquote(value)
+    return params
+
+
+def parse_api_call_args(args: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parse api-call arguments: <service> <method> <endpoint> [-q QUERY] [-d DATA].
+
+    Returns:
+        Dict with service, method, endpoint, query, data — or None if malformed
+    """
+    if len(args) < 3:
+        return None
+
+    parsed = {"service": args[0], "method": args[1], "endpoint": args[2], "query": None, "data": None}
+
+    i = 3
+    while i < len(args):
+        if args[i] in ["-q", "--query"] and i + 1 < len(args):
+            parsed["query"] = args[i + 1]
+            i += 2
+        elif args[i] in ["-d", "--data"] and i + 1 < len(args):
+            parsed["data"] = args[i + 1]
+            i += 2
+        else:
+            return None
+
+    return parsed
+
+
+def format_output(response: Dict[str, Any]) -> str:
+    """Render a response the way the api-call CLI prints it (pretty JSON or raw text)."""
+    if response["json"] is not None:
+        return json.dumps(response["json"], indent=2) + "\n"
+    text = response["text"]
+    return text if text.endswith("\n") else text + "\n"
+
+
+class ServiceClient:
+    """Authenticated, connection-pooled client for all configured services."""
+
+    def __init__(self, services: Dict[str, Dict[str, Any]] = None, cache=None):
+        self.services = services or SERVICES
+        self.cache = cache  # Optional ServiceCache for GETs
+        # Called as listener(service, method, endpoint, response) after each mutation
+        self.mutation_listeners: List[Callable[[str, str, str, Dict[str, Any]], None]] = []
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._login_locks: Dict[str, asyncio.Lock] = {}
+        self._logged_in: Dict[str, bool] = {}
+
+    def _get_http(self, service: str) -> httpx.AsyncClient:
+        """Return the pooled HTTP client for a service, creating it on first use."""
+        client = self._clients.get(service)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS_PER_SERVICE,
+                    max_keepalive_connections=MAX_CONNECTIONS_PER_SERVICE,
+                ),
+            )
+            self._clients[service] = client
+        return client
+
+    def _url(self, service: str, endpoint: str) -> str:
+        config = self.services[service]
+        return f"{config['base_url']}{config.get('api_path', '')}{endpoint}"
+
+    async def _login(self, service: str, force: bool = False):
+        """Log in to qBittorrent once; the SID cookie lives in the pooled client's jar."""
+        lock = self._login_locks.setdefault(service, asyncio.Lock())
+        async with lock:
+            if self._logged_in.get(service) and not force:
+                return
+
+            config = self.services[service]
+            if not config["password"]:
+                raise ServiceError("qBittorrent password not found in environment")
+
+            try:
+                response = await self._get_http(service).post(
+                    self._url(service, "/auth/login"),
+                    data={"username": config["username"], "password": config["password"]},
+                )
+            except httpx.HTTPError as e:
+                raise ServiceError(f"Request failed: {e}")
+
+            if response.text != "Ok.":
+                raise ServiceError(f"qBittorrent login failed: {response.text}")
+
+            self._logged_in[service] = True
+            logger.info("qBittorrent session established")
+
+    async def request(self, service: str, method: str, endpoint: str, query: str = None, data: str = None, fresh: bool = False) -> Dict[str, Any]:
+        """
+        Make an authenticated request to a service.
+
+        GETs are served through the response cache when one is configured;
+        mutations invalidate the affected cached resources and are reported to
+        mutation_listeners.
+
+        Args:
+            service: Service name (sonarr, radarr, qbt, plex, bazarr)
+            method: HTTP method
+            endpoint: Endpoint path below the service's API root
+            query: Optional query string ('key=value&key2=value2')
+            data: Optional JSON body (sent as form data for qBittorrent)
+            fresh: Bypass cached responses for this GET
+
+        Returns:
+            dict with keys: ok, status, json, text
+
+        Raises:
+            ServiceError: On unknown service, missing credentials or network failure
+        """
+        from bot.tools.service_cache import is_mutating_get
+
+        method = method.upper()
+        if method == "GET" and not is_mutating_get(service, endpoint):
+            if self.cache is None:
+                return await self._send(service, method, endpoint, query, data)
+            return await self.cache.fetch(
+                service, endpoint, query,
+                lambda: self._send(service, method, endpoint, query, data),
+                fresh=fresh,
+            )
+
+        try:
+            response = await self._send(service, method, endpoint, query, data)
+        finally:
+            if self.cache is not None:
+                self.cache.record_mutation(service, endpoint)
+
+        for listener in self.mutation_listeners:
+            try:
+                listener(service, method, endpoint, response)
+            except Exception as e:
+                logger.warning(f"Mutation listener failed for {method} {service}{endpoint}: {e}")
+        return response
+
+    async def _send(self, service: str, method: str, endpoint: str, query: str = None, data: str = None) -> Dict[str, Any]:
+        """Send one authenticated request upstream (no caching)."""
+        if service not in self.services:
+            raise ServiceError(
+                f"Unknown service '{service}'\n"
+                f"Available services: {', '.join(self.services.keys())}"
+            )
+
+        config = self.services[service]
+
+        # Build headers (qBittorrent uses form data, others use JSON)
+        headers = {}
+        if service != "qbt":
+            headers["Content-Type"] = "application/json"
+
+        # Handle authentication
+        if config["auth_type"] == "header":
+            if not config["auth_value"]:
+                raise ServiceError(f"{service} API key not found in environment")
+            headers[config["auth_header"]] = config["auth_value"]
+        elif config["auth_type"] == "cookie":
+            await self._login(service)
+
+        # Parse data - format depends on service
+        json_data = None
+        form_data = None
+        if data:
+            try:
+                parsed_data = json.loads(data)
+            except json.JSONDecodeError as e:
+                raise ServiceError(f"Invalid JSON data: {e}")
+
+            # qBittorrent expects form data, others expect JSON
+            if service == "qbt":
+                form_data = parsed_data
+            else:
+                json_data = parsed_data
+
+        params = parse_query_string(query) if query else None
+
+        async def send():
+            return await self._get_http(service).request(
+                method=method.upper(),
+                url=self._url(service, endpoint),
+                headers=headers,
+                params=params,
+                json=json_data,
+                data=form_data,
+            )
+
+        with span("service", service=service, method=method.upper(), endpoint=endpoint) as request_span:
+            started = time.monotonic()
+            try:
+                response = await send()
+
+                # qBittorrent session expired — log in again and retry once
+                if config["auth_type"] == "cookie" and response.status_code == 403:
+                    logger.info("qBittorrent session rejected, re-authenticating")
+                    await self._login(service, force=True)
+                    response = await send()
+
+            except httpx.HTTPError as e:
+                SERVICE_REQUEST_SECONDS.observe(time.monotonic() - started, service=service, outcome="error")
+                raise ServiceError(f"Request failed: {e}")
+
+            SERVICE_REQUEST_SECONDS.observe(
+                time.monotonic() - started, service=service, outcome="ok" if response.is_success else "http_error"
+            )
+            request_span.set(status=response.status_code, bytes=len(response.content))
+
+        # Try to parse as JSON
+        try:
+            parsed = response.json()
+        except ValueError:
+            parsed = None
+
+        return {
+            "ok": response.is_success,
+            "status": response.status_code,
+            "json": parsed,
+            "text": response.text,
+        }
+
+    async def aclose(self):
+        """Close every pooled connection."""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._logged_in.clear()
+
+
+_client: Optional[ServiceClient] = None
+
+
+def get_service_client() -> ServiceClient:
+    """Return the process-wide service client (with the response cache, if enabled)."""
+    global _client
+    if _client is None:
+        from bot.config import SERVICE_CACHE_ENABLED, SERVICE_CACHE_VERIFY_WINDOW
+
+        cache = None
+        if SERVICE_CACHE_ENABLED:
+            from bot.tools.service_cache import ServiceCache
+
+            cache = ServiceCache(verify_window=SERVICE_CACHE_VERIFY_WINDOW)
+        _client = ServiceClient(cache=cache)
+    return _client
+
+
+def split_leading_command(command: str) -> Optional[Tuple[List[str], Optional[str]]]:
+    """
+    Split a shell command into its first simple command and the pipeline after it.
+
+    Only plain invocations qualify: a bare command, or one piped into further
+    commands (`cmd ... | jq ...`). Chained commands, redirects and
+    substitutions return None so they run through the shell as before.
+
+    Returns:
+        (argv of the first command, remaining pipeline or None) — or None
+    """
+    head, pipe = command, None
+    quote = None
+    escaped = False
+    for index, char in enumerate(command):
+        if escaped:
+            escaped = False
+            continue
+        if char == "\\" and quote != "'":
+            escaped = True
+            continue
+        if quote:
+            if char == quote:
+                quote = None
+            elif quote == '"' and char in "$`":
+                return None
+            continue
+        if char in ("'", '"'):
+            quote = char
+        elif char == "|":
+            if command[index + 1:index + 2] == "|":
+                return None
+            head, pipe = command[:index], command[index + 1:].strip()
+            break
+        elif char in ";&<>`$\n":
+            return None
+
+    try:
+        tokens = shlex.split(head)
+    except ValueError:
+        return None
+
+    if not tokens or (pipe is not None and not pipe):
+        return None
+
+    tokens[0] = os.path.basename(tokens[0])
+    return tokens, pipe
+
+
+def parse_api_call_command(command: str) -> Optional[Dict[str, Any]]:
+    """
+    Recognise a shell command that starts with a plain `api-call` invocation.
+
+    Returns:
+        Parsed api-call arguments plus "pipe" (remaining pipeline or None)
+    """
+    split = split_leading_command(command)
+    if split is None or split[0][0] != "api-call":
+        return None
+
+    tokens, pipe = split
+    parsed = parse_api_call_args(tokens[1:])
+    if parsed is None:
+        return None
+
+    parsed["pipe"] = pipe
+    return parsed
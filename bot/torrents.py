@@ -0,0 +1,274 @@
+"""
+Live qBittorrent state from incremental `/sync/maindata` deltas.
+
+A background task keeps an in-memory torrent table current: each poll sends
+the last response ID (rid) and qBittorrent returns only what changed since.
+`qbt-status` is answered from the table, and chats that added (or asked to
+watch) a torrent get a message when it finishes, so nobody has to poll
+through the LLM.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from bot.scheduler import current_chat
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+MB = 1024 ** 2
+
+# How long after `POST /torrents/add` newly appearing torrents are credited to the adding chat
+ADD_ATTRIBUTION_WINDOW = 120  # seconds
+
+DOWNLOADING_STATES = {
+    "downloading", "metaDL", "forcedMetaDL", "forcedDL", "stalledDL", "checkingDL",
+    "pausedDL", "stoppedDL", "queuedDL", "allocating", "checkingResumeData", "moving",
+}
+SEEDING_STATES = {"uploading", "stalledUP", "forcedUP", "queuedUP", "checkingUP"}
+PAUSED_STATES = {"pausedDL", "pausedUP", "stoppedDL", "stoppedUP"}
+ERRORED_STATES = {"error", "missingFiles"}
+
+
+def _is_active(torrent: Dict[str, Any]) -> bool:
+    return torrent.get("dlspeed", 0) > 0 or torrent.get("upspeed", 0) > 0
+
+
+# qbt-status filters, mirroring qBittorrent's /torrents/info `filter` values
+FILTERS: Dict[str, Callable[[Dict[str, Any]], bool]] = {
+    "all": lambda t: True,
+    "downloading": lambda t: t.get("state") in DOWNLOADING_STATES,
+    "seeding": lambda t: t.get("state") in SEEDING_STATES,
+    "completed": lambda t: t.get("progress", 0) >= 1,
+    "paused": lambda t: t.get("state") in PAUSED_STATES,
+    "stopped": lambda t: t.get("state") in PAUSED_STATES,
+    "resumed": lambda t: t.get("state") not in PAUSED_STATES,
+    "running": lambda t: t.get("state") not in PAUSED_STATES,
+    "active": _is_active,
+    "inactive": lambda t: not _is_active(t),
+    "stalled": lambda t: t.get("state") in ("stalledDL", "stalledUP"),
+    "stalled_uploading": lambda t: t.get("state") == "stalledUP",
+    "stalled_downloading": lambda t: t.get("state") == "stalledDL",
+    "errored": lambda t: t.get("state") in ERRORED_STATES,
+}
+
+
+def format_status(torrents: List[Dict[str, Any]]) -> str:
+    """Render torrents exactly like the `qbt-status` script's jq output."""
+    rows = [
+        {
+            "name": t.get("name"),
+            "hash": t.get("hash"),
+            "state": t.get("state"),
+            "progress": f"{round(t.get('progress', 0) * 100)}%",
+            "downloaded_gb": round(t.get("size", 0) / GB * 100) / 100,
+            "total_gb": round(t.get("total_size", 0) / GB * 100) / 100,
+            "dlspeed_mbs": round(t.get("dlspeed", 0) / MB * 100) / 100,
+            "eta": t.get("eta"),
+        }
+        for t in torrents
+    ]
+    return json.dumps(rows, indent=2, ensure_ascii=False) + "\n"
+
+
+Notifier = Callable[[int, str], Awaitable[Any]]
+
+
+class TorrentTracker:
+    """
+    In-memory torrent table kept current by polling `/sync/maindata?rid=N`.
+
+    Polls every `interval` seconds while anything is downloading or watched,
+    and every `idle_interval` otherwise; a torrent add wakes it immediately.
+    """
+
+    def __init__(self, interval: float = 2.0, idle_interval: float = 30.0):
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.torrents: Dict[str, Dict[str, Any]] = {}
+        self.server_state: Dict[str, Any] = {}
+        self.rid = 0
+        self.synced_at: Optional[float] = None  # monotonic time of the last successful sync
+
+        # Torrent hash -> chats to notify when it completes
+        self.watchers: Dict[str, Set[int]] = {}
+        self.notifier: Optional[Notifier] = None
+
+        self._pending_adds: List[Tuple[int, float]] = []  # (chat_id, added at)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._notify_tasks: Set[asyncio.Task] = set()
+
+    # --- Reading ---
+
+    def is_fresh(self) -> bool:
+        """True if the table reflects qBittorrent as of the last poll cycle."""
+        return self.synced_at is not None and time.monotonic() - self.synced_at < self.idle_interval * 2 + 5
+
+    def status(self, state_filter: str = "all") -> Optional[List[Dict[str, Any]]]:
+        """
+        Torrents matching a qbt-status filter, oldest first.
+
+        Returns:
+            The matching torrents, or None if the table is stale or the filter unknown
+        """
+        matches = FILTERS.get(state_filter)
+        if matches is None or not self.is_fresh():
+            return None
+        torrents = sorted(self.torrents.values(), key=lambda t: (t.get("added_on", 0), t.get("name", "")))
+        return [t for t in torrents if matches(t)]
+
+    def find(self, term: str) -> List[Dict[str, Any]]:
+        """Torrents whose hash starts with, or whose name contains, the term."""
+        term = term.lower()
+        return [
+            t for t in self.torrents.values()
+            if t["hash"].lower().startswith(term) or term in (t.get("name") or "").lower()
+        ]
+
+    # --- Watching ---
+
+    def watch(self, torrent_hash: str, chat_id: int):
+        """Notify a chat when a torrent finishes."""
+        self.watchers.setdefault(torrent_hash, set()).add(chat_id)
+        self.poke()
+
+    def on_mutation(self, service: str, method: str, endpoint: str, response: Dict[str, Any]):
+        """Service client listener: credit torrent adds to the requesting chat and resync."""
+        if service != "qbt" or not endpoint.startswith("/torrents/"):
+            return
+        if endpoint.startswith("/torrents/add") and response.get("ok"):
+            chat_id = current_chat.get()
+            if chat_id is not None:
+                self._pending_adds.append((chat_id, time.monotonic()))
+        self.poke()
+
+    def poke(self):
+        """Sync as soon as possible instead of waiting for the next interval."""
+        self._wakeup.set()
+
+    # --- Syncing ---
+
+    async def sync(self):
+        """Fetch and apply one delta (a full table on the first call or after a reset)."""
+        from bot.tools.service_client import get_service_client
+
+        response = await get_service_client().request("qbt", "GET", "/sync/maindata", query=f"rid={self.rid}", fresh=True)
+        if not response["ok"] or not isinstance(response["json"], dict):
+            raise RuntimeError(f"HTTP {response['status']}: {response['text'][:200]}")
+        self.apply(response["json"])
+
+    def apply(self, data: Dict[str, Any]):
+        """Merge a maindata response into the table and notify on completions."""
+        first_sync = self.synced_at is None
+        changed = data.get("torrents") or {}
+        # Deltas update torrents in place, so note progress before merging
+        was = {torrent_hash: t.get("progress", 0) for torrent_hash, t in self.torrents.items()}
+        if data.get("full_update"):
+            self.torrents = {torrent_hash: self.torrents[torrent_hash] for torrent_hash in changed if torrent_hash in self.torrents}
+            self.server_state = {}
+
+        new_hashes = []
+        for torrent_hash, changes in changed.items():
+            torrent = self.torrents.setdefault(torrent_hash, {"hash": torrent_hash})
+            if torrent_hash not in was:
+                new_hashes.append(torrent_hash)
+            torrent.update(changes)
+        for torrent_hash in data.get("torrents_removed") or []:
+            self.torrents.pop(torrent_hash, None)
+            self.watchers.pop(torrent_hash, None)
+        self.server_state.update(data.get("server_state") or {})
+
+        self.rid = data.get("rid", self.rid)
+        self.synced_at = time.monotonic()
+
+        if first_sync:
+            return
+        self._credit_new_torrents(new_hashes)
+        for torrent_hash in changed:
+            torrent = self.torrents[torrent_hash]
+            if was.get(torrent_hash, 0) < 1 <= torrent.get("progress", 0):
+                self._completed(torrent)
+
+    def _credit_new_torrents(self, new_hashes: List[str]):
+        """Watch newly appeared torrents on behalf of the chat that recently added them."""
+        now = time.monotonic()
+        self._pending_adds = [(chat, at) for chat, at in self._pending_adds if now - at < ADD_ATTRIBUTION_WINDOW]
+        if not new_hashes or not self._pending_adds:
+            return
+        chat_id, _ = self._pending_adds.pop(0)
+        for torrent_hash in new_hashes:
+            if self.torrents[torrent_hash].get("progress", 0) < 1:
+                self.watchers.setdefault(torrent_hash, set()).add(chat_id)
+                logger.info(f"Watching {self.torrents[torrent_hash].get('name')} for chat {chat_id}")
+
+    def _completed(self, torrent: Dict[str, Any]):
+        logger.info(f"Torrent completed: {torrent.get('name')}")
+        chats = self.watchers.pop(torrent["hash"], set())
+        if not chats or self.notifier is None:
+            return
+        text = f"✅ Download finished: {torrent.get('name')} ({torrent.get('total_size', 0) / GB:.2f} GB)"
+        for chat_id in chats:
+            task = asyncio.create_task(self._notify(chat_id, text))
+            self._notify_tasks.add(task)
+            task.add_done_callback(self._notify_tasks.discard)
+
+    async def _notify(self, chat_id: int, text: str):
+        try:
+            await self.notifier(chat_id, text)
+        except Exception as e:
+            logger.warning(f"Failed to notify chat {chat_id}: {e}")
+
+    def _busy(self) -> bool:
+        return bool(self.watchers) or any(
+            t.get("progress", 0) < 1 and t.get("state") not in PAUSED_STATES for t in self.torrents.values()
+        )
+
+    def start(self):
+        """Start the background sync loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        """Stop syncing."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sync_loop(self):
+        failures = 0
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.sync()
+                failures = 0
+                delay = self.interval if self._busy() else self.idle_interval
+            except Exception as e:
+                failures += 1
+                delay = min(self.idle_interval, self.interval * 2 ** failures)
+                if failures in (1, 10) or failures % 100 == 0:
+                    logger.warning(f"qBittorrent sync failed ({failures}x), retrying in {delay:.0f}s: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+_tracker: Optional[TorrentTracker] = None
+
+
+def get_torrent_tracker() -> TorrentTracker:
+    """Return the process-wide torrent tracker."""
+    global _tracker
+    if _tracker is None:
+        from bot.config import QBT_SYNC_IDLE_INTERVAL, QBT_SYNC_INTERVAL
+
+        _tracker = TorrentTracker(QBT_SYNC_INTERVAL, QBT_SYNC_IDLE_INTERVAL)
+    return _tracker
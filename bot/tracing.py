@@ -0,0 +1,234 @@
+"""
+Per-request span traces.
+
+Each user message gets a span tree (LLM turns, tool calls, subprocesses,
+service requests, executor calls) with timings and sizes. Finished traces
+are appended to a daily JSONL file and the last one per chat is kept in
+memory for the /trace command.
+
+The active span travels in a contextvar, so concurrent tool calls nest
+correctly. When no trace is active, span() returns a shared no-op object:
+instrumented code pays one contextvar lookup and nothing else.
+"""
+
+import asyncio
+import contextvars
+import html
+import json
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WATERFALL_WIDTH = 20
+MAX_WATERFALL_LINES = 40
+
+_current: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = ("id", "parent", "name", "attrs", "start", "end")
+
+    def __init__(self, span_id: int, parent: Optional[int], name: str, attrs: Dict[str, Any]):
+        self.id = span_id
+        self.parent = parent
+        self.name = name
+        self.attrs = attrs
+        self.start = time.monotonic()
+        self.end: Optional[float] = None
+
+    def set(self, **attrs):
+        """Attach attributes (sizes, status codes...) to the span."""
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.monotonic()) - self.start
+
+
+class _NullSpan:
+    """Stand-in used when tracing is off; every operation is a no-op."""
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """The span tree of one request."""
+
+    def __init__(self, chat_id: int, label: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.chat_id = chat_id
+        self.label = label
+        self.started_at = datetime.now()
+        self.spans: List[Span] = []
+
+    def new_span(self, parent: Optional[Span], name: str, attrs: Dict[str, Any]) -> Span:
+        span = Span(len(self.spans), parent.id if parent else None, name, attrs)
+        self.spans.append(span)
+        return span
+
+    @property
+    def duration(self) -> float:
+        return self.spans[0].duration if self.spans else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        origin = self.spans[0].start if self.spans else 0.0
+        return {
+            "trace_id": self.id,
+            "chat_id": self.chat_id,
+            "label": self.label,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "duration": round(self.duration, 4),
+            "spans": [
+                {
+                    "id": span.id,
+                    "parent": span.parent,
+                    "name": span.name,
+                    "start": round(span.start - origin, 4),
+                    "duration": round(span.duration, 4),
+                    "attrs": span.attrs,
+                }
+                for span in self.spans
+            ],
+        }
+
+
+class _SpanContext:
+    """Context manager that opens a child span of the active one."""
+
+    __slots__ = ("trace", "parent", "name", "attrs", "span", "token")
+
+    def __init__(self, trace: Trace, parent: Span, name: str, attrs: Dict[str, Any]):
+        self.trace = trace
+        self.parent = parent
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> Span:
+        self.span = self.trace.new_span(self.parent, self.name, self.attrs)
+        self.token = _current.set((self.trace, self.span))
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end = time.monotonic()
+        if exc_type is not None:
+            self.span.attrs["error"] = exc_type.__name__
+        _current.reset(self.token)
+        return False
+
+
+def span(name: str, **attrs):
+    """Open a child span of the active span (no-op when nothing is being traced)."""
+    current = _current.get()
+    if current is None:
+        return NULL_SPAN
+    trace, parent = current
+    return _SpanContext(trace, parent, name, attrs)
+
+
+def current_span():
+    """The active span, for attaching attributes (NULL_SPAN when not tracing)."""
+    current = _current.get()
+    return current[1] if current is not None else NULL_SPAN
+
+
+class Tracer:
+    """Starts request traces, keeps the last one per chat and persists them."""
+
+    def __init__(self, enabled: bool, directory: Path):
+        self.enabled = enabled
+        self.directory = Path(directory)
+        self.last: Dict[int, Trace] = {}
+
+    @asynccontextmanager
+    async def record(self, chat_id: int, label: str):
+        """Trace everything run inside the block as one request (yields the Trace or None)."""
+        if not self.enabled:
+            yield None
+            return
+
+        trace = Trace(chat_id, label[:200])
+        root = trace.new_span(None, "request", {"chars": len(label)})
+        token = _current.set((trace, root))
+        try:
+            yield trace
+        except BaseException as e:
+            root.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            root.end = time.monotonic()
+            _current.reset(token)
+            self.last[chat_id] = trace
+            try:
+                await asyncio.to_thread(self._write, trace)
+            except Exception as e:
+                logger.warning(f"Failed to write trace {trace.id}: {e}")
+
+    def _write(self, trace: Trace):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"traces_{trace.started_at.strftime('%Y%m%d')}.jsonl"
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(trace.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+
+def _span_label(span: Span) -> str:
+    """Short description of a span for the waterfall."""
+    detail = (
+        span.attrs.get("command")
+        or span.attrs.get("endpoint")
+        or span.attrs.get("tool")
+        or span.attrs.get("turn")
+        or ""
+    )
+    if span.attrs.get("service"):
+        detail = f"{span.attrs['service']} {span.attrs.get('method', '')} {detail}".strip()
+    label = f"{span.name} {detail}".strip()
+    if span.attrs.get("error"):
+        label += f" ✗{span.attrs['error']}"
+    return label[:40]
+
+
+def render_waterfall(trace: Trace) -> str:
+    """Render a trace as a monospace waterfall (HTML, for Telegram's parse_mode)."""
+    if not trace.spans:
+        return "Empty trace."
+
+    origin = trace.spans[0].start
+    total = max(trace.duration, 1e-6)
+    depth: Dict[int, int] = {}
+
+    lines = []
+    for span in trace.spans[:MAX_WATERFALL_LINES]:
+        depth[span.id] = depth[span.parent] + 1 if span.parent is not None else 0
+        offset = int((span.start - origin) / total * WATERFALL_WIDTH)
+        length = max(1, round(span.duration / total * WATERFALL_WIDTH))
+        offset = min(offset, WATERFALL_WIDTH - 1)
+        length = min(length, WATERFALL_WIDTH - offset)
+        bar = "·" * offset + "█" * length + "·" * (WATERFALL_WIDTH - offset - length)
+        lines.append(f"{bar} {span.duration:6.2f}s {'  ' * depth[span.id]}{_span_label(span)}")
+
+    if len(trace.spans) > MAX_WATERFALL_LINES:
+        lines.append(f"... {len(trace.spans) - MAX_WATERFALL_LINES} more spans in the trace file")
+
+    header = (
+        f"🔎 Trace {trace.id} — {trace.duration:.2f}s, {len(trace.spans)} spans\n"
+        f"“{html.escape(trace.label[:80])}”"
+    )
+    return f"{header}\n<pre>{html.escape(chr(10).join(lines))}</pre>"
@@ -0,0 +1,85 @@
+"""Telegram webhook delivery: updates are POSTed to the embedded HTTP server."""
+
+import asyncio
+import hmac
+import logging
+import signal
+from typing import List
+
+from telegram import Update
+from telegram.ext import Application
+
+from bot.http_server import HttpServer, Request, Response
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+
+def telegram_update_handler(application: Application, secret: str):
+    """Build the HTTP handler that checks the secret token and queues the update."""
+
+    async def handle(request: Request) -> Response:
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, "").encode(), secret.encode()):
+            logger.warning(f"Rejected webhook POST with bad secret token from {request.peer}")
+            return Response(403, "Forbidden\n")
+
+        try:
+            update = Update.de_json(request.json(), application.bot)
+        except Exception as e:
+            logger.warning(f"Rejected malformed webhook update: {e}")
+            return Response(400, "Malformed update\n")
+
+        if update is not None:
+            await application.update_queue.put(update)
+        return Response(200, "")
+
+    return handle
+
+
+async def run_webhook(
+    application: Application,
+    server: HttpServer,
+    webhook_url: str,
+    path: str,
+    secret: str,
+    allowed_updates: List[str],
+):
+    """
+    Run the bot with webhook delivery until SIGINT/SIGTERM.
+
+    Mirrors Application.run_polling's lifecycle (initialize, post_init, start,
+    stop, post_stop, shutdown, post_shutdown), with updates arriving through
+    the embedded HTTP server instead of getUpdates.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    server.route("POST", path, telegram_update_handler(application, secret))
+
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        await server.start()
+        await application.bot.set_webhook(
+            url=webhook_url,
+            secret_token=secret,
+            allowed_updates=allowed_updates,
+        )
+        logger.info(f"Webhook registered at {webhook_url}")
+
+        await stop.wait()
+        logger.info("Stopping webhook server...")
+    finally:
+        await server.stop()
+        if application.running:
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
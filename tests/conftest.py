@@ -0,0 +1,13 @@
+import os
+import tempfile
+
+# Configuration is read at import time: keep tests away from real keys, data and traces
+_scratch = tempfile.mkdtemp(prefix="blackbeard-tests-")
+os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test")
+os.environ.update({
+    "CATALOG_DB_PATH": os.path.join(_scratch, "catalog.db"),
+    "HISTORY_DB_PATH": "",
+    "TRACE_ENABLED": "false",
+    "TRACE_DIR": os.path.join(_scratch, "traces"),
+})
@@ -0,0 +1,130 @@
+import asyncio
+import itertools
+
+import pytest
+from anthropic.types import Message, TextBlock, ToolUseBlock, Usage
+
+from bot.agent import BlackbeardAgent, _conflicts, _tool_resources
+
+_ids = itertools.count()
+
+
+def text_turn(text):
+    return [TextBlock(type="text", text=text)], "end_turn"
+
+
+def tool_turn(*commands):
+    return [
+        ToolUseBlock(type="tool_use", id=f"toolu_{next(_ids)}", name="execute_command", input={"command": command})
+        for command in commands
+    ], "tool_use"
+
+
+class ScriptedMessages:
+    """messages.create() answering each model's requests from its own script."""
+
+    def __init__(self, scripts):
+        self.scripts = {model: list(turns) for model, turns in scripts.items()}
+        self.requests = []
+
+    async def create(self, **request):
+        self.requests.append(request)
+        content, stop_reason = self.scripts[request["model"]].pop(0)
+        return Message(
+            id=f"msg_{next(_ids)}", type="message", role="assistant", model=request["model"], content=content,
+            stop_reason=stop_reason, usage=Usage(input_tokens=100, output_tokens=10),
+        )
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr("bot.config.PREFETCH_ENABLED", False)
+    monkeypatch.setattr("bot.config.ROUTER_CLASSIFIER", False)
+    agent = BlackbeardAgent()
+    agent.commands = []
+
+    async def fake_execute_tool(tool_name, tool_input, cancel_token=None, prefetch=None):
+        agent.commands.append(tool_input["command"])
+        return {"success": True, "output": f"ran {tool_input['command']}", "error": ""}
+
+    monkeypatch.setattr(agent, "_execute_tool", fake_execute_tool)
+    return agent
+
+
+def script(agent, **turns_by_tier):
+    from bot.config import EXECUTOR_MODEL, ORCHESTRATOR_MODEL
+
+    agent.client.messages = ScriptedMessages({
+        EXECUTOR_MODEL: turns_by_tier.get("lookup", []),
+        ORCHESTRATOR_MODEL: turns_by_tier.get("full", []),
+    })
+    return agent.client.messages
+
+
+def test_lookup_answers_read_only_questions(agent):
+    script(agent, lookup=[tool_turn("sonarr-find Dune"), text_turn("Yes, Dune is in the library.")])
+    result = asyncio.run(agent.process_message("Do I have Dune?"))
+    assert result["response"] == "Yes, Dune is in the library."
+    assert [entry["input"] for entry in result["tool_log"]] == ["sonarr-find Dune"]
+
+
+def test_escalation_drops_the_lookup_tool_log(agent):
+    messages = script(
+        agent,
+        lookup=[tool_turn("sonarr-find Dune"), tool_turn("api-call sonarr PUT /series/1")],
+        full=[tool_turn("radarr-find Dune"), text_turn("Dune is a movie; it's in Radarr.")],
+    )
+    result = asyncio.run(agent.process_message("Do I have Dune?"))
+    assert result["response"] == "Dune is a movie; it's in Radarr."
+    # The mutation was never run, and only the orchestrator's call is logged
+    assert agent.commands == ["sonarr-find Dune", "radarr-find Dune"]
+    assert [entry["input"] for entry in result["tool_log"]] == ["radarr-find Dune"]
+    assert len(messages.requests) == 4
+
+
+def command(text):
+    return {"command": text}
+
+
+def test_tool_resources():
+    assert _tool_resources("execute_command", command("sonarr-find Dune")) == {"service:sonarr": False}
+    assert _tool_resources("execute_command", command("api-call radarr POST /command")) == {"service:radarr": True}
+    assert _tool_resources("execute_command", command("mv /a /b")) == {"filesystem": True}
+    assert _tool_resources("execute_command", command("ls /media")) == {"filesystem": False}
+    assert _tool_resources("update_docs", {"file": "notes.md"}) == {"docs:notes.md": True}
+
+
+def test_conflicts():
+    read = {"service:sonarr": False}
+    write = {"service:sonarr": True}
+    assert not _conflicts(read, read)
+    assert _conflicts(read, write) and _conflicts(write, read)
+    assert not _conflicts(write, {"service:radarr": True})
+
+
+def test_tool_calls_run_concurrently_unless_they_conflict(agent):
+    events = []
+
+    async def timed_execute_tool(tool_name, tool_input, cancel_token=None, prefetch=None):
+        name = tool_input["command"]
+        events.append(f"start {name}")
+        await asyncio.sleep(0.01)
+        events.append(f"end {name}")
+        return {"success": True, "output": f"ran {name}", "error": ""}
+
+    agent._execute_tool = timed_execute_tool
+    blocks, _ = tool_turn(
+        "sonarr-find Dune",
+        "radarr-find Dune",
+        "api-call sonarr PUT /series/1",
+        "sonarr-find Heat",
+    )
+    outcomes = asyncio.run(agent._execute_tool_calls(blocks, None, None))
+
+    # Results come back in call order
+    assert [content for content, _ in outcomes] == [f"ran {block.input['command']}" for block in blocks]
+    # The two independent reads overlap
+    assert events.index("start radarr-find Dune") < events.index("end sonarr-find Dune")
+    # The Sonarr write waits for the read before it, and the read after it waits for the write
+    assert events.index("start api-call sonarr PUT /series/1") > events.index("end sonarr-find Dune")
+    assert events.index("start sonarr-find Heat") > events.index("end api-call sonarr PUT /series/1")
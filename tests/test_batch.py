@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from bot.catalog import LibraryCatalog
+from bot.tools.batch import BatchError, _resolve, episode_label, parse_episode_spec
+
+# Two seasons of three episodes, numbered absolutely as well
+EPISODES = [
+    {"id": season * 10 + number, "seasonNumber": season, "episodeNumber": number,
+     "absoluteEpisodeNumber": (season - 1) * 3 + number}
+    for season in (1, 2) for number in (1, 2, 3)
+]
+
+
+def _selected(spec):
+    matches = parse_episode_spec(spec)
+    return [(e["seasonNumber"], e["episodeNumber"]) for e in EPISODES if matches(e)]
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("S02", [(2, 1), (2, 2), (2, 3)]),
+    ("s1", [(1, 1), (1, 2), (1, 3)]),
+    ("S01-S02", [(s, e) for s in (1, 2) for e in (1, 2, 3)]),
+    ("S01E02", [(1, 2)]),
+    ("S01E02-E03", [(1, 2), (1, 3)]),
+    ("S01E02-03", [(1, 2), (1, 3)]),
+    ("S01E03-S02E01", [(1, 3), (2, 1)]),
+    ("4", [(2, 1)]),
+    ("2-5", [(1, 2), (1, 3), (2, 1), (2, 2)]),
+    ("S03", []),
+])
+def test_parse_episode_spec(spec, expected):
+    assert _selected(spec) == expected
+
+
+@pytest.mark.parametrize("spec", ["", "season 1", "S01E", "E05", "S01E02-", "1-2-3", "S01-E05"])
+def test_parse_episode_spec_rejects_unknown_specs(spec):
+    with pytest.raises(BatchError):
+        parse_episode_spec(spec)
+
+
+def test_absolute_specs_skip_episodes_without_absolute_numbers():
+    assert not parse_episode_spec("1")({"seasonNumber": 1, "episodeNumber": 1})
+
+
+def test_episode_label():
+    assert episode_label({"seasonNumber": 1, "episodeNumber": 5}) == "S01E05"
+    assert episode_label({"seasonNumber": 20, "episodeNumber": 3, "absoluteEpisodeNumber": 471}) == "S20E03 (471)"
+
+
+def test_numeric_terms_are_ids_only_when_the_catalog_has_them(tmp_path):
+    catalog = LibraryCatalog(tmp_path / "catalog.db")
+    catalog.replace_all("movie", [{"id": 5, "title": "Heat"}, {"id": 9, "title": "1917"}])
+
+    def resolve(term):
+        return asyncio.run(_resolve(catalog, "movie", term))
+
+    try:
+        assert resolve("5")["title"] == "Heat"
+        assert resolve("1917")["id"] == 9
+        assert resolve("404") is None
+        assert resolve("heat")["id"] == 5
+    finally:
+        catalog._conn.close()
+
+
+class UnreachableCatalog:
+    async def find(self, kind, term, max_age):
+        from bot.tools.service_client import ServiceError
+
+        raise ServiceError("Request failed: connection refused")
+
+
+def test_run_batch_reports_catalog_failures():
+    from bot.tools.batch import run_batch
+
+    returncode, stdout, stderr = asyncio.run(run_batch("radarr-search", ["Heat"], UnreachableCatalog()))
+    assert (returncode, stdout) == (1, "")
+    assert stderr == "Error: Request failed: connection refused"
+
+
+def test_radarr_search_survives_a_failed_catalog_refresh(tmp_path, monkeypatch):
+    from bot.tools import batch
+
+    catalog = LibraryCatalog(tmp_path / "catalog.db")
+    catalog.replace_all("movie", [{"id": 5, "title": "Heat", "monitored": False}])
+    calls = []
+
+    async def fake_call(service, method, endpoint, query=None, body=None):
+        calls.append((method, endpoint))
+        return {"name": "MoviesSearch", "id": 1, "status": "queued"} if endpoint == "/command" else []
+
+    async def failing_refresh(kind, item_id):
+        raise RuntimeError("radarr is restarting")
+
+    monkeypatch.setattr(batch, "_call", fake_call)
+    monkeypatch.setattr(catalog, "refresh_item", failing_refresh)
+    try:
+        returncode, stdout, _ = asyncio.run(batch.run_batch("radarr-search", ["Heat"], catalog))
+    finally:
+        catalog._conn.close()
+    assert returncode == 0
+    assert calls == [("PUT", "/movie/editor"), ("POST", "/command")]
+    assert '"newly_monitored": 1' in stdout
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from bot.catalog import LibraryCatalog, normalize_title
+
+SERIES = [
+    {"id": 1, "title": "Breaking Bad", "monitored": True, "tvdbId": 81189},
+    {"id": 2, "title": "Better Call Saul", "monitored": True, "tvdbId": 273181},
+    {"id": 3, "title": "Law & Order", "monitored": False, "tvdbId": 72368},
+    {"id": 4, "title": "Pokémon", "monitored": True, "tvdbId": 76703,
+     "alternateTitles": [{"title": "Pocket Monsters"}]},
+    {"id": 5, "title": "The Office (US)", "monitored": True, "tvdbId": 73244},
+]
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = LibraryCatalog(tmp_path / "catalog.db")
+    catalog.replace_all("series", SERIES)
+    yield catalog
+    catalog._conn.close()
+
+
+def _ids(results):
+    return [result["id"] for result in results]
+
+
+@pytest.mark.parametrize("text, normalized", [
+    ("Breaking Bad", "breaking bad"),
+    ("Law & Order: SVU", "law and order svu"),
+    ("Pokémon", "pokemon"),
+    ("  The   Office (US) ", "the office us"),
+    ("!!!", ""),
+])
+def test_normalize_title(text, normalized):
+    assert normalize_title(text) == normalized
+
+
+@pytest.mark.parametrize("term, best", [
+    ("breaking bad", 1),
+    ("Breaking", 1),         # word prefix
+    ("law and order", 3),    # '&' spelled out
+    ("Law & Order", 3),
+    ("pokemon", 4),          # diacritics ignored
+    ("pocket monsters", 4),  # alternate title
+    ("office", 5),
+    ("fice", 5),             # substring (trigram)
+    ("Braking Bad", 1),      # typo (fuzzy)
+])
+def test_search_best_match(catalog, term, best):
+    assert _ids(catalog.search("series", term))[0] == best
+
+
+def test_search_returns_kind_fields_only(catalog):
+    assert catalog.search("series", "saul") == [
+        {"id": 2, "title": "Better Call Saul", "monitored": True, "tvdbId": 273181}
+    ]
+    assert catalog.search("series", "zzzzqqq") == []
+    assert catalog.search("movie", "breaking") == []
+
+
+def test_replace_all_only_rewrites_changes(catalog):
+    assert catalog.replace_all("series", SERIES) == {"added": 0, "updated": 0, "removed": 0}
+    changed = [dict(SERIES[0], monitored=False)] + SERIES[1:4] + [{"id": 6, "title": "Severance"}]
+    assert catalog.replace_all("series", changed) == {"added": 1, "updated": 1, "removed": 1}
+    assert catalog.get("series", 1)["monitored"] is False
+    assert catalog.get("series", 5) is None
+    assert _ids(catalog.search("series", "severance")) == [6]
+
+
+def test_upsert_delete_and_requesters(catalog):
+    catalog.upsert("series", {"id": 2, "title": "Saul Goodman"})
+    assert _ids(catalog.search("series", "goodman")) == [2]
+    catalog.add_requester("series", 2, 42)
+    assert catalog.requesters("series", 2) == [42]
+    catalog.delete("series", 2)
+    assert catalog.get("series", 2) is None and catalog.requesters("series", 2) == []
+
+
+def test_find_searches_stale_rows_when_sync_fails(catalog, monkeypatch):
+    async def failing_sync(kind):
+        raise RuntimeError("sonarr returned HTTP 503")
+
+    monkeypatch.setattr(catalog, "sync", failing_sync)
+    assert _ids(asyncio.run(catalog.find("series", "breaking bad", max_age=0)))[:1] == [1]
+    with pytest.raises(RuntimeError):
+        asyncio.run(catalog.find("movie", "anything", max_age=0))  # never synced: nothing to fall back on
+
+
+def test_on_mutation_applies_writes(catalog):
+    async def scenario():
+        catalog.on_mutation("sonarr", "POST", "/series", {"ok": True, "json": {"id": 7, "title": "Dark"}})
+        catalog.on_mutation("sonarr", "DELETE", "/series/1", {"ok": True, "json": None})
+        catalog.on_mutation("sonarr", "PUT", "/series/3", {"ok": False, "json": {"id": 3, "title": "Ignored"}})
+        await asyncio.gather(*catalog._pending_writes)
+
+    asyncio.run(scenario())
+    assert catalog.get("series", 7)["title"] == "Dark"
+    assert catalog.get("series", 1) is None
+    assert catalog.get("series", 3)["title"] == "Law & Order"
+
+
+def test_find_resyncs_on_a_miss_only_when_the_catalog_is_old(catalog, monkeypatch):
+    synced = []
+
+    async def sync(kind):
+        synced.append(kind)
+        catalog.replace_all(kind, SERIES + [{"id": 6, "title": "Severance"}])
+
+    monkeypatch.setattr(catalog, "sync", sync)
+    assert asyncio.run(catalog.find("series", "severance", max_age=3600)) == []
+    assert synced == []  # just synced: a miss means it isn't there
+
+    with catalog._conn:
+        catalog._conn.execute("UPDATE sync_state SET synced_at = synced_at - 600")
+    assert _ids(asyncio.run(catalog.find("series", "breaking bad", max_age=3600)))[:1] == [1]
+    assert synced == []  # hits never resync
+    assert _ids(asyncio.run(catalog.find("series", "severance", max_age=3600))) == [6]
+    assert synced == ["series"]
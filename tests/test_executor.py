@@ -0,0 +1,80 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from bot.tools.executor import map_reduce_output, split_records
+
+
+def test_split_records_chunks_a_json_list_between_records():
+    records = [{"id": i, "title": f"Movie {i}"} for i in range(20)]
+    chunks, description, envelope = split_records(json.dumps(records), 100)
+    assert description == "20 JSON records"
+    assert envelope == ""
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert [record for chunk in chunks for record in json.loads(chunk)] == records
+
+
+def test_split_records_finds_nested_record_lists():
+    data = {"MediaContainer": {"size": 30, "Metadata": [{"ratingKey": str(i)} for i in range(30)]}}
+    chunks, description, envelope = split_records(json.dumps(data), 120)
+    assert description == "30 JSON records at MediaContainer.Metadata"
+    assert json.loads(envelope) == {"MediaContainer": {"size": 30, "Metadata": "<30 records, split across parts>"}}
+    assert sum(len(json.loads(chunk)) for chunk in chunks) == 30
+
+
+def test_split_records_falls_back_to_lines():
+    output = "\n".join(f"/media/movies/Movie {i}.mkv" for i in range(40)) + "\n" + "x" * 250
+    chunks, description, envelope = split_records(output, 100)
+    assert description == "43 lines"  # the long line is hard-split into three
+    assert envelope == ""
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "\n".join(chunks).replace("\n", "") == output.replace("\n", "")
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    """Stub call_executor: map calls echo their part number, reduce calls report what they merged."""
+    prompts = []
+
+    async def call_executor(prompt, cancel_token=None, max_tokens=None):
+        prompts.append(prompt)
+        if prompt.startswith("You are processing one part"):
+            part = re.search(r"^Part (\d+)/\d+:", prompt, re.M).group(1)
+            return f"items from part {part} ".ljust(300, ".")
+        return "merged " + ",".join(re.findall(r"^### Part (\d+)/", prompt, re.M))
+
+    monkeypatch.setattr("bot.tools.executor.call_executor", call_executor)
+    monkeypatch.setattr("bot.config.EXECUTOR_CHUNK_TOKENS", 25)  # 100-char chunks
+    monkeypatch.setattr("bot.config.MAX_EXECUTOR_CHUNKS", 20)
+    monkeypatch.setattr("bot.config.MAX_PARALLEL_EXECUTOR_CALLS", 3)
+    return prompts
+
+
+def lines_output(count):
+    return "\n".join(f"line {i}".ljust(40, ".") for i in range(count))  # two lines per chunk
+
+
+def test_map_reduce_merges_partials_in_one_call(executor, monkeypatch):
+    monkeypatch.setattr("bot.config.MAX_EXECUTOR_INPUT_TOKENS", 5000)
+    result = asyncio.run(map_reduce_output("ls /media", lines_output(8), ""))
+    assert result == "merged 1,2,3,4"
+    assert len(executor) == 5
+    assert "items from part 3" in executor[-1]
+
+
+def test_map_reduce_reduces_in_rounds_when_partials_are_too_big(executor, monkeypatch):
+    monkeypatch.setattr("bot.config.MAX_EXECUTOR_INPUT_TOKENS", 500)  # 2000-char reduce prompts
+    result = asyncio.run(map_reduce_output("ls /media", lines_output(20), ""))
+    # 10 partials of ~300 chars are merged three at a time, then once more
+    assert len(executor) == 10 + 4 + 1
+    assert result == "merged 1,2,3,4"
+    assert all(len(prompt) <= 2000 for prompt in executor[10:])
+
+
+def test_map_reduce_gives_up_past_the_chunk_cap(executor, monkeypatch):
+    monkeypatch.setattr("bot.config.MAX_EXECUTOR_INPUT_TOKENS", 5000)
+    monkeypatch.setattr("bot.config.MAX_EXECUTOR_CHUNKS", 3)
+    assert asyncio.run(map_reduce_output("ls /media", lines_output(8), "")) is None
+    assert executor == []
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from bot.history import SUMMARY_HEADER, HistoryManager
+from bot.history_store import HistoryStore
+from bot.tokens import TokenEstimator
+
+
+@pytest.fixture(autouse=True)
+def one_char_per_token(monkeypatch):
+    # Predictable budgets: a 30-char message is 31 tokens
+    monkeypatch.setattr("bot.history.token_estimator", TokenEstimator(chars_per_token=1.0))
+
+
+@pytest.fixture
+def summarizer(monkeypatch):
+    """Stub summarizer that records what it folds and waits for `release`."""
+    calls = []
+
+    async def summarize(previous_summary, entries, max_tokens):
+        calls.append([entry["content"] for entry in entries])
+        await summarize.release.wait()
+        return f"summary of {len(entries)} messages"
+
+    summarize.calls = calls
+    summarize.release = None
+    monkeypatch.setattr("bot.history.summarize_exchanges", summarize)
+    return summarize
+
+
+def message(label):
+    return label.ljust(30, ".")
+
+
+def test_over_budget_history_folds_oldest_exchanges(summarizer):
+    async def scenario():
+        summarizer.release = asyncio.Event()
+        manager = HistoryManager(budget_tokens=100, summary_tokens=20, keep_exchanges=1)
+        await manager.append_exchange(1, message("q1"), message("a1"))
+        await manager.append_exchange(1, message("q2"), message("a2"))
+
+        # Until the summary lands the old exchange stays verbatim
+        await asyncio.sleep(0)
+        assert summarizer.calls == [[message("q1"), message("a1")]]
+        assert [m["content"] for m in await manager.messages(1)] == [message(x) for x in ("q1", "a1", "q2", "a2")]
+
+        summarizer.release.set()
+        await manager._chats[1].summary_task
+        return await manager.messages(1)
+
+    messages = asyncio.run(scenario())
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+    assert messages[0]["content"].startswith(f"{SUMMARY_HEADER}\nsummary of 2 messages\n")
+    assert messages[0]["content"].endswith(message("q2"))
+
+
+def test_failed_summary_still_keeps_the_budget(monkeypatch):
+    async def broken(previous_summary, entries, max_tokens):
+        raise RuntimeError("executor down")
+
+    monkeypatch.setattr("bot.history.summarize_exchanges", broken)
+
+    async def scenario():
+        manager = HistoryManager(budget_tokens=100, summary_tokens=20, keep_exchanges=1)
+        await manager.append_exchange(1, message("q1"), message("a1"))
+        await manager.append_exchange(1, message("q2"), message("a2"))
+        await manager._chats[1].summary_task
+        return manager._chats[1]
+
+    history = asyncio.run(scenario())
+    assert history.summary == ""
+    assert [entry["content"] for entry in history.entries] == [message("q2"), message("a2")]
+
+
+def test_evicted_chats_reload_from_the_store(tmp_path):
+    async def scenario():
+        store = HistoryStore(tmp_path / "history.db", flush_interval=0)
+        manager = HistoryManager(store=store, max_cached_chats=2)
+        for chat_id in (1, 2, 3):
+            await manager.append_exchange(chat_id, f"hi from {chat_id}", "hello")
+        cached = list(manager._chats)
+
+        # Reloaded from the unflushed queue, evicting the least recently used chat
+        reloaded = await manager.messages(1)
+        cached_after = list(manager._chats)
+
+        await store.close()
+        store = HistoryStore(tmp_path / "history.db")
+        restarted = await HistoryManager(store=store).messages(2)
+        await store.close()
+        return cached, reloaded, cached_after, restarted
+
+    cached, reloaded, cached_after, restarted = asyncio.run(scenario())
+    assert cached == [2, 3]
+    assert reloaded == [{"role": "user", "content": "hi from 1"}, {"role": "assistant", "content": "hello"}]
+    assert cached_after == [3, 1]
+    assert restarted[0]["content"] == "hi from 2"
+
+
+def test_load_sees_pending_writes(tmp_path):
+    async def scenario():
+        store = HistoryStore(tmp_path / "history.db", flush_interval=60)
+        store.queue_save(1, "old summary", [{"role": "user", "content": "hi"}])
+        await store.flush()
+        on_disk = await store.load(1)
+
+        # Queued but not yet written: reads must not go back to the stale row
+        store.queue_save(1, "new summary", [])
+        pending_save = await store.load(1)
+        store.queue_delete(1)
+        pending_delete = await store.load(1)
+        await store.close()
+        return on_disk, pending_save, pending_delete
+
+    on_disk, pending_save, pending_delete = asyncio.run(scenario())
+    assert on_disk == ("old summary", [{"role": "user", "content": "hi"}])
+    assert pending_save == ("new summary", [])
+    assert pending_delete is None
@@ -0,0 +1,66 @@
+import asyncio
+import base64
+
+import pytest
+
+from bot.tools import macros
+from bot.tools.macros import _pick, magnet_hash, run_macro
+from bot.tools.service_client import parse_query_string
+
+HASH = "c12fe1c06bba254a9dc9f519b335aa7c1367a88a"
+
+LOOKUP = [
+    {"title": "The Office (US)", "year": 2005, "tvdbId": 73244},
+    {"title": "The Office", "year": 2001, "tvdbId": 78107},
+    {"title": "The Office", "year": 2019, "tvdbId": 360412},
+]
+
+
+def test_magnet_hash():
+    assert magnet_hash(f"magnet:?xt=urn:btih:{HASH.upper()}&dn=name") == HASH
+    base32 = base64.b32encode(bytes.fromhex(HASH)).decode()
+    assert magnet_hash(f"magnet:?xt=urn:btih:{base32}") == HASH
+    assert magnet_hash("magnet:?dn=no-hash") is None
+    assert magnet_hash("https://example.com/file.torrent") is None
+
+
+def test_pick_by_id_year_and_exact_title():
+    assert _pick(LOOKUP, "whatever", "tvdbId", 78107, None)[0]["year"] == 2001
+    assert _pick(LOOKUP, "The Office", "tvdbId", None, 2019)[0]["tvdbId"] == 360412
+    assert _pick(LOOKUP, "The Office (US)", "tvdbId", None, None)[0]["tvdbId"] == 73244
+
+
+def test_pick_returns_candidates_when_ambiguous():
+    chosen, candidates = _pick(LOOKUP, "The Office", "tvdbId", None, None)
+    assert chosen is None
+    assert [c["tvdbId"] for c in candidates] == [78107, 360412]
+    chosen, candidates = _pick(LOOKUP, "x", "tvdbId", 1, None)
+    assert chosen is None and len(candidates) == 3
+
+
+@pytest.mark.parametrize("macro, title", [("add_series", "Law & Order"), ("add_movie", "Fast & Furious 6")])
+def test_lookup_term_survives_query_parsing(monkeypatch, macro, title):
+    queries = []
+
+    async def fake_get_json(service, endpoint, query=None, fresh=False):
+        queries.append(query)
+        return []
+
+    monkeypatch.setattr(macros, "_get_json", fake_get_json)
+    result = asyncio.run(run_macro(macro, {"title": title}))
+    assert not result["success"]
+    assert parse_query_string(queries[0]) == {"term": title}
+
+
+def test_unexpected_errors_become_error_results(monkeypatch):
+    async def broken(tool_input):
+        return {}["id"]
+
+    monkeypatch.setitem(macros.MACROS, "add_series", broken)
+    result = asyncio.run(run_macro("add_series", {"title": "Dark"}))
+    assert result["success"] is False and "KeyError" in result["error"]
+
+
+def test_missing_required_fields():
+    result = asyncio.run(run_macro("add_torrent", {}))
+    assert result["success"] is False and "url" in result["error"]
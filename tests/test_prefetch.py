@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from bot import prefetch as prefetch_module
+from bot.prefetch import Prefetch, command_key, extract_titles, plan
+
+
+@pytest.mark.parametrize("message, first", [
+    ("Download Breaking Bad season 2", "Breaking Bad"),
+    ('add "Dune" please', "Dune"),
+    ("Is Severance downloaded yet", "Severance"),
+    ("add Inception to my library", "Inception"),
+    ("can you get me the movie Lord of the Rings in 4k", "Lord of the Rings"),
+])
+def test_extract_titles(message, first):
+    assert extract_titles(message)[0] == first
+
+
+@pytest.mark.parametrize("message", ["What's downloading?", "hello there", "Give me a status update", "Am I low on space?"])
+def test_extract_titles_ignores_filler(message):
+    assert extract_titles(message) == []
+
+
+def test_plan():
+    assert plan("What's downloading?") == ["qbt-status downloading"]
+    assert plan("any stalled torrents") == ["qbt-status"]
+    assert plan("how much disk space is left")[0].startswith("df -h ")
+    assert plan("Download Breaking Bad season 2") == ["sonarr-find 'Breaking Bad'"]
+    assert plan("get the movie Heat") == ["radarr-find Heat"]
+    assert plan('add "Dune"') == ["sonarr-find Dune", "radarr-find Dune"]
+    assert plan("thanks!") == []
+
+
+def test_command_key_ignores_quoting_and_case():
+    assert command_key("sonarr-find 'Breaking Bad'") == command_key('SONARR-FIND "breaking bad"')
+    assert command_key("sonarr-find 'unterminated") is None
+
+
+def test_take_and_ready_context(monkeypatch):
+    async def fake_run(command, timeout, cancel_token=None):
+        return (0, f"output of {command}\n", "")
+
+    monkeypatch.setattr("bot.tools.command_executor.run_command", fake_run)
+
+    async def scenario():
+        prefetch = Prefetch(["sonarr-find Dune", "radarr-find Dune", "qbt-status"])
+        taken = await prefetch.take('sonarr-find "dune"')
+        missed = await prefetch.take("df -h /")
+        await asyncio.sleep(0)
+        context = prefetch.ready_context()
+        again = prefetch.ready_context()
+        prefetch.cancel()
+        return taken, missed, context, again
+
+    taken, missed, context, again = asyncio.run(scenario())
+    assert taken == (0, "output of sonarr-find Dune\n", "")
+    assert missed is None
+    assert "$ radarr-find Dune\noutput of radarr-find Dune" in context and "$ qbt-status" in context
+    assert "sonarr-find" not in context
+    assert again == ""
+
+
+def test_start_prefetch_respects_config(monkeypatch):
+    monkeypatch.setattr("bot.config.PREFETCH_ENABLED", False)
+    assert prefetch_module.start_prefetch("What's downloading?") is None
+
+
+def test_release_offers_results_to_the_next_run(monkeypatch):
+    runs = []
+
+    async def fake_run(command, timeout, cancel_token=None):
+        runs.append(command)
+        return (0, f"output of {command}\n", "")
+
+    monkeypatch.setattr("bot.tools.command_executor.run_command", fake_run)
+
+    async def scenario():
+        prefetch = Prefetch(["sonarr-find Dune", "radarr-find Dune"])
+        # A lookup run claims everything, then hands over
+        await prefetch.take("sonarr-find Dune")
+        await asyncio.sleep(0)
+        assert "radarr-find" in prefetch.ready_context()
+        prefetch.release()
+        # The orchestrator's run gets the same results without running them again
+        taken = await prefetch.take("sonarr-find Dune")
+        context = prefetch.ready_context()
+        prefetch.cancel()
+        return taken, context
+
+    taken, context = asyncio.run(scenario())
+    assert taken == (0, "output of sonarr-find Dune\n", "")
+    assert "$ radarr-find Dune" in context and "sonarr-find" not in context
+    assert sorted(runs) == ["radarr-find Dune", "sonarr-find Dune"]
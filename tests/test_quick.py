@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from bot import quick
+from bot.quick import (
+    GB, INFINITE_ETA, MB, QuickError, _eta, _ranges, format_disk, format_downloads, format_find, format_missing,
+    missing_page_count, page_count, title_line,
+)
+
+DOWNLOADING = {"name": "Dune", "progress": 0.5, "size": 4 * GB, "state": "downloading", "dlspeed": 3 * MB, "eta": 720}
+DONE = {"name": "Heat", "progress": 1, "size": GB, "state": "uploading"}
+
+
+@pytest.mark.parametrize("seconds, text", [
+    (30, "1m"), (720, "12m"), (3700, "1h 1m"), (90000, "1d 1h"), (INFINITE_ETA, "∞"), (-1, "∞"), (None, "∞"),
+])
+def test_eta(seconds, text):
+    assert _eta(seconds) == text
+
+
+def test_ranges():
+    assert _ranges([1, 2, 3, 5, 7, 8]) == "E01-E03, E05, E07-E08"
+
+
+def test_format_downloads():
+    assert format_downloads([DOWNLOADING, DONE]).splitlines() == [
+        "📥 2 torrents · 3.0 MB/s total",
+        "",
+        "⬇️ Dune — 50% of 4.0 GB · 3.0 MB/s · ETA 12m",
+        "✅ Heat — done, 1.0 GB",
+    ]
+    assert format_downloads([], "stalled") == "📭 No stalled torrents."
+
+
+def test_pages():
+    torrents = [dict(DONE, name=f"T{i}") for i in range(23)]
+    assert (page_count(0), page_count(10), page_count(23)) == (1, 1, 3)
+    first = format_downloads(torrents).splitlines()
+    assert first[2] == "✅ T0 — done, 1.0 GB" and first[-1] == "… and 13 more"
+    last = format_downloads(torrents, page=2).splitlines()
+    assert last[2:] == ["✅ T20 — done, 1.0 GB", "✅ T21 — done, 1.0 GB", "✅ T22 — done, 1.0 GB"]
+
+
+def test_format_missing_groups_by_season():
+    episodes = [{"seasonNumber": 1, "episodeNumber": n} for n in (1, 2, 3, 5)] + [{"seasonNumber": 2, "episodeNumber": 1}]
+    assert format_missing({"title": "Dark"}, episodes).splitlines() == [
+        "📺 Dark — 5 missing episodes", "", "S01 (4): E01-E03, E05", "S02 (1): E01",
+    ]
+    assert format_missing({"title": "Dark"}, []) == "✅ Dark has no missing monitored episodes."
+    assert missing_page_count([{"seasonNumber": s} for s in range(12)]) == 2
+
+
+def test_title_lines():
+    series = {"kind": "series", "title": "Dark", "year": 2017, "monitored": True, "id": 1,
+              "statistics": {"episodeFileCount": 5, "episodeCount": 26}}
+    movie = {"kind": "movie", "title": "Heat", "year": 1995, "hasFile": True, "sizeOnDisk": 2 * GB, "monitored": False, "id": 2}
+    assert title_line(series) == "📺 Dark (2017) — 5/26 episodes · monitored · #1"
+    assert title_line(dict(series, statistics={})) == "📺 Dark (2017) — monitored · #1"
+    assert title_line(movie) == "🎬 Heat (1995) — on disk, 2.0 GB · unmonitored · #2"
+    assert title_line(dict(movie, hasFile=False, sizeOnDisk=0)) == "🎬 Heat (1995) — not downloaded · unmonitored · #2"
+    assert format_find("zzz", []) == "🔍 Nothing in the library matches 'zzz'."
+    assert format_find("dark", [series]).startswith("🔍 1 match for 'dark'")
+
+
+def test_format_disk():
+    assert format_disk([
+        {"path": "/mnt/storage", "total": 100 * GB, "used": 95 * GB, "free": 5 * GB},
+        {"path": "/downloads", "error": "No such file or directory"},
+    ]).splitlines() == [
+        "💾 /mnt/storage — 5.0 GB free of 100.0 GB (95% used)",
+        "⚠️ Under 10 GB free",
+        "❓ /downloads — unavailable (No such file or directory)",
+    ]
+
+
+def test_unknown_torrent_filter():
+    with pytest.raises(QuickError):
+        asyncio.run(quick.torrent_list("bogus"))
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    from bot.catalog import LibraryCatalog
+
+    catalog = LibraryCatalog(tmp_path / "catalog.db")
+    catalog.replace_all("series", [{"id": 3, "title": "Dark"}, {"id": 9, "title": "24"}])
+    catalog.replace_all("movie", [])
+    monkeypatch.setattr("bot.catalog.get_catalog", lambda: catalog)
+    yield catalog
+    catalog._conn.close()
+
+
+class FakeSonarr:
+    def __init__(self, error=None):
+        self.error = error
+
+    async def request(self, service, method, endpoint, query=None, data=None, fresh=False):
+        if self.error:
+            raise self.error
+        return {"ok": False, "status": 404, "json": None, "text": "Not Found"}
+
+
+def test_resolve_series_by_id_then_title(library, monkeypatch):
+    monkeypatch.setattr("bot.tools.service_client.get_service_client", lambda: FakeSonarr())
+    assert asyncio.run(quick._resolve_series("3"))["title"] == "Dark"
+    assert asyncio.run(quick._resolve_series("24"))["id"] == 9  # no series #24: it's a title
+    assert asyncio.run(quick._resolve_series("dark"))["id"] == 3
+    with pytest.raises(QuickError):
+        asyncio.run(quick._resolve_series("404"))
+
+
+def test_find_titles_reports_sync_failures(library, monkeypatch):
+    from bot.tools.service_client import ServiceError
+
+    async def failing_sync(kind):
+        raise ServiceError("Request failed: connection refused")
+
+    monkeypatch.setattr("bot.tools.service_client.get_service_client", lambda: FakeSonarr(ServiceError("down")))
+    monkeypatch.setattr(library, "sync", failing_sync)
+    library._conn.execute("DELETE FROM sync_state WHERE kind = 'movie'")  # movies never synced
+    with pytest.raises(QuickError):
+        asyncio.run(quick.find_titles("dark"))
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from bot import router
+from bot.router import FULL, INSTANT, LOOKUP, classify, route_message
+
+
+@pytest.mark.parametrize("message, tier, status_filter, disk", [
+    ("What's downloading?", INSTANT, "downloading", False),
+    ("any stalled torrents", INSTANT, "stalled", False),
+    ("show me seeding torrents", INSTANT, "seeding", False),
+    ("torrents", INSTANT, "all", False),
+    ("how much disk space is left", INSTANT, None, True),
+    ("Do I have Dune?", LOOKUP, None, False),
+    ("How many movies are in Plex?", LOOKUP, None, False),
+    ("what's downloading for Dune?", LOOKUP, None, False),  # names a title: not a template answer
+    ("Add Breaking Bad", FULL, None, False),
+    ("please delete the old Dune torrent", FULL, None, False),
+    ("why is Severance stuck", FULL, None, False),
+    ("", FULL, None, False),
+    ("what " * 30 + "?", FULL, None, False),
+])
+def test_classify(message, tier, status_filter, disk):
+    route = classify(message)
+    assert (route.tier, route.status_filter, route.disk) == (tier, status_filter, disk)
+
+
+def test_references_to_earlier_turns_need_the_orchestrator():
+    assert classify("is it done?").tier == LOOKUP
+    assert classify("is it done?", has_history=True).tier == FULL
+
+
+def test_rules_leave_bare_titles_undecided():
+    assert classify("Breaking Bad") is None
+
+
+def test_route_message_without_classifier(monkeypatch):
+    monkeypatch.setattr("bot.config.ROUTER_ENABLED", True)
+    monkeypatch.setattr("bot.config.ROUTER_CLASSIFIER", False)
+    route = asyncio.run(route_message("Breaking Bad"))
+    assert (route.tier, route.reason) == (FULL, "unclassified")
+    assert asyncio.run(route_message("What's downloading?")).tier == INSTANT
+
+
+def test_route_message_asks_the_classifier(monkeypatch):
+    async def fake_classifier(message, cancel_token=None):
+        return LOOKUP
+
+    monkeypatch.setattr("bot.config.ROUTER_ENABLED", True)
+    monkeypatch.setattr("bot.config.ROUTER_CLASSIFIER", True)
+    monkeypatch.setattr(router, "_ask_classifier", fake_classifier)
+    route = asyncio.run(route_message("Breaking Bad"))
+    assert (route.tier, route.reason) == (LOOKUP, "classifier")
+
+
+def test_route_message_disabled(monkeypatch):
+    monkeypatch.setattr("bot.config.ROUTER_ENABLED", False)
+    route = asyncio.run(route_message("What's downloading?"))
+    assert (route.tier, route.reason) == (FULL, "router disabled")
+
+
+@pytest.mark.parametrize("answer, tier", [("LOOKUP", LOOKUP), ("full.", FULL), ("**LOOKUP**", LOOKUP), ("", None), ("Maybe", None)])
+def test_classifier_answers(monkeypatch, answer, tier):
+    async def fake_call_executor(prompt, cancel_token=None, max_tokens=None):
+        return answer
+
+    monkeypatch.setattr("bot.tools.executor.call_executor", fake_call_executor)
+    assert asyncio.run(router._ask_classifier("Breaking Bad")) == tier
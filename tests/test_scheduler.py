@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from bot.scheduler import CancellationToken, JobCancelled, JobScheduler, SchedulerFull, current_chat
+
+
+def test_one_job_per_chat_and_round_robin():
+    async def scenario():
+        scheduler = JobScheduler(max_concurrent=1)
+        started = []
+
+        async def work(job):
+            started.append((job.chat_id, job.label))
+            await asyncio.sleep(0)
+
+        jobs = [
+            scheduler.submit(1, work, "a1"),
+            scheduler.submit(1, work, "a2"),
+            scheduler.submit(2, work, "b1"),
+        ]
+        await asyncio.gather(*(job.done.wait() for job in jobs))
+        return started
+
+    # Chat 2 gets its turn before chat 1's second job
+    assert asyncio.run(scenario()) == [(1, "a1"), (2, "b1"), (1, "a2")]
+
+
+def test_jobs_run_with_their_chat_set():
+    async def scenario():
+        scheduler = JobScheduler()
+        seen = []
+
+        async def work(job):
+            seen.append(current_chat.get())
+
+        job = scheduler.submit(42, work)
+        await job.done.wait()
+        return seen
+
+    assert asyncio.run(scenario()) == [42]
+
+
+def test_queue_limits():
+    async def scenario():
+        scheduler = JobScheduler(max_concurrent=1, max_queued_per_chat=1, max_queued_total=2)
+        release = asyncio.Event()
+
+        async def work(job):
+            await release.wait()
+
+        scheduler.submit(1, work)  # running
+        scheduler.submit(1, work)  # queued
+        with pytest.raises(SchedulerFull):
+            scheduler.submit(1, work)
+        scheduler.submit(2, work)
+        with pytest.raises(SchedulerFull):
+            scheduler.submit(3, work)
+        assert scheduler.running_count == 1 and scheduler.queued_count == 2
+        scheduler.cancel_chat(1)
+        scheduler.cancel_chat(2)
+        release.set()
+
+    asyncio.run(scenario())
+
+
+def test_cancel_chat_stops_running_and_queued_jobs():
+    async def scenario():
+        scheduler = JobScheduler(max_concurrent=1)
+        finished = []
+
+        async def work(job):
+            await job.token.race(asyncio.sleep(10))
+            finished.append(job.label)
+
+        running = scheduler.submit(1, work, "running")
+        queued = scheduler.submit(1, work, "queued")
+        await asyncio.sleep(0)
+        assert scheduler.cancel_chat(1) == 2
+        await asyncio.wait_for(asyncio.gather(running.done.wait(), queued.done.wait()), 1)
+        return finished, running.token.cancelled, queued.token.cancelled
+
+    assert asyncio.run(scenario()) == ([], True, True)
+
+
+def test_race_raises_when_the_token_fires():
+    async def scenario():
+        token = CancellationToken()
+        asyncio.get_running_loop().call_later(0.01, token.cancel)
+        with pytest.raises(JobCancelled):
+            await token.race(asyncio.sleep(10))
+        assert await CancellationToken().race(asyncio.sleep(0, result="done")) == "done"
+
+    asyncio.run(scenario())
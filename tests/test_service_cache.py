@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from bot.tools.service_cache import ServiceCache, is_mutating_get
+
+
+@pytest.mark.parametrize("service, endpoint, ttl", [
+    ("sonarr", "/series", 60),
+    ("sonarr", "/series/12", 60),
+    ("sonarr", "/series/lookup", 300),
+    ("sonarr", "/series/12/extra", 0),
+    ("sonarr", "/episode", 30),
+    ("sonarr", "/qualityprofile", 3600),
+    ("sonarr", "/wanted/missing", 10),
+    ("sonarr", "/command", 0),
+    ("radarr", "/movie/7", 60),
+    ("radarr", "/movie/lookup", 300),
+    ("qbt", "/torrents/info", 5),
+    ("qbt", "/sync/maindata", 0),
+    ("plex", "/library/sections", 300),
+    ("plex", "/library/sections/1/all", 60),
+    ("plex", "/library/sections/1/refresh", 0),
+    ("bazarr", "/badges", 30),
+    ("unknown", "/series", 0),
+])
+def test_ttl_for(service, endpoint, ttl):
+    assert ServiceCache.ttl_for(service, endpoint) == ttl
+
+
+def test_mutating_gets():
+    assert is_mutating_get("plex", "/library/sections/1/refresh")
+    assert not is_mutating_get("plex", "/library/sections")
+    assert not is_mutating_get("sonarr", "/refresh")
+
+
+def _counting_loader(calls):
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return {"ok": True, "status": 200, "json": len(calls), "text": ""}
+    return loader
+
+
+def test_hits_and_coalescing():
+    async def scenario():
+        cache, calls = ServiceCache(), []
+        loader = _counting_loader(calls)
+        first = await asyncio.gather(*(cache.fetch("sonarr", "/series", None, loader) for _ in range(3)))
+        again = await cache.fetch("sonarr", "/series", None, loader)
+        fresh = await cache.fetch("sonarr", "/series", None, loader, fresh=True)
+        return [r["json"] for r in first], again["json"], fresh["json"], cache.stats()
+
+    first, again, fresh, stats = asyncio.run(scenario())
+    assert first == [1, 1, 1] and again == 1 and fresh == 2
+    assert stats["misses"] == 2 and stats["coalesced"] == 2 and stats["hits"] == 1
+
+
+def test_mutation_invalidates_affected_resources_only():
+    async def scenario():
+        cache, calls = ServiceCache(verify_window=0), []
+        loader = _counting_loader(calls)
+        await cache.fetch("sonarr", "/series", None, loader)
+        await cache.fetch("sonarr", "/qualityprofile", None, loader)
+        cache.record_mutation("sonarr", "/series/3")
+        series = await cache.fetch("sonarr", "/series", None, loader)
+        profiles = await cache.fetch("sonarr", "/qualityprofile", None, loader)
+        return series["json"], profiles["json"]
+
+    assert asyncio.run(scenario()) == (3, 2)
+
+
+def test_verification_window_bypasses_cache():
+    async def scenario():
+        cache, calls = ServiceCache(verify_window=60), []
+        loader = _counting_loader(calls)
+        await cache.fetch("radarr", "/qualityprofile", None, loader)
+        cache.record_mutation("radarr", "/movie")
+        return (await cache.fetch("radarr", "/qualityprofile", None, loader))["json"]
+
+    assert asyncio.run(scenario()) == 2
@@ -0,0 +1,70 @@
+import pytest
+
+from bot.tools.service_client import (
+    parse_api_call_args, parse_api_call_command, parse_query_string, split_leading_command,
+)
+
+
+@pytest.mark.parametrize("query, params", [
+    (None, {}),
+    ("", {}),
+    ("term=Breaking Bad", {"term": "Breaking Bad"}),
+    ("seriesId=12&includeImages=false", {"seriesId": "12", "includeImages": "false"}),
+    ("filter=downloading&sort=", {"filter": "downloading", "sort": ""}),
+    ("expr=a=b", {"expr": "a=b"}),
+    ("flag&key=value", {"key": "value"}),
+    ("term=Law%20%26%20Order", {"term": "Law & Order"}),
+    ("term=100%", {"term": "100%"}),
+    ("term=C++", {"term": "C++"}),
+])
+def test_parse_query_string(query, params):
+    assert parse_query_string(query) == params
+
+
+def test_parse_api_call_args():
+    assert parse_api_call_args(["sonarr", "GET", "/series"]) == {
+        "service": "sonarr", "method": "GET", "endpoint": "/series", "query": None, "data": None,
+    }
+    assert parse_api_call_args(["radarr", "PUT", "/movie/1", "-q", "moveFiles=true", "--data", '{"id": 1}']) == {
+        "service": "radarr", "method": "PUT", "endpoint": "/movie/1", "query": "moveFiles=true", "data": '{"id": 1}',
+    }
+    assert parse_api_call_args(["sonarr", "GET"]) is None
+    assert parse_api_call_args(["sonarr", "GET", "/series", "-q"]) is None
+    assert parse_api_call_args(["sonarr", "GET", "/series", "--verbose"]) is None
+
+
+def test_parse_api_call_command():
+    parsed = parse_api_call_command("api-call sonarr GET /series -q 'term=The Office' | jq '.[0].title'")
+    assert parsed["endpoint"] == "/series" and parsed["query"] == "term=The Office"
+    assert parsed["pipe"] == "jq '.[0].title'"
+    assert parse_api_call_command("/usr/local/bin/api-call qbt GET /torrents/info")["service"] == "qbt"
+    assert parse_api_call_command("api-call sonarr GET /series > out.json") is None
+    assert parse_api_call_command("ls /mnt/storage") is None
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("sonarr-find 'Breaking Bad'", (["sonarr-find", "Breaking Bad"], None)),
+    ('radarr-find "Dune" | jq length', (["radarr-find", "Dune"], "jq length")),
+    ("/opt/blackbeard/scripts/qbt-status downloading", (["qbt-status", "downloading"], None)),
+    ("sonarr-find 'a|b'", (["sonarr-find", "a|b"], None)),
+    ("sonarr-find 'Tom & Jerry'", (["sonarr-find", "Tom & Jerry"], None)),
+    ("sonarr-find Tom\\ \\&\\ Jerry", (["sonarr-find", "Tom & Jerry"], None)),
+])
+def test_split_leading_command(command, expected):
+    assert split_leading_command(command) == expected
+
+
+@pytest.mark.parametrize("command", [
+    "",
+    "sonarr-find Dune; rm -rf /",
+    "sonarr-find Dune && echo ok",
+    "sonarr-find Dune || echo failed",
+    "sonarr-find Dune > out.txt",
+    "sonarr-find $(cat title)",
+    'sonarr-find "$TITLE"',
+    "sonarr-find `cat title`",
+    "sonarr-find Dune |",
+    "sonarr-find 'unterminated",
+])
+def test_split_leading_command_leaves_shell_syntax_to_the_shell(command):
+    assert split_leading_command(command) is None
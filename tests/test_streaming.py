@@ -0,0 +1,142 @@
+import asyncio
+
+from telegram.error import RetryAfter
+
+from bot.streaming import TELEGRAM_MAX_LENGTH, TelegramStreamWriter, chunk_message
+
+
+def test_short_message_is_one_chunk():
+    assert chunk_message("hello") == ["hello"]
+    assert chunk_message("x" * TELEGRAM_MAX_LENGTH) == ["x" * TELEGRAM_MAX_LENGTH]
+
+
+def test_breaks_at_last_newline_within_limit():
+    text = "a" * 60 + "\n" + "b" * 30 + "\n" + "c" * 50
+    assert chunk_message(text, max_length=100) == ["a" * 60 + "\n" + "b" * 30, "c" * 50]
+
+
+def test_hard_splits_without_a_usable_newline():
+    # A newline in the first half of the window isn't worth breaking at
+    text = "a" * 10 + "\n" + "b" * 200
+    chunks = chunk_message(text, max_length=100)
+    assert chunks[0] == text[:100]
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "".join(chunks) == text
+
+
+def test_chunks_cover_the_text():
+    text = "\n".join(f"line {i} " + "x" * (i % 40) for i in range(500))
+    chunks = chunk_message(text)
+    assert all(len(chunk) <= TELEGRAM_MAX_LENGTH for chunk in chunks)
+    assert "\n".join(chunks) == text
+
+
+class FakeMessage:
+    """Just enough of telegram.Message: replies, edits and deletes, recorded in order."""
+
+    def __init__(self, log, text="", fail_next=None):
+        self.log = log
+        self.text = text
+        self.fail_next = fail_next  # exception raised by the next send/edit
+        self.deleted = False
+
+    def _maybe_fail(self):
+        if self.fail_next is not None:
+            error, self.fail_next = self.fail_next, None
+            raise error
+
+    async def reply_text(self, text, **kwargs):
+        self._maybe_fail()
+        message = FakeMessage(self.log, text)
+        self.log.append(("send", text))
+        return message
+
+    async def edit_text(self, text, **kwargs):
+        self._maybe_fail()
+        self.text = text
+        self.log.append(("edit", text))
+        return self
+
+    async def delete(self):
+        self.deleted = True
+        self.log.append(("delete", self.text))
+        return True
+
+
+def _writer(edit_interval=0.05, fail_next=None):
+    log = []
+    return TelegramStreamWriter(FakeMessage(log, fail_next=fail_next), edit_interval), log
+
+
+def test_first_delta_is_sent_and_later_ones_coalesce():
+    async def scenario():
+        writer, log = _writer()
+        await writer.write("Hel")
+        for delta in ("lo", ", wor", "ld"):
+            await writer.write(delta)
+        await asyncio.sleep(0.1)
+        return log
+
+    assert asyncio.run(scenario()) == [("send", "Hel"), ("edit", "Hello, world")]
+
+
+def test_finish_renders_the_final_text():
+    async def scenario():
+        writer, log = _writer(edit_interval=10)
+        await writer.write("Draft")
+        await writer.write(" still streaming")  # pending edit, cancelled by finish
+        delivered = await writer.finish("Final answer")
+        return delivered, log
+
+    delivered, log = asyncio.run(scenario())
+    assert delivered
+    assert log == [("send", "Draft"), ("edit", "Final answer")]
+
+
+def test_finish_without_streamed_text_sends_nothing():
+    async def scenario():
+        writer, log = _writer()
+        return await writer.finish(""), log
+
+    assert asyncio.run(scenario()) == (False, [])
+
+
+def test_long_text_rolls_over_and_final_drops_extra_messages():
+    async def scenario():
+        writer, log = _writer(edit_interval=0)
+        await writer.write("a" * 3000)
+        await writer.write("\n" + "b" * 3000)
+        await asyncio.sleep(0.01)
+        rolled = list(log)
+        await writer.finish("short")
+        return rolled, log[len(rolled):]
+
+    rolled, final = asyncio.run(scenario())
+    assert rolled == [("send", "a" * 3000), ("send", "b" * 3000)]
+    assert final == [("edit", "short"), ("delete", "b" * 3000)]
+
+
+def test_retry_after_is_honoured_once():
+    async def scenario():
+        writer, log = _writer(fail_next=RetryAfter(0))
+        await writer.write("Hello")
+        return log
+
+    assert asyncio.run(scenario()) == [("send", "Hello")]
+
+
+def test_discard_deletes_narration():
+    async def scenario():
+        writer, log = _writer(edit_interval=10)
+        await writer.write("Let me check Sonarr...")
+        await writer.write(" one moment")  # pending edit, dropped with the draft
+        await writer.discard()
+        await writer.write("Dune is in the library.")
+        await writer.finish("Dune is in the library.")
+        return log
+
+    assert asyncio.run(scenario()) == [
+        ("send", "Let me check Sonarr..."),
+        ("delete", "Let me check Sonarr..."),
+        ("send", "Dune is in the library."),
+    ]
@@ -0,0 +1,55 @@
+import pytest
+
+from bot.tokens import (
+    DEFAULT_CHARS_PER_TOKEN,
+    MAX_CHARS_PER_TOKEN,
+    MIN_CALIBRATION_CHARS,
+    MIN_CHARS_PER_TOKEN,
+    TokenEstimator,
+    content_chars,
+)
+
+
+def test_estimate_rounds_up():
+    estimator = TokenEstimator(chars_per_token=4.0)
+    assert estimator.estimate("") == 1
+    assert estimator.estimate("x" * 40) == 11
+
+
+def test_calibration_converges_on_the_observed_ratio():
+    estimator = TokenEstimator()
+    for _ in range(30):
+        estimator.observe(12000, 4000)  # 3 chars per token
+    assert estimator.chars_per_token == pytest.approx(3.0, abs=0.01)
+    assert estimator.observations == 30
+    assert estimator.estimate("x" * 3000) == pytest.approx(1000, abs=5)
+
+
+def test_small_or_empty_observations_are_ignored():
+    estimator = TokenEstimator()
+    estimator.observe(MIN_CALIBRATION_CHARS - 1, 10)
+    estimator.observe(50000, 0)
+    assert estimator.chars_per_token == DEFAULT_CHARS_PER_TOKEN
+    assert estimator.observations == 0
+
+
+@pytest.mark.parametrize("chars, tokens, bound", [
+    (100000, 10, MAX_CHARS_PER_TOKEN),
+    (2000, 2000, MIN_CHARS_PER_TOKEN),
+])
+def test_calibration_stays_clamped(chars, tokens, bound):
+    estimator = TokenEstimator()
+    for _ in range(50):
+        estimator.observe(chars, tokens)
+        assert MIN_CHARS_PER_TOKEN <= estimator.chars_per_token <= MAX_CHARS_PER_TOKEN
+    assert estimator.chars_per_token == bound
+
+
+def test_content_chars_counts_text_and_tool_input():
+    blocks = [
+        {"type": "text", "text": "hello"},
+        {"type": "tool_use", "input": {"command": "ls"}},
+        {"type": "tool_result", "content": [{"type": "text", "text": "abc"}]},
+    ]
+    assert content_chars("hello") == 5
+    assert content_chars(blocks) == 5 + len('{"command": "ls"}') + 3
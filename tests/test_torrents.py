@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from bot.scheduler import current_chat
+from bot.torrents import FILTERS, TorrentTracker
+
+TORRENTS = {
+    "aaa": {"name": "Dune", "state": "downloading", "progress": 0.5, "dlspeed": 1000, "added_on": 1},
+    "bbb": {"name": "Heat", "state": "uploading", "progress": 1.0, "upspeed": 10, "added_on": 2},
+    "ccc": {"name": "Alien", "state": "pausedDL", "progress": 0.1, "added_on": 3},
+    "ddd": {"name": "Saw", "state": "stalledDL", "progress": 0.2, "added_on": 4},
+    "eee": {"name": "Up", "state": "missingFiles", "progress": 0.0, "added_on": 5},
+}
+
+
+def _tracker(torrents=TORRENTS):
+    tracker = TorrentTracker()
+    tracker.apply({"rid": 1, "full_update": True, "torrents": {h: dict(t) for h, t in torrents.items()}})
+    return tracker
+
+
+def _names(torrents):
+    return [t["name"] for t in torrents]
+
+
+def test_full_update_builds_the_table():
+    tracker = _tracker()
+    assert tracker.rid == 1 and tracker.is_fresh()
+    assert tracker.torrents["aaa"] == dict(TORRENTS["aaa"], hash="aaa")
+    # A later full update replaces the table: torrents it doesn't list are gone
+    tracker.apply({"rid": 2, "full_update": True, "torrents": {"bbb": {"name": "Heat"}}})
+    assert list(tracker.torrents) == ["bbb"] and tracker.torrents["bbb"]["progress"] == 1.0
+
+
+def test_deltas_merge_changed_fields_and_remove_torrents():
+    tracker = _tracker()
+    tracker.watch("ccc", 42)
+    tracker.apply({
+        "rid": 2,
+        "torrents": {"aaa": {"progress": 0.75}, "fff": {"name": "Jaws", "state": "metaDL"}},
+        "torrents_removed": ["ccc"],
+        "server_state": {"dl_info_speed": 5},
+    })
+    assert tracker.rid == 2
+    assert tracker.torrents["aaa"]["progress"] == 0.75 and tracker.torrents["aaa"]["name"] == "Dune"
+    assert tracker.torrents["fff"] == {"hash": "fff", "name": "Jaws", "state": "metaDL"}
+    assert "ccc" not in tracker.torrents and "ccc" not in tracker.watchers
+    assert tracker.server_state == {"dl_info_speed": 5}
+
+
+@pytest.mark.parametrize("state_filter, names", [
+    ("all", ["Dune", "Heat", "Alien", "Saw", "Up"]),
+    ("downloading", ["Dune", "Alien", "Saw"]),
+    ("seeding", ["Heat"]),
+    ("completed", ["Heat"]),
+    ("paused", ["Alien"]),
+    ("resumed", ["Dune", "Heat", "Saw", "Up"]),
+    ("active", ["Dune", "Heat"]),
+    ("inactive", ["Alien", "Saw", "Up"]),
+    ("stalled", ["Saw"]),
+    ("stalled_downloading", ["Saw"]),
+    ("errored", ["Up"]),
+])
+def test_status_filters(state_filter, names):
+    assert _names(_tracker().status(state_filter)) == names
+
+
+def test_status_is_none_when_unknown_or_stale():
+    assert set(FILTERS) >= {"all", "downloading", "seeding", "completed", "paused", "stalled", "errored"}
+    assert _tracker().status("bogus") is None
+    assert TorrentTracker().status() is None  # never synced
+
+
+def test_completion_notifies_watchers_once():
+    async def scenario():
+        tracker = _tracker()
+        sent = []
+
+        async def notifier(chat_id, text):
+            sent.append((chat_id, text))
+
+        tracker.notifier = notifier
+        tracker.watch("aaa", 42)
+        tracker.apply({"rid": 2, "torrents": {"aaa": {"progress": 0.99}}})
+        tracker.apply({"rid": 3, "torrents": {"aaa": {"progress": 1.0, "total_size": 2 * 1024 ** 3}}})
+        tracker.apply({"rid": 4, "torrents": {"aaa": {"state": "uploading"}}})
+        await asyncio.sleep(0)
+        return sent, tracker.watchers
+
+    sent, watchers = asyncio.run(scenario())
+    assert sent == [(42, "✅ Download finished: Dune (2.00 GB)")]
+    assert watchers == {}
+
+
+def test_added_torrents_are_watched_for_the_adding_chat():
+    async def scenario():
+        tracker = _tracker()
+        current_chat.set(7)
+        tracker.on_mutation("qbt", "POST", "/torrents/add", {"ok": True})
+        tracker.apply({"rid": 2, "torrents": {"fff": {"name": "Jaws", "progress": 0.0}}})
+        return tracker.watchers
+
+    assert asyncio.run(scenario()) == {"fff": {7}}
+
+
+def test_first_sync_does_not_notify():
+    tracker = TorrentTracker()
+    tracker.watch("aaa", 42)
+    tracker.apply({"rid": 1, "full_update": True, "torrents": {"aaa": {"name": "Dune", "progress": 1.0}}})
+    assert tracker.watchers == {"aaa": {42}}